@@ -0,0 +1,267 @@
+"""
+Admission control for the FastAPI endpoints.
+
+Each expensive route belongs to a group (chatbot, products, outlets) with:
+
+  * a concurrency limit: at most `max_concurrent` requests of the group run
+    at once in this worker;
+  * a bounded wait queue: up to `max_queue` more wait at most `max_wait_s`
+    for a slot, otherwise they get 503 + Retry-After right away;
+  * a per-client token bucket (`client_rpm`, `client_burst`): clients over
+    their rate get 429 + Retry-After before they take a queue slot.
+
+Clients are identified by the peer address. Headers a caller can set
+freely (X-Client-ID, X-Forwarded-For) are only believed when the peer is one
+of ADMISSION_TRUSTED_PROXIES (addresses or CIDRs of a gateway that
+authenticates callers and sets them); otherwise a new X-Client-ID per request
+would sidestep the per-client limit. A slot is held until the response body
+has been sent, so NDJSON streams count too. Settings come from
+ADMISSION_<GROUP>_<SETTING> env vars, e.g. ADMISSION_CHATBOT_CONCURRENCY=8;
+ADMISSION_ENABLED=0 turns it all off.
+"""
+import asyncio
+import ipaddress
+import math
+import os
+import statistics
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+MAX_TRACKED_CLIENTS = int(os.getenv("ADMISSION_MAX_CLIENTS", "10000"))
+TRUSTED_PROXIES = [p.strip() for p in os.getenv("ADMISSION_TRUSTED_PROXIES", "").split(",") if p.strip()]
+
+
+@dataclass(frozen=True)
+class EndpointPolicy:
+    max_concurrent: int
+    max_queue: int
+    max_wait_s: float
+    client_rpm: float
+    client_burst: int
+
+    @classmethod
+    def from_env(cls, group: str, max_concurrent: int, max_queue: int, max_wait_s: float, client_rpm: float, client_burst: int) -> "EndpointPolicy":
+        def setting(name, default, cast):
+            return cast(os.getenv(f"ADMISSION_{group.upper()}_{name}", default))
+        return cls(
+            max_concurrent=setting("CONCURRENCY", max_concurrent, int),
+            max_queue=setting("QUEUE", max_queue, int),
+            max_wait_s=setting("MAX_WAIT_S", max_wait_s, float),
+            client_rpm=setting("CLIENT_RPM", client_rpm, float),
+            client_burst=setting("CLIENT_BURST", client_burst, int),
+        )
+
+
+# Agent turns hold a slot for seconds; product and outlet lookups are one embedding/SQL call plus one LLM call
+POLICIES = {
+    "chatbot": EndpointPolicy.from_env("chatbot", max_concurrent=8, max_queue=16, max_wait_s=2.0, client_rpm=20, client_burst=5),
+    "products": EndpointPolicy.from_env("products", max_concurrent=16, max_queue=32, max_wait_s=1.0, client_rpm=60, client_burst=10),
+    "outlets": EndpointPolicy.from_env("outlets", max_concurrent=16, max_queue=32, max_wait_s=1.0, client_rpm=60, client_burst=10),
+}
+
+ROUTE_GROUPS = {
+    "/chatbot": "chatbot",
+    "/chatbot/stream": "chatbot",
+    "/products": "products",
+    "/outlets": "outlets",
+    "/outlets/stream": "outlets",
+}
+
+
+class Rejected(Exception):
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ClientBuckets:
+    """Per-client token buckets, least recently seen clients forgotten beyond `max_clients`."""
+
+    def __init__(self, rate_per_s: float, burst: int, clock: Callable[[], float] = time.monotonic, max_clients: int = MAX_TRACKED_CLIENTS):
+        self.rate_per_s = rate_per_s
+        self.burst = max(1, burst)
+        self.max_clients = max_clients
+        self._clock = clock
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, client: str) -> float:
+        """0 if the client may proceed (one token taken), else seconds until its next token."""
+        if self.rate_per_s <= 0:
+            return 0.0
+        now = self._clock()
+        tokens, updated = self._buckets.pop(client, (float(self.burst), now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate_per_s)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate_per_s
+        self._buckets[client] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class EndpointLimiter:
+    """Concurrency limit + bounded wait queue + per-client rate for one route group (one event loop)."""
+
+    def __init__(self, name: str, policy: EndpointPolicy, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.policy = policy
+        self._clock = clock
+        self._slots = asyncio.Semaphore(policy.max_concurrent)
+        self.clients = ClientBuckets(policy.client_rpm / 60, policy.client_burst, clock)
+        self.in_flight = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.admitted = 0
+        self.rejected = {"rate_limited": 0, "queue_full": 0, "queue_timeout": 0}
+        self._service_s = 0.0  # EWMA of slot hold time, for Retry-After
+        self._waits_ms = deque(maxlen=1000)
+
+    def retry_after_overload(self) -> int:
+        # Roughly how long until the current queue has drained
+        per_slot = self._service_s or self.policy.max_wait_s
+        return max(1, math.ceil(per_slot * (self.queued + 1) / self.policy.max_concurrent))
+
+    async def acquire(self, client: str) -> float:
+        """Take a slot for `client`; returns seconds spent queued, raises Rejected."""
+        wait = self.clients.take(client)
+        if wait > 0:
+            self.rejected["rate_limited"] += 1
+            raise Rejected(429, f"Too many {self.name} requests from this client", max(1, math.ceil(wait)))
+
+        start = self._clock()
+        if self._slots.locked():
+            if self.queued >= self.policy.max_queue:
+                self.rejected["queue_full"] += 1
+                raise Rejected(503, f"The {self.name} service is overloaded", self.retry_after_overload())
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.policy.max_wait_s)
+            except asyncio.TimeoutError:
+                self.rejected["queue_timeout"] += 1
+                raise Rejected(503, f"The {self.name} service is overloaded", self.retry_after_overload())
+            finally:
+                self.queued -= 1
+        else:
+            await self._slots.acquire()
+
+        queued_s = self._clock() - start
+        self._waits_ms.append(queued_s * 1000)
+        self.in_flight += 1
+        self.admitted += 1
+        return queued_s
+
+    def release(self, held_s: float):
+        self.in_flight -= 1
+        self._service_s = held_s if not self._service_s else 0.8 * self._service_s + 0.2 * held_s
+        self._slots.release()
+
+    def stats(self) -> dict:
+        waits = sorted(self._waits_ms)
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "queue_wait_ms": {
+                "p50": statistics.median(waits) if waits else 0.0,
+                "p95": waits[max(0, int(len(waits) * 0.95) - 1)] if waits else 0.0,
+                "max": waits[-1] if waits else 0.0,
+            },
+            "mean_service_ms": round(self._service_s * 1000, 1),
+            "limits": vars(self.policy),
+        }
+
+
+def parse_networks(entries: Iterable[str]) -> Tuple[ipaddress._BaseNetwork, ...]:
+    return tuple(ipaddress.ip_network(entry, strict=False) for entry in entries)
+
+
+def _is_trusted(host: str, trusted: Sequence[ipaddress._BaseNetwork]) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in trusted)
+
+
+def client_id(request: Request, trusted: Sequence[ipaddress._BaseNetwork] = ()) -> str:
+    """Peer address, or what a trusted proxy says about the caller behind it."""
+    peer = request.client.host if request.client else "unknown"
+    if not _is_trusted(peer, trusted):
+        return peer
+    header = request.headers.get("x-client-id")
+    if header:
+        return f"id:{header}"
+    # X-Forwarded-For lists client, proxy1, proxy2...: the caller is the last hop that is not ours
+    hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted(hop, trusted):
+            return hop
+    return peer
+
+
+class AdmissionController:
+    """HTTP middleware: `app.middleware("http")(controller)`."""
+
+    def __init__(self, policies: Dict[str, EndpointPolicy] = POLICIES, routes: Dict[str, str] = ROUTE_GROUPS,
+                 enabled: bool = ENABLED, clock: Callable[[], float] = time.monotonic,
+                 trusted_proxies: Iterable[str] = TRUSTED_PROXIES):
+        self.enabled = enabled
+        self.routes = routes
+        self.trusted_proxies = parse_networks(trusted_proxies)
+        self._clock = clock
+        self.limiters = {name: EndpointLimiter(name, policy, clock) for name, policy in policies.items()}
+
+    def limiter_for(self, path: str) -> Optional[EndpointLimiter]:
+        group = self.routes.get(path.rstrip("/") or "/")
+        return self.limiters.get(group) if group else None
+
+    async def __call__(self, request: Request, call_next):
+        limiter = self.limiter_for(request.url.path) if self.enabled else None
+        if limiter is None:
+            return await call_next(request)
+
+        try:
+            await limiter.acquire(client_id(request, self.trusted_proxies))
+        except Rejected as e:
+            return JSONResponse(
+                {"error": e.reason, "error_type": "RateLimited" if e.status_code == 429 else "Overloaded", "retry_after": e.retry_after},
+                status_code=e.status_code,
+                headers={"Retry-After": str(e.retry_after)},
+            )
+
+        start = self._clock()
+        try:
+            response = await call_next(request)
+        except BaseException:
+            limiter.release(self._clock() - start)
+            raise
+
+        # Keep the slot until the body is sent: streaming routes do their work while iterating
+        body = response.body_iterator
+
+        async def release_when_sent():
+            try:
+                async for chunk in body:
+                    yield chunk
+            finally:
+                limiter.release(self._clock() - start)
+
+        response.body_iterator = release_when_sent()
+        return response
+
+    def stats(self) -> dict:
+        return {name: limiter.stats() for name, limiter in self.limiters.items()}
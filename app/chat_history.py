@@ -0,0 +1,141 @@
+"""
+Conversation history shared by every API worker.
+
+ConversationBufferMemory keeps its messages in process memory, so a
+multi-turn conversation breaks when consecutive requests land on different
+workers. With CHAT_HISTORY_BACKEND=sqlite, memory for a session id lives in
+a local SQLite database in WAL mode instead: turns are appended, reads are
+one indexed query for the newest CHAT_HISTORY_MAX_MESSAGES messages, and
+messages older than CHAT_HISTORY_TTL_S expire.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, List, Sequence
+
+from langchain_core.chat_history import BaseChatMessageHistory, InMemoryChatMessageHistory
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+
+# === Settings ===
+CHAT_HISTORY_BACKEND = os.getenv("CHAT_HISTORY_BACKEND", "memory")  # "memory" or "sqlite"
+CHAT_HISTORY_DB = os.getenv("CHAT_HISTORY_DB", os.path.join("data", "chat_history.db"))
+CHAT_HISTORY_TTL_S = float(os.getenv("CHAT_HISTORY_TTL_S", str(24 * 3600)))
+CHAT_HISTORY_MAX_MESSAGES = int(os.getenv("CHAT_HISTORY_MAX_MESSAGES", "20"))
+PURGE_INTERVAL_S = 300.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chat_messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chat_messages_session ON chat_messages (session_id, id);
+CREATE INDEX IF NOT EXISTS idx_chat_messages_created ON chat_messages (created_at);
+"""
+
+
+class SQLiteChatStore:
+    """
+    The database behind every session's history, one connection per thread.
+
+    Any number of processes can open the same file: WAL lets readers run
+    alongside the single writer, and busy_timeout absorbs write contention.
+    """
+
+    def __init__(
+        self,
+        db_path: str = CHAT_HISTORY_DB,
+        ttl_s: float = CHAT_HISTORY_TTL_S,
+        max_messages: int = CHAT_HISTORY_MAX_MESSAGES,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.db_path = db_path
+        self.ttl_s = ttl_s
+        self.max_messages = max_messages
+        self.clock = clock
+        self._local = threading.local()
+        self._last_purge = 0.0
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if os.path.dirname(self.db_path):
+                os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints; a crash loses at most the last turns
+            self._local.conn = conn
+        return conn
+
+    def append(self, session_id: str, messages: Sequence[BaseMessage]):
+        now = self.clock()
+        rows = [(session_id, now, json.dumps(message_to_dict(m))) for m in messages]
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("INSERT INTO chat_messages (session_id, created_at, message) VALUES (?, ?, ?)", rows)
+        if now - self._last_purge > PURGE_INTERVAL_S:
+            self.purge_expired()
+
+    def read(self, session_id: str, limit: int = None) -> List[BaseMessage]:
+        """The newest `limit` unexpired messages of a session, oldest first."""
+        rows = self._connection().execute(
+            "SELECT message FROM chat_messages WHERE session_id = ? AND created_at >= ? ORDER BY id DESC LIMIT ?",
+            (session_id, self.clock() - self.ttl_s, limit or self.max_messages),
+        ).fetchall()
+        return messages_from_dict([json.loads(row[0]) for row in reversed(rows)])
+
+    def clear(self, session_id: str):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM chat_messages WHERE session_id = ?", (session_id,))
+
+    def purge_expired(self) -> int:
+        self._last_purge = self.clock()
+        with self._connection() as conn:
+            cursor = conn.execute("DELETE FROM chat_messages WHERE created_at < ?", (self._last_purge - self.ttl_s,))
+        return cursor.rowcount
+
+
+class SQLiteChatMessageHistory(BaseChatMessageHistory):
+    """LangChain chat history for one session id, stored in a SQLiteChatStore."""
+
+    def __init__(self, session_id: str, store: SQLiteChatStore):
+        self.session_id = session_id
+        self.store = store
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        return self.store.read(self.session_id)
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        self.store.append(self.session_id, messages)
+
+    def clear(self) -> None:
+        self.store.clear(self.session_id)
+
+
+_store = None
+_store_pid = None
+_store_lock = threading.Lock()
+
+
+def get_chat_store() -> SQLiteChatStore:
+    """Process-wide store; SQLite connections must not cross a fork, so workers open their own."""
+    global _store, _store_pid
+    with _store_lock:
+        if _store is None or _store_pid != os.getpid():
+            _store = SQLiteChatStore()
+            _store_pid = os.getpid()
+        return _store
+
+
+def get_chat_history(session_id: str, backend: str = CHAT_HISTORY_BACKEND) -> BaseChatMessageHistory:
+    if backend == "memory":
+        return InMemoryChatMessageHistory()
+    if backend == "sqlite":
+        return SQLiteChatMessageHistory(session_id, get_chat_store())
+    raise ValueError(f"Unknown CHAT_HISTORY_BACKEND '{backend}' (expected memory or sqlite)")
@@ -0,0 +1,93 @@
+"""
+Per-request deadlines.
+
+The API edge opens a `deadline_scope`; everything below it (agent steps,
+tools, LLM calls, SQL statements, embedding batches) reads the remaining
+budget from a context variable instead of having its own fixed timeout.
+`asyncio.to_thread` and LangChain's executors copy context variables, so
+the deadline follows the request into worker threads.
+"""
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, Optional, TypeVar, Union
+
+REQUEST_DEADLINE_S = float(os.getenv("REQUEST_DEADLINE_S", "25"))
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(Exception):
+    """The request's deadline passed before this piece of work finished."""
+
+
+class Deadline:
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.expires_at = clock() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - self.clock())
+
+    @property
+    def expired(self) -> bool:
+        return self.clock() >= self.expires_at
+
+    def check(self, what: str = "work"):
+        if self.expired:
+            raise DeadlineExceeded(f"Request deadline exceeded before {what}")
+
+
+_current: contextvars.ContextVar = contextvars.ContextVar("request_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(deadline: Union[Deadline, float] = REQUEST_DEADLINE_S) -> Iterator[Deadline]:
+    """Make `deadline` current; an enclosing, earlier deadline is never extended."""
+    if not isinstance(deadline, Deadline):
+        deadline = Deadline(deadline)
+    outer = _current.get()
+    if outer is not None and outer.expires_at < deadline.expires_at:
+        deadline = outer
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+def check_deadline(what: str = "work"):
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check(what)
+
+
+def bounded_timeout(timeout: Optional[float]) -> Optional[float]:
+    """`timeout` capped at the time left on the current deadline (None means no limit)."""
+    deadline = _current.get()
+    if deadline is None:
+        return timeout
+    remaining = deadline.remaining()
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+def iterate_with_deadline(iterable: Iterable[T], deadline: Deadline) -> Iterator[T]:
+    """
+    Drive a generator under `deadline`.
+
+    A streaming response advances its generator from a fresh context on every
+    step, so the scope is re-entered around each `next` rather than once.
+    """
+    iterator = iter(iterable)
+    while True:
+        with deadline_scope(deadline):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
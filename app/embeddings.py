@@ -0,0 +1,261 @@
+import os
+import queue
+import threading
+import time
+import statistics
+from collections import Counter, deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from app.deadline import DeadlineExceeded, bounded_timeout, check_deadline
+
+# === Settings ===
+EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
+MAX_SEQ_LENGTH = 256  # same truncation as the sentence-transformers model card
+
+# "torch" (sentence-transformers), "onnx" (fp32) or "onnx-int8" (dynamically quantized)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", os.path.join("data", "onnx", EMBED_MODEL_NAME))
+ONNX_FILES = {"onnx": "model.onnx", "onnx-int8": "model-int8.onnx"}
+
+# Micro-batching of concurrent queries: flush at BATCH_MAX queries or after BATCH_WAIT_MS
+BATCH_MAX = int(os.getenv("EMBED_BATCH_MAX", "32"))
+BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "3"))
+
+
+class TorchEmbedder:
+    """sentence-transformers on PyTorch; the reference the FAISS index was built with."""
+
+    backend = "torch"
+
+    def __init__(self, model_name: str = EMBED_MODEL_NAME):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        return np.asarray(self.model.encode(list(texts)), dtype=np.float32)
+
+
+class OnnxEmbedder:
+    """
+    MiniLM exported to ONNX and run with onnxruntime, no torch import.
+
+    Reproduces the sentence-transformers pipeline: same tokenizer, mean
+    pooling over the attention mask, then L2 normalization.
+    """
+
+    def __init__(self, backend: str = "onnx", model_dir: str = ONNX_MODEL_DIR, threads: int = 0):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_path = os.path.join(model_dir, ONNX_FILES[backend])
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"{model_path} not found. Export it with: python -m data_ingestion.export_onnx_embedder"
+            )
+
+        self.backend = backend
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(list(texts))
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+def get_embedder(backend: str = EMBEDDING_BACKEND, threads: int = 0):
+    """`threads`: intra-op threads of the ONNX session (0 = onnxruntime's default); torch is set per process."""
+    if backend == "torch":
+        return TorchEmbedder()
+    if backend in ONNX_FILES:
+        return OnnxEmbedder(backend, threads=threads)
+    raise ValueError(f"Unknown EMBEDDING_BACKEND '{backend}' (expected torch, onnx or onnx-int8)")
+
+
+def cosine_drift(reference: np.ndarray, candidate: np.ndarray) -> List[float]:
+    """Per-row cosine similarity between two embedding matrices."""
+    ref = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    cand = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    return [float(x) for x in (ref * cand).sum(axis=1)]
+
+
+# === Micro-batching ===
+class QueryBatcher:
+    """
+    Coalesces concurrent single-query searches into one encode + one index.search.
+
+    Callers block on a future; a background thread takes the first queued
+    query, keeps collecting until `max_batch` queries or `max_wait_ms` have
+    passed, then runs the whole batch and resolves each future with its own
+    (distances, ids) row. The thread is started lazily and restarted after a
+    fork, since threads do not survive into pre-forked workers.
+    """
+
+    def __init__(self, embedder, index, max_batch: int = BATCH_MAX, max_wait_ms: float = BATCH_WAIT_MS):
+        self.embedder = embedder
+        self.index = index
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._stats_lock = threading.Lock()
+        self._batch_sizes: Counter = Counter()
+        self._delays_ms: deque = deque(maxlen=1000)
+
+    def search(self, query: str, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        check_deadline("product search")
+        if self.max_batch == 1:
+            embedding = self.embedder.encode([query])
+            D, I = self.index.search(embedding, top_k)
+            self._record(1, [0.0])
+            return D[0], I[0]
+
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((query, top_k, time.perf_counter(), future))
+        try:
+            return future.result(timeout=bounded_timeout(None))
+        except FutureTimeout:
+            raise DeadlineExceeded("Request deadline exceeded waiting for the product search batch")
+
+    def _ensure_worker(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()  # a queue inherited through fork may hold a held lock
+                threading.Thread(target=self._run, args=(self._queue,), name="embed-batcher", daemon=True).start()
+                self._pid = os.getpid()
+
+    def _run(self, pending: "queue.Queue"):
+        while True:
+            batch = [pending.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _flush(self, batch: list):
+        started = time.perf_counter()
+        try:
+            embeddings = self.embedder.encode([query for query, _, _, _ in batch])
+            D, I = self.index.search(embeddings, max(top_k for _, top_k, _, _ in batch))
+        except Exception as e:
+            for *_, future in batch:
+                future.set_exception(e)
+            return
+
+        self._record(len(batch), [(started - queued) * 1000 for _, _, queued, _ in batch])
+        for row, (_, top_k, _, future) in enumerate(batch):
+            future.set_result((D[row][:top_k], I[row][:top_k]))
+
+    def _record(self, size: int, delays_ms: List[float]):
+        with self._stats_lock:
+            self._batch_sizes[size] += 1
+            self._delays_ms.extend(delays_ms)
+
+    def stats(self) -> dict:
+        """Batch size distribution and queueing delay (last 1000 queries)."""
+        with self._stats_lock:
+            sizes = dict(sorted(self._batch_sizes.items()))
+            delays = sorted(self._delays_ms)
+        batches = sum(sizes.values())
+        queries = sum(size * count for size, count in sizes.items())
+        return {
+            "batches": batches,
+            "queries": queries,
+            "mean_batch_size": queries / batches if batches else 0.0,
+            "batch_size_histogram": sizes,
+            "queue_delay_ms": {
+                "p50": statistics.median(delays) if delays else 0.0,
+                "p95": delays[max(0, int(len(delays) * 0.95) - 1)] if delays else 0.0,
+                "max": delays[-1] if delays else 0.0,
+            },
+        }
+
+
+# === Benchmark ===
+BENCH_QUERIES = [
+    "Which tumblers are BPA free?",
+    "What is the price of the All Day Cup?",
+    "Do you sell stainless steel bottles?",
+    "How tall is the ZUS frozee cold cup?",
+    "Any mugs that keep drinks hot for 12 hours?",
+    "What colours does the OG cup come in?",
+    "Is the ceramic mug dishwasher safe?",
+    "Show me drinkware under RM50",
+]
+
+
+def benchmark(backend: str, rounds: int = 50, batch_size: int = 32) -> dict:
+    embedder = get_embedder(backend)
+    embedder.encode(BENCH_QUERIES[:1])  # warm-up
+
+    latencies = []
+    for i in range(rounds):
+        query = BENCH_QUERIES[i % len(BENCH_QUERIES)]
+        start = time.perf_counter()
+        embedder.encode([query])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    batch = (BENCH_QUERIES * (batch_size // len(BENCH_QUERIES) + 1))[:batch_size]
+    start = time.perf_counter()
+    for _ in range(max(1, rounds // 10)):
+        embedder.encode(batch)
+    elapsed = time.perf_counter() - start
+    throughput = batch_size * max(1, rounds // 10) / elapsed
+
+    latencies.sort()
+    return {
+        "backend": backend,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "batch_throughput_qps": throughput,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark query-embedding backends")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    print(f"{'backend':<10} {'p50 ms':>8} {'p95 ms':>8} {'batch q/s':>10}")
+    for name in args.backends:
+        try:
+            result = benchmark(name, args.rounds, args.batch_size)
+        except (ImportError, FileNotFoundError) as e:
+            print(f"{name:<10} skipped: {e}")
+            continue
+        print(f"{name:<10} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['batch_throughput_qps']:>10.1f}")
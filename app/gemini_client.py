@@ -0,0 +1,62 @@
+"""
+ChatGoogleGenerativeAI that sends each request exactly once.
+
+langchain_google_genai wraps generate_content in its own tenacity retry (two
+attempts, 2-60 s waits, on any GoogleAPIError), and the gapic client adds a
+default retry on 503 for up to 600 s. Neither takes a rate-limiter token nor
+watches the request deadline, and both multiply with app.llm_clients.RetryPolicy.
+Here the call goes straight to the client with `retry=None`, so RetryPolicy
+owns every retry and each upstream attempt is one limiter token.
+
+Imported lazily by app.llm_clients (the Gemini stack is not loaded at startup).
+"""
+from typing import Any, List, Optional
+
+import google.api_core.exceptions
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatResult
+from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_google_genai.chat_models import ChatGoogleGenerativeAIError, _response_to_result
+
+# Keyword arguments the prediction service accepts besides the request (the rest go into the request)
+RPC_PARAMS = ("timeout", "metadata", "labels")
+
+
+class SingleAttemptGemini(ChatGoogleGenerativeAI):
+    """Gemini chat model without the library's or gapic's built-in retries."""
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        *,
+        tools: Any = None,
+        functions: Any = None,
+        safety_settings: Any = None,
+        tool_config: Any = None,
+        generation_config: Any = None,
+        cached_content: Optional[str] = None,
+        tool_choice: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        request = self._prepare_request(
+            messages,
+            stop=stop,
+            tools=tools,
+            functions=functions,
+            safety_settings=safety_settings,
+            tool_config=tool_config,
+            generation_config=generation_config,
+            cached_content=cached_content or self.cached_content,
+            tool_choice=tool_choice,
+            **kwargs,
+        )
+        params = {k: v for k, v in kwargs.items() if k in RPC_PARAMS}
+        params.setdefault("metadata", self.default_metadata)
+        try:
+            response = self.client.generate_content(request=request, retry=None, **params)
+        except google.api_core.exceptions.InvalidArgument as e:
+            raise ChatGoogleGenerativeAIError(f"Invalid argument provided to Gemini: {e}") from e
+        return _response_to_result(response)
@@ -0,0 +1,269 @@
+"""
+One place to get a Gemini chat model.
+
+    from app.llm_clients import get_llm
+    llm = get_llm("summary")
+
+Every role shares one ChatGoogleGenerativeAI transport per process (role
+clients are copies with their own temperature, sharing the underlying
+`client`). Each call goes through three layers:
+
+    SingleFlightChatModel -> RateLimitedChatModel -> ChatGoogleGenerativeAI
+
+Identical in-flight calls collapse before they spend quota. Every upstream
+attempt, including retries, then takes a token from a process-wide bucket
+sized to our Gemini quota, and transient errors (429, 5xx, connection drops)
+are retried with full-jitter exponential backoff inside the request deadline.
+The Gemini client itself never retries (app.gemini_client), so those are the
+only retries.
+
+LLM_RATE_LIMIT_RPM is the quota of the whole deployment: after a pre-fork,
+app.prefork.after_fork gives each worker an equal share.
+"""
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatResult
+
+from app.deadline import DeadlineExceeded, bounded_timeout
+from app.single_flight import SingleFlightChatModel
+
+logger = logging.getLogger(__name__)
+
+# === Settings ===
+MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+RATE_LIMIT_RPM = float(os.getenv("LLM_RATE_LIMIT_RPM", "60"))
+RATE_LIMIT_BURST = int(os.getenv("LLM_RATE_LIMIT_BURST", "10"))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+RETRY_BASE_S = float(os.getenv("LLM_RETRY_BASE_S", "0.5"))
+RETRY_MAX_S = float(os.getenv("LLM_RETRY_MAX_S", "8"))
+
+# Per-role settings on top of the shared transport
+ROLES: Dict[str, Dict[str, Any]] = {
+    "agent": {"temperature": 0.2},    # part 4 ReAct / tool-calling agent
+    "planner": {"temperature": 0.3},  # part 2-3 agents
+    "chat": {"temperature": 0.7},     # part 1 small talk
+    "sql": {"temperature": 0.0},
+    "summary": {"temperature": 0.0},
+}
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+# === Rate limiting ===
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate_per_s` tokens refill continuously up to `capacity`.
+
+    acquire() reserves a token and sleeps until it is due, so waiting callers
+    are served in arrival order and a burst is spread out instead of rejected.
+    """
+
+    def __init__(self, rate_per_s: float, capacity: int, clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.rate_per_s = rate_per_s
+        self.capacity = max(1, capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = float(self.capacity)
+        self._updated = clock()
+        self.acquired = 0
+        self.throttled = 0
+        self.rejected = 0
+        self.wait_s = 0.0
+
+    def set_rate(self, rate_per_s: float):
+        with self._lock:
+            self._refill()
+            self.rate_per_s = rate_per_s
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_s)
+        self._updated = now
+
+    def acquire(self, timeout: Optional[float] = None) -> float:
+        """Take one token, waiting for it if needed; returns the wait in seconds."""
+        if self.rate_per_s <= 0:
+            return 0.0  # limiter disabled
+        with self._lock:
+            self._refill()
+            # Tokens may go negative: each waiter reserves the next free slot
+            wait = max(0.0, (1 - self._tokens) / self.rate_per_s)
+            if timeout is not None and wait > timeout:
+                self.rejected += 1
+                raise DeadlineExceeded(f"Request deadline exceeded waiting {wait:.1f}s for LLM rate limit")
+            self._tokens -= 1
+            self.acquired += 1
+            if wait > 0:
+                self.throttled += 1
+                self.wait_s += wait
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._refill()
+            return {
+                "rate_per_min": self.rate_per_s * 60,
+                "capacity": self.capacity,
+                "tokens": round(self._tokens, 2),
+                "acquired": self.acquired,
+                "throttled": self.throttled,
+                "rejected": self.rejected,
+                "wait_s": round(self.wait_s, 3),
+            }
+
+
+# === Retries ===
+def is_transient(error: BaseException) -> bool:
+    """429/5xx from google.api_core (`code`) or HTTP clients (`status_code`), or a dropped connection."""
+    if isinstance(error, DeadlineExceeded):
+        return False
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    status = getattr(error, "code", None)
+    if not isinstance(status, int):
+        status = getattr(error, "status_code", None)
+    return status in RETRY_STATUS
+
+
+class RetryPolicy:
+    """Retries transient errors with full-jitter exponential backoff, never past the request deadline."""
+
+    def __init__(self, max_retries: int = MAX_RETRIES, base_s: float = RETRY_BASE_S, max_s: float = RETRY_MAX_S,
+                 rng: Callable[[], float] = random.random, sleep: Callable[[float], None] = time.sleep):
+        self.max_retries = max_retries
+        self.base_s = base_s
+        self.max_s = max_s
+        self._rng = rng
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.gave_up = 0
+
+    def backoff(self, attempt: int) -> float:
+        return self._rng() * min(self.max_s, self.base_s * 2 ** attempt)
+
+    def run(self, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self.calls += 1
+        attempt = 0
+        while True:
+            try:
+                return fn()
+            except Exception as e:
+                if not is_transient(e):
+                    raise
+                delay = self.backoff(attempt)
+                remaining = bounded_timeout(None)
+                if attempt >= self.max_retries or (remaining is not None and delay >= remaining):
+                    with self._lock:
+                        self.gave_up += 1
+                    raise
+                logger.warning("Transient LLM error, retrying in %.2fs: %s", delay, e, extra={"attempt": attempt + 1})
+                with self._lock:
+                    self.retries += 1
+                self._sleep(delay)
+                attempt += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"calls": self.calls, "retries": self.retries, "gave_up": self.gave_up}
+
+
+class RateLimitedChatModel(BaseChatModel):
+    """Chat model wrapper: every upstream attempt takes a limiter token; transient errors are retried."""
+
+    inner: BaseChatModel
+    limiter: Any
+    retry: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return f"rate-limited-{self.inner._llm_type}"
+
+    def bind_tools(self, tools, **kwargs):
+        bound = self.inner.bind_tools(tools, **kwargs)
+        return self.bind(**bound.kwargs)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        def attempt() -> ChatResult:
+            self.limiter.acquire(timeout=bounded_timeout(None))
+            return self.inner._generate(messages, stop=stop, **kwargs)
+
+        return self.retry.run(attempt)
+
+
+# === Registry ===
+def _gemini(**settings) -> BaseChatModel:
+    from app.gemini_client import SingleAttemptGemini  # no built-in retries: RetryPolicy owns them
+    return SingleAttemptGemini(model=MODEL, google_api_key=os.environ.get("GOOGLE_API_KEY"), **settings)
+
+
+class LLMRegistry:
+    """Hands out one configured client per role, all on the same transport, limiter and retry policy."""
+
+    def __init__(self, factory: Callable[..., BaseChatModel] = _gemini, rpm: float = RATE_LIMIT_RPM, burst: int = RATE_LIMIT_BURST,
+                 retry: Optional[RetryPolicy] = None):
+        self._factory = factory
+        self.rpm = rpm
+        self.limiter = TokenBucket(rpm / 60, burst)
+        self.retry = retry or RetryPolicy()
+        self._lock = threading.Lock()
+        self._base: Optional[BaseChatModel] = None
+        self._clients: Dict[tuple, BaseChatModel] = {}
+        self._pid = os.getpid()
+
+    def get(self, role: str, **overrides) -> BaseChatModel:
+        if role not in ROLES:
+            raise ValueError(f"Unknown LLM role '{role}' (expected one of {', '.join(ROLES)})")
+        settings = {**ROLES[role], **overrides}
+        key = (role, tuple(sorted(settings.items())))
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset_locked()  # forked without after_fork: don't reuse the parent's channel
+            client = self._clients.get(key)
+            if client is None:
+                if self._base is None:
+                    self._base = self._factory()
+                inner = self._base.model_copy(update=settings)  # shallow copy keeps the shared `client`
+                client = SingleFlightChatModel(inner=RateLimitedChatModel(inner=inner, limiter=self.limiter, retry=self.retry))
+                self._clients[key] = client
+            return client
+
+    def reset(self, share: int = 1):
+        """Drop clients (e.g. after fork) and take 1/share of the deployment quota."""
+        with self._lock:
+            self._reset_locked()
+            self.limiter.set_rate(self.rpm / 60 / max(share, 1))
+
+    def _reset_locked(self):
+        self._base = None
+        self._clients.clear()
+        self._pid = os.getpid()
+
+    def stats(self) -> dict:
+        return {"rate_limiter": self.limiter.stats(), "retries": self.retry.stats()}
+
+
+registry = LLMRegistry()
+
+
+def get_llm(role: str, **overrides) -> BaseChatModel:
+    return registry.get(role, **overrides)
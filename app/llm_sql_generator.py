@@ -1,12 +1,5 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import PromptTemplate
-import os
-
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    google_api_key=os.environ["GOOGLE_API_KEY"],
-    temperature=0
-)
+from app.llm_clients import get_llm
 
 PROMPT_TEMPLATE = """
 You are an expert SQL generator for an SQLite database.
@@ -40,7 +33,8 @@ prompt = PromptTemplate(input_variables=["question"], template=PROMPT_TEMPLATE)
 
 # Main generator function
 def generate_sql_query(question: str) -> str:
-    chain = prompt | llm
+    # The client is built on first use, so importing this module needs no GOOGLE_API_KEY
+    chain = prompt | get_llm("sql")
     ai_message = chain.invoke({"question": question})
     text = ai_message.content if hasattr(ai_message, "content") else str(ai_message)
     sql = extract_sql_codeblock(text)
@@ -0,0 +1,189 @@
+"""
+Structured, non-blocking logging.
+
+`configure_logging()` puts a QueueHandler on the root logger; a
+QueueListener thread formats records as JSON lines and writes them to
+stderr, so a request thread only pays for an enqueue. Every record carries
+the request_id / session_id bound with `log_context`.
+
+Settings (environment):
+    LOG_LEVEL         root level (INFO)
+    LOG_LEVELS        per-module overrides, e.g. "app.rag=DEBUG,chatbot_app.tools=WARNING"
+    LOG_FORMAT        json (default) or text
+    LOG_SAMPLE_RATE   fraction of requests whose debug payloads are captured (0.01)
+    AGENT_VERBOSE     1 to turn LangChain's verbose agent output back on
+"""
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Union
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+MAX_PAYLOAD_CHARS = 2000
+AGENT_VERBOSE = os.getenv("AGENT_VERBOSE", "0") == "1"
+
+_request_id = contextvars.ContextVar("log_request_id", default=None)
+_session_id = contextvars.ContextVar("log_session_id", default=None)
+_sampled = contextvars.ContextVar("log_sampled", default=None)
+
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class ContextFilter(logging.Filter):
+    """Copies the caller's request/session ids onto the record before it leaves the thread."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        record.session_id = _session_id.get()
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args now (they may not be picklable or thread-safe later) but keep the traceback separate
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        # Context ids and anything passed with extra={...}
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[_QueueHandler] = None
+_lock = threading.Lock()
+
+
+def _parse_levels(spec: str) -> Dict[str, str]:
+    levels = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def _start_listener(stream_handler: logging.Handler):
+    global _listener
+    log_queue: queue.Queue = queue.Queue(-1)
+    _queue_handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def _restart_in_child():
+    # The listener thread does not survive fork (pre-fork workers); start a fresh one
+    if _listener is not None:
+        _start_listener(_listener.handlers[0])
+
+
+def configure_logging(
+    level: str = LOG_LEVEL,
+    module_levels: Union[str, Dict[str, str]] = LOG_LEVELS,
+    fmt: str = LOG_FORMAT,
+):
+    """Idempotent; safe to call from every entry point."""
+    global _queue_handler
+    with _lock:
+        root = logging.getLogger()
+        root.setLevel(level)
+        levels = _parse_levels(module_levels) if isinstance(module_levels, str) else module_levels
+        for name, module_level in levels.items():
+            logging.getLogger(name).setLevel(module_level)
+        if _queue_handler is not None:
+            return
+
+        stream_handler = logging.StreamHandler()
+        if fmt == "json":
+            stream_handler.setFormatter(JsonFormatter())
+        else:
+            stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"))
+
+        _queue_handler = _QueueHandler(queue.Queue(-1))
+        _queue_handler.addFilter(ContextFilter())
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(_queue_handler)
+        _start_listener(stream_handler)
+
+        os.register_at_fork(after_in_child=_restart_in_child)
+        atexit.register(lambda: _listener and _listener.stop())
+
+
+@contextmanager
+def log_context(request_id: Optional[str] = None, session_id: Optional[str] = None, sample_rate: Optional[float] = None):
+    """Bind ids for every record logged inside; also decides once whether this request's payloads are sampled."""
+    tokens = []
+    if request_id is not None:
+        tokens.append((_request_id, _request_id.set(request_id)))
+    if session_id is not None:
+        tokens.append((_session_id, _session_id.set(session_id)))
+    if _sampled.get() is None:
+        rate = LOG_SAMPLE_RATE if sample_rate is None else sample_rate
+        tokens.append((_sampled, _sampled.set(random.random() < rate)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def log_payload(logger: logging.Logger, message: str, payload: Union[Any, Callable[[], Any]]):
+    """
+    Debug-log a (possibly large) payload for sampled requests only.
+
+    `payload` may be a zero-argument callable so unsampled requests never
+    build it. Outside a request the sample rate applies per call.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    sampled = _sampled.get()
+    if sampled is None:
+        sampled = random.random() < LOG_SAMPLE_RATE
+    if not sampled:
+        return
+    value = payload() if callable(payload) else payload
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+    if len(text) > MAX_PAYLOAD_CHARS:
+        text = text[:MAX_PAYLOAD_CHARS] + f"... ({len(text)} chars)"
+    logger.debug(message, extra={"payload": text})
+
+
+def flush_logs():
+    """Drain the queue (tests, shutdown)."""
+    global _listener
+    if _listener is not None:
+        handler = _listener.handlers[0]
+        _listener.stop()
+        _start_listener(handler)
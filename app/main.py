@@ -1,53 +1,224 @@
 # app/main.py
-from fastapi import FastAPI, Query, APIRouter
-from pydantic import BaseModel
-from app.rag import semantic_search, summarize_results
-from chatbot_app.chatbot_part4 import MindhiveChatbot
-from app.text2sql_outlets import query_outlets_from_db
+# Logging first, so records from model/index loading below go through the queue handler
+from app.logging_setup import configure_logging, log_context
+configure_logging()
+
+from fastapi import FastAPI, Query, APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from contextlib import asynccontextmanager
+from pydantic import BaseModel, Field
+from typing import Optional
+from app.rag import INDEX_PATH, META_PATH, NO_MATCH_ANSWER, load_store, relevant_results, semantic_search, summarize_results
+from chatbot_app.sessions import SessionPool
+from app.text2sql_outlets import DB_PATH, query_outlets_from_db, stream_outlets_from_db, MAX_LIMIT
+from app.outlet_geo import nearest_outlets
+from app.outlet_hours import open_outlets
 from app.calculator_logic import calculate_expression
+from app.single_flight import llm_flights
+from app.llm_clients import registry as llm_registry
+from app.admission import AdmissionController
+from app.response_cache import CacheRule, ResponseCache
+from app import warmup
+from app.deadline import REQUEST_DEADLINE_S, Deadline, DeadlineExceeded, deadline_scope, iterate_with_deadline
 from dotenv import load_dotenv
 import asyncio
+import json
+import logging
+import time
+import uuid
 
 load_dotenv()
-app = FastAPI()
+
+readiness = warmup.Readiness(warmup.default_checks())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs in each worker (after the pre-fork), so the warm kernels and channels are its own
+    if warmup.ENABLED:
+        readiness.start()
+    else:
+        readiness.skip()
+    yield
+
+app = FastAPI(lifespan=lifespan)
+logger = logging.getLogger("app.access")
+
+# Registered first so it runs inside request_context: rejections are logged with their request id
+admission = AdmissionController()
+app.middleware("http")(admission)
+
+# Outside admission control, so repeat lookups are served without taking a slot
+products_data = CacheRule(files=(INDEX_PATH, META_PATH))
+outlets_data = CacheRule(files=(DB_PATH,))
+response_cache = ResponseCache({
+    ("GET", "/products"): products_data,
+    ("GET", "/outlets"): outlets_data,
+    ("POST", "/outlets"): outlets_data,
+})
+app.middleware("http")(response_cache)
+
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    # Every log record of this request carries its id; clients may pass their own X-Request-ID
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    start = time.perf_counter()
+    with log_context(request_id=request_id):
+        response = await call_next(request)
+        logger.info(
+            "%s %s %s", request.method, request.url.path, response.status_code,
+            extra={"duration_ms": round((time.perf_counter() - start) * 1000, 1)},
+        )
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+# Health probes
+
+@app.get("/healthz")
+def healthz():
+    # Liveness: the worker answers; it may still be warming up. 503 once warm-up gave up retrying
+    if not readiness.healthy:
+        return JSONResponse({"status": "failed", "components": readiness.report()["components"]}, status_code=503)
+    return {"status": "ok"}
+
+@app.get("/readyz")
+def readyz():
+    # Readiness: 503 until the embedder, index and outlets DB have been warmed up
+    report = readiness.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
 
 # Chatbot endpoint
 
 class ChatRequest(BaseModel):
     question: str
+    session_id: Optional[str] = Field(None, max_length=128, description="Keeps conversation memory across requests")
+
+def new_chatbot(**kwargs):
+    # The agent stack (langchain agents, all tools) is imported on the first chatbot request, not at startup
+    from chatbot_app.chatbot_part4 import MindhiveChatbot
+    return MindhiveChatbot(**kwargs)
+
+def build_session_chatbot(session_id: str):
+    # With CHAT_HISTORY_BACKEND=sqlite any worker can serve any turn of a session
+    from langchain.memory import ConversationBufferMemory
+    from app.chat_history import get_chat_history
+    memory = ConversationBufferMemory(memory_key="chat_history", chat_memory=get_chat_history(session_id))
+    return new_chatbot(memory_obj=memory)
+
+# Conversation memory for clients that send a session_id (e.g. streamlit_app.py in client mode)
+chat_sessions = SessionPool(build_session_chatbot)
 
 @app.post("/chatbot")
 async def chatbot_route(req: ChatRequest):
     try:
-        bot = MindhiveChatbot()
-        # Run chat_4 in a thread so it doesn’t block the event loop
-        answer = await asyncio.to_thread(bot.chat_4, req.question)
-        return {"answer": answer}
+        # Run the turn in a thread so it doesn’t block the event loop; the thread inherits the deadline.
+        # "partial" is true when the deadline or step limit cut the agent short.
+        with deadline_scope(REQUEST_DEADLINE_S), log_context(session_id=req.session_id):
+            if req.session_id:
+                return await asyncio.to_thread(chat_sessions.chat, req.session_id, req.question, "respond")
+            return await asyncio.to_thread(lambda: new_chatbot().respond(req.question))
     except Exception as e:
         return {"error": str(e)}
 
+@app.post("/chatbot/stream")
+def chatbot_stream_route(req: ChatRequest):
+    # NDJSON: one {"type": "tool"} line per tool call, then {"type": "answer", "partial": ...}
+    if req.session_id:
+        events = chat_sessions.stream(req.session_id, req.question)
+    else:
+        events = new_chatbot().stream_4(req.question)
+    events = iterate_with_deadline(events, Deadline(REQUEST_DEADLINE_S))
+    return StreamingResponse((json.dumps(event) + "\n" for event in events), media_type="application/x-ndjson")
+
 
 # Products endpoint
 
 @app.get("/products")
 def query_products(query: str = Query(..., min_length=3)):
-    results = semantic_search(query, top_k=3)
-    summary = summarize_results(query, results)
+    with deadline_scope(REQUEST_DEADLINE_S):
+        try:
+            results = relevant_results(semantic_search(query, top_k=3))
+        except DeadlineExceeded as e:
+            raise HTTPException(status_code=504, detail=str(e))
+        if not results:
+            return {"query": query, "summary": NO_MATCH_ANSWER, "results": [], "partial": False}
+        try:
+            summary, partial = summarize_results(query, results), False
+        except DeadlineExceeded:
+            # Out of time for the LLM: still return the products that were found
+            summary, partial = None, True
 
     return {
         "query": query,
         "summary": summary,
-        "results": results
+        "results": results,
+        "partial": partial
     }
 
+@app.get("/products/metrics")
+def product_search_metrics():
+    # Batch size distribution and queueing delay of the query-embedding batcher
+    return load_store().batcher.stats()
+
+@app.get("/llm/metrics")
+def llm_metrics():
+    # Single-flight collapse ratio, rate limiter waits and retries of upstream LLM calls
+    return {**llm_flights.stats(), **llm_registry.stats()}
+
+@app.get("/admission/metrics")
+def admission_metrics():
+    # Per route group: in-flight and queued requests, queue wait, 429/503 rejections
+    return admission.stats()
+
+@app.get("/cache/metrics")
+def cache_metrics():
+    # Hit ratio and 304s of the /products and /outlets response cache
+    return response_cache.stats()
+
 # Outlets endpoint
 
 class QueryRequest(BaseModel):
     question: str
+    limit: Optional[int] = Field(None, ge=1, le=MAX_LIMIT, description="Rows per page")
+    cursor: Optional[str] = Field(None, description="`next_cursor` from the previous page")
 
 @app.post("/outlets")
 def query_outlets(request: QueryRequest):
-    return query_outlets_from_db(request.question)
+    with deadline_scope(REQUEST_DEADLINE_S):
+        try:
+            return query_outlets_from_db(request.question, limit=request.limit, cursor=request.cursor)
+        except DeadlineExceeded as e:
+            return {"error": str(e), "error_type": "DeadlineExceeded"}
+
+@app.get("/outlets")
+def query_outlets_get(
+    question: str = Query(..., min_length=3),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = None,
+):
+    # Same as POST /outlets, in a form browsers and CDNs can cache and revalidate
+    return query_outlets(QueryRequest(question=question, limit=limit, cursor=cursor))
+
+@app.post("/outlets/stream")
+def stream_outlets(request: QueryRequest):
+    # NDJSON, one outlet per line; the cursor is read lazily from a threadpool
+    return StreamingResponse(stream_outlets_from_db(request.question), media_type="application/x-ndjson")
+
+@app.get("/outlets/nearest")
+def query_nearest_outlets(
+    place: Optional[str] = Query(None, description="Area, town or postcode, e.g. 'Setia Alam'"),
+    lat: Optional[float] = None,
+    lon: Optional[float] = None,
+    k: int = Query(3, ge=1, le=20),
+    radius_km: Optional[float] = Query(None, gt=0, le=100),
+):
+    return nearest_outlets(place=place, lat=lat, lon=lon, k=k, radius_km=radius_km)
+
+@app.get("/outlets/open")
+def query_open_outlets(
+    question: str = Query("open now", description="e.g. 'open now', 'open at 10pm on Sunday', 'open 24 hours'"),
+    place: Optional[str] = Query(None, description="Only outlets whose name or address mention this place"),
+):
+    return open_outlets(question, place=place)
 
 # Calculator endpoint
 
@@ -0,0 +1,235 @@
+import csv
+import heapq
+import math
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# === Constants ===
+DB_PATH = "data/outlets.db"
+GAZETTEER_PATH = os.path.join("data", "gazetteer_my.csv")
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG_LAT = 110.57
+
+# Finer gazetteer entries win when an address matches several
+KIND_PRECISION = {"area": 0, "postcode": 1, "town": 2}
+
+NEAREST_PATTERN = re.compile(r"\b(nearest|closest)\b", re.IGNORECASE)
+NEARBY_PATTERN = re.compile(r"\b(near|nearby|around|close to)\b", re.IGNORECASE)
+POSTCODE_PATTERN = re.compile(r"\b(\d{5})\b")
+
+_gazetteer: Optional[Dict[str, dict]] = None
+_place_patterns: List[Tuple[re.Pattern, dict]] = []
+
+
+# === Gazetteer ===
+def _name_pattern(name: str) -> re.Pattern:
+    # "SS 2" should match "SS2" and "ss 2" but not "SS 21"
+    parts = [re.escape(p) for p in name.split()]
+    return re.compile(r"\b" + r"\s*".join(parts) + r"\b", re.IGNORECASE)
+
+
+def load_gazetteer() -> Dict[str, dict]:
+    global _gazetteer, _place_patterns
+    if _gazetteer is None:
+        entries = {}
+        with open(GAZETTEER_PATH, "r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                entries[row["name"].lower()] = {
+                    "kind": row["kind"],
+                    "name": row["name"],
+                    "lat": float(row["lat"]),
+                    "lon": float(row["lon"]),
+                }
+        _place_patterns = [(_name_pattern(e["name"]), e) for e in entries.values() if e["kind"] != "postcode"]
+        _gazetteer = entries
+    return _gazetteer
+
+
+def find_place(text: str) -> Optional[dict]:
+    """Most specific gazetteer entry mentioned in `text` (area > postcode > town, then longest name)."""
+    gazetteer = load_gazetteer()
+    matches = [gazetteer[code] for code in POSTCODE_PATTERN.findall(text) if code in gazetteer]
+    matches += [entry for pattern, entry in _place_patterns if pattern.search(text)]
+
+    if not matches:
+        return None
+    return min(matches, key=lambda e: (KIND_PRECISION.get(e["kind"], 9), -len(e["name"])))
+
+
+def geocode_address(address: str) -> Optional[Tuple[float, float]]:
+    place = find_place(address or "")
+    if place is None:
+        return None
+    return place["lat"], place["lon"]
+
+
+# === Distance ===
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+# === KD-tree ===
+class KDTree:
+    """
+    2-d tree over points projected to a local km plane.
+
+    Outlets span a few hundred km at most, so an equirectangular projection
+    around the mean latitude keeps plane distances within a fraction of a
+    percent of the great-circle distance; results are re-ranked with haversine.
+    """
+
+    def __init__(self, points: List[Tuple[float, float, int]]):
+        lat0 = sum(p[0] for p in points) / len(points) if points else 0.0
+        self.km_per_deg_lon = 111.32 * math.cos(math.radians(lat0))
+        projected = [(self._project(lat, lon), payload) for lat, lon, payload in points]
+        self.root = self._build(projected, 0)
+
+    def _project(self, lat: float, lon: float) -> Tuple[float, float]:
+        return lon * self.km_per_deg_lon, lat * KM_PER_DEG_LAT
+
+    def _build(self, points, depth):
+        if not points:
+            return None
+        axis = depth % 2
+        points.sort(key=lambda p: p[0][axis])
+        mid = len(points) // 2
+        return (
+            points[mid],
+            axis,
+            self._build(points[:mid], depth + 1),
+            self._build(points[mid + 1:], depth + 1),
+        )
+
+    def nearest(self, lat: float, lon: float, k: int) -> List[Tuple[float, int]]:
+        """k closest payloads as (plane distance km, payload), closest first."""
+        target = self._project(lat, lon)
+        heap = []  # max-heap of (-dist, payload)
+
+        def visit(node):
+            if node is None:
+                return
+            (point, payload), axis, left, right = node
+            dist = math.dist(point, target)
+            if len(heap) < k:
+                heapq.heappush(heap, (-dist, payload))
+            elif dist < -heap[0][0]:
+                heapq.heapreplace(heap, (-dist, payload))
+
+            diff = target[axis] - point[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            visit(near)
+            if len(heap) < k or abs(diff) < -heap[0][0]:
+                visit(far)
+
+        if k > 0:
+            visit(self.root)
+        return sorted((-d, payload) for d, payload in heap)
+
+    def within(self, lat: float, lon: float, radius_km: float) -> List[Tuple[float, int]]:
+        target = self._project(lat, lon)
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            (point, payload), axis, left, right = node
+            dist = math.dist(point, target)
+            if dist <= radius_km:
+                found.append((dist, payload))
+            diff = target[axis] - point[axis]
+            if diff - radius_km <= 0:
+                stack.append(left)
+            if diff + radius_km >= 0:
+                stack.append(right)
+        return sorted(found)
+
+
+# === Outlet index ===
+class OutletGeoIndex:
+    def __init__(self, outlets: List[dict]):
+        self.outlets = [o for o in outlets if o.get("lat") is not None and o.get("lon") is not None]
+        self.tree = KDTree([(o["lat"], o["lon"], i) for i, o in enumerate(self.outlets)])
+
+    @classmethod
+    def from_db(cls, db_path: str = DB_PATH) -> "OutletGeoIndex":
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            conn.row_factory = sqlite3.Row
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(outlets)")}
+            has_coords = {"lat", "lon"} <= columns
+            select = "name, address, hours, services" + (", lat, lon" if has_coords else "")
+            outlets = []
+            for row in conn.execute(f"SELECT {select} FROM outlets"):
+                outlet = dict(row)
+                # Databases not yet geocoded by ingestion fall back to the gazetteer here
+                if outlet.get("lat") is None or outlet.get("lon") is None:
+                    coords = geocode_address(outlet["address"])
+                    outlet["lat"], outlet["lon"] = coords if coords else (None, None)
+                outlets.append(outlet)
+        finally:
+            conn.close()
+        return cls(outlets)
+
+    def _result(self, index: int, lat: float, lon: float) -> dict:
+        outlet = dict(self.outlets[index])
+        outlet["distance_km"] = round(haversine_km(lat, lon, outlet["lat"], outlet["lon"]), 2)
+        return outlet
+
+    def nearest(self, lat: float, lon: float, k: int = 3) -> List[dict]:
+        # Over-fetch slightly so the haversine re-rank can reorder near-ties
+        candidates = self.tree.nearest(lat, lon, k + 2)
+        results = sorted((self._result(i, lat, lon) for _, i in candidates), key=lambda o: o["distance_km"])
+        return results[:k]
+
+    def within(self, lat: float, lon: float, radius_km: float) -> List[dict]:
+        # Pad the plane search by 1% for projection error, then filter exactly
+        candidates = self.tree.within(lat, lon, radius_km * 1.01)
+        results = [self._result(i, lat, lon) for _, i in candidates]
+        return sorted((o for o in results if o["distance_km"] <= radius_km), key=lambda o: o["distance_km"])
+
+
+_index: Optional[OutletGeoIndex] = None
+_index_mtime: Optional[float] = None
+_index_lock = threading.Lock()
+
+
+def get_geo_index(db_path: str = DB_PATH) -> OutletGeoIndex:
+    """Process-wide index, rebuilt when the outlets DB file changes."""
+    global _index, _index_mtime
+    mtime = os.path.getmtime(db_path)
+    with _index_lock:
+        if _index is None or _index_mtime != mtime:
+            _index = OutletGeoIndex.from_db(db_path)
+            _index_mtime = mtime
+        return _index
+
+
+def nearest_outlets(place: Optional[str] = None, lat: Optional[float] = None, lon: Optional[float] = None,
+                    k: int = 3, radius_km: Optional[float] = None) -> dict:
+    """k-nearest (or within `radius_km`) outlets to a gazetteer place name or a lat/lon pair."""
+    if lat is None or lon is None:
+        entry = find_place(place or "")
+        if entry is None:
+            return {"error": f"Unknown location: {place}"}
+        lat, lon, place = entry["lat"], entry["lon"], entry["name"]
+
+    index = get_geo_index()
+    if radius_km is not None:
+        results = index.within(lat, lon, radius_km)
+    else:
+        results = index.nearest(lat, lon, k)
+
+    return {"place": place, "lat": lat, "lon": lon, "result": results}
+
+
+def is_proximity_query(text: str) -> bool:
+    return bool(NEAREST_PATTERN.search(text) or NEARBY_PATTERN.search(text))
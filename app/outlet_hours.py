@@ -0,0 +1,369 @@
+import bisect
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+# === Constants ===
+DB_PATH = "data/outlets.db"
+MALAYSIA_TZ = timezone(timedelta(hours=8))  # no DST, so a fixed offset is exact
+MINUTES_PER_DAY = 24 * 60
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+DAY_ALIASES = {name[:3]: i for i, name in enumerate(WEEKDAYS)}
+DAY_ALIASES.update({name: i for i, name in enumerate(WEEKDAYS)})
+DAY_ALIASES.update({"tues": 1, "wed": 2, "thur": 3, "thurs": 3})
+
+PLACE_NGRAM_MAX = 4  # longest place phrase (in tokens) indexed directly
+
+Interval = Tuple[int, int, int]  # (weekday 0=Mon, open minute, close minute), close exclusive
+
+_DAY = r"(?:mon(?:day)?|tue(?:s|sday)?|wed(?:nesday)?|thu(?:r|rs|rsday)?|fri(?:day)?|sat(?:urday)?|sun(?:day)?)"
+DAY_RANGE_PATTERN = re.compile(rf"\b({_DAY})\s*(?:-|–|to)\s*({_DAY})\b", re.IGNORECASE)
+DAY_PATTERN = re.compile(rf"\b({_DAY})\b", re.IGNORECASE)
+_TIME = r"\d{1,2}(?::\d{1,3}|\.\d{2})?\s*(?:am|pm|a\.m\.|p\.m\.)?"
+TIME_RANGE_PATTERN = re.compile(rf"({_TIME})\s*(?:-|–|to)\s*({_TIME})", re.IGNORECASE)
+ALL_DAY_PATTERN = re.compile(r"\b24\s*(?:hours|hrs|h)\b|\b24/7\b|\bopen 24\b", re.IGNORECASE)
+CLOSED_PATTERN = re.compile(r"\b(off|closed)\b", re.IGNORECASE)
+
+
+# === Parsing ===
+def parse_time(text: str) -> Optional[int]:
+    """'8am' -> 480, '11:40pm' -> 1420, '21:30' -> 1290."""
+    match = re.match(r"\s*(\d{1,2})(?:[:.](\d{1,3}))?\s*(am|pm|a\.m\.|p\.m\.)?", text, re.IGNORECASE)
+    if not match:
+        return None
+    hour = int(match.group(1))
+    minute = int(match.group(2) or 0)
+    if minute > 59:
+        minute = 0  # source typos like "5:100pm" most likely mean "5:00pm"
+    meridiem = (match.group(3) or "").lower().replace(".", "")
+    if meridiem == "pm" and hour < 12:
+        hour += 12
+    elif meridiem == "am" and hour == 12:
+        hour = 0
+    if hour > 24:
+        return None
+    return min(hour * 60 + minute, MINUTES_PER_DAY)
+
+
+def _clause_days(clause: str) -> Optional[List[int]]:
+    lowered = clause.lower()
+    if re.search(r"\b(daily|every\s*day|everyday)\b", lowered):
+        return list(range(7))
+    if re.search(r"\bweekdays?\b", lowered):
+        return [0, 1, 2, 3, 4]
+    if re.search(r"\bweekends?\b", lowered):
+        return [5, 6]
+
+    days = []
+    for start, end in DAY_RANGE_PATTERN.findall(clause):
+        first, last = DAY_ALIASES.get(start.lower()[:3]), DAY_ALIASES.get(end.lower()[:3])
+        if first is None or last is None:
+            continue
+        day = first
+        while True:
+            days.append(day)
+            if day == last:
+                break
+            day = (day + 1) % 7
+    remainder = DAY_RANGE_PATTERN.sub(" ", clause)
+    days += [DAY_ALIASES[d.lower()[:3]] for d in DAY_PATTERN.findall(remainder) if d.lower()[:3] in DAY_ALIASES]
+    return sorted(set(days)) or None
+
+
+def _merge(intervals: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def parse_hours(text: Optional[str]) -> List[Interval]:
+    """
+    Parse free-text opening hours into per-weekday minute intervals.
+
+    Handles the formats in the outlets table ("Daily 8am-11:40pm",
+    "Daily 9am-5:00pm, Weekend off") plus day ranges, "24 hours" and
+    overnight ranges, which are split at midnight onto the next day.
+    Clauses are applied left to right, so a later "Weekend off" removes days.
+    """
+    if not text or text.strip().upper() == "N/A":
+        return []
+
+    by_day: Dict[int, List[Tuple[int, int]]] = {d: [] for d in range(7)}
+    for clause in re.split(r"[,;\n]", text):
+        if not clause.strip():
+            continue
+        days = _clause_days(clause)
+
+        if CLOSED_PATTERN.search(clause) and not TIME_RANGE_PATTERN.search(clause):
+            for day in days or []:
+                by_day[day] = []
+            continue
+
+        days = days if days is not None else list(range(7))
+        if ALL_DAY_PATTERN.search(clause):
+            for day in days:
+                by_day[day] = [(0, MINUTES_PER_DAY)]
+            continue
+
+        for open_text, close_text in TIME_RANGE_PATTERN.findall(clause):
+            opens, closes = parse_time(open_text), parse_time(close_text)
+            if opens is None or closes is None:
+                continue
+            for day in days:
+                if closes > opens:
+                    by_day[day].append((opens, closes))
+                else:
+                    by_day[day].append((opens, MINUTES_PER_DAY))
+                    if closes > 0:
+                        by_day[(day + 1) % 7].append((0, closes))
+
+    return [(day, start, end) for day in range(7) for start, end in _merge(by_day[day])]
+
+
+def format_minute(minute: int) -> str:
+    if minute >= MINUTES_PER_DAY:
+        return "midnight"
+    hour, mins = divmod(minute, 60)
+    suffix = "am" if hour < 12 else "pm"
+    hour = hour % 12 or 12
+    return f"{hour}:{mins:02d}{suffix}" if mins else f"{hour}{suffix}"
+
+
+# === Interval index ===
+class HoursIndex:
+    """
+    Per-weekday stabbing index over opening intervals.
+
+    Every interval boundary of a weekday splits the day into elementary
+    segments; each segment stores the outlets open throughout it. "Open at T"
+    is then one bisect into the boundaries, O(log n) plus the size of the answer.
+
+    Places are looked up the same way: every run of up to PLACE_NGRAM_MAX
+    tokens of each name and address maps to the outlets it appears in, and
+    every outlet alias maps to itself, so a question costs dictionary lookups
+    for its own n-grams rather than a scan of the outlets.
+    """
+
+    def __init__(self, outlets: Dict[int, dict], intervals: Dict[int, List[Interval]]):
+        self.outlets = outlets
+        self.intervals = intervals
+        self.boundaries: List[List[int]] = []
+        self.segments: List[List[Tuple[int, ...]]] = []
+
+        for day in range(7):
+            day_intervals = [(start, end, oid) for oid, ivs in intervals.items() for d, start, end in ivs if d == day]
+            points = sorted({p for start, end, _ in day_intervals for p in (start, end)} | {0, MINUTES_PER_DAY})
+            segments = []
+            for left in points[:-1]:
+                segments.append(tuple(sorted(oid for start, end, oid in day_intervals if start <= left < end)))
+            self.boundaries.append(points)
+            self.segments.append(segments)
+
+        self.places: Dict[str, Set[int]] = {}
+        self.aliases: Dict[str, str] = {}
+        for oid, outlet in outlets.items():
+            for text in (outlet["name"], outlet["address"]):
+                for gram in ngrams(place_tokens(text), PLACE_NGRAM_MAX):
+                    self.places.setdefault(gram, set()).add(oid)
+            for alias in outlet_aliases(outlet["name"]):
+                self.aliases[" ".join(place_tokens(alias))] = alias
+        self.alias_words = max((len(alias.split()) for alias in self.aliases), default=0)
+
+        self.all_day = sorted(
+            oid for oid, ivs in intervals.items()
+            if len(ivs) == 7 and all(start == 0 and end == MINUTES_PER_DAY for _, start, end in ivs)
+        )
+
+    @classmethod
+    def from_db(cls, db_path: str = DB_PATH) -> "HoursIndex":
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            outlets = {
+                row[0]: {"name": row[1], "address": row[2], "hours": row[3]}
+                for row in conn.execute("SELECT id, name, address, hours FROM outlets")
+            }
+            has_side_table = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'outlet_hours'"
+            ).fetchone()
+            intervals: Dict[int, List[Interval]] = {}
+            if has_side_table:
+                for oid, day, start, end in conn.execute(
+                    "SELECT outlet_id, weekday, open_min, close_min FROM outlet_hours ORDER BY outlet_id, weekday, open_min"
+                ):
+                    intervals.setdefault(oid, []).append((day, start, end))
+            else:
+                # Databases not yet processed by ingestion are parsed here
+                for oid, outlet in outlets.items():
+                    parsed = parse_hours(outlet["hours"])
+                    if parsed:
+                        intervals[oid] = parsed
+        finally:
+            conn.close()
+        return cls(outlets, intervals)
+
+    def open_at(self, weekday: int, minute: int) -> List[int]:
+        points = self.boundaries[weekday]
+        position = bisect.bisect_right(points, minute) - 1
+        if position < 0 or position >= len(self.segments[weekday]):
+            return []
+        return list(self.segments[weekday][position])
+
+    def outlets_at(self, place: str) -> List[int]:
+        """Outlets whose name or address contains `place` as whole tokens."""
+        tokens = place_tokens(place)
+        if not tokens:
+            return []
+        if len(tokens) <= PLACE_NGRAM_MAX:
+            return sorted(self.places.get(" ".join(tokens), ()))
+        # Longer than any indexed run: narrow down on its first run, then check the few candidates
+        candidates = self.places.get(" ".join(tokens[:PLACE_NGRAM_MAX]), ())
+        return sorted(oid for oid in candidates
+                      if mentions_place(place, self.outlets[oid]["name"]) or mentions_place(place, self.outlets[oid]["address"]))
+
+    def alias_in(self, query: str) -> Optional[str]:
+        """Longest outlet alias the query mentions."""
+        found = [self.aliases[gram] for gram in ngrams(place_tokens(query), self.alias_words) if gram in self.aliases]
+        return max(found, key=len) if found else None
+
+    def hours_on(self, outlet_id: int, weekday: int) -> List[Tuple[int, int]]:
+        return [(start, end) for day, start, end in self.intervals.get(outlet_id, []) if day == weekday]
+
+
+_index: Optional[HoursIndex] = None
+_index_mtime: Optional[float] = None
+_index_lock = threading.Lock()
+
+
+def get_hours_index(db_path: str = DB_PATH) -> HoursIndex:
+    """Process-wide index, rebuilt when the outlets DB file changes."""
+    global _index, _index_mtime
+    mtime = os.path.getmtime(db_path)
+    with _index_lock:
+        if _index is None or _index_mtime != mtime:
+            _index = HoursIndex.from_db(db_path)
+            _index_mtime = mtime
+        return _index
+
+
+# === Questions ===
+HOURS_QUESTION_PATTERN = re.compile(
+    r"\bopen(?:ed|s)?\s+(?:right\s+)?now\b|\bopen(?:s)?\s+(?:at|by|until|till)\b|\b24\s*(?:hours|hrs)\b|\b24/7\b",
+    re.IGNORECASE,
+)
+AT_TIME_PATTERN = re.compile(rf"\b(?:at|by|until|till)\s+({_TIME})", re.IGNORECASE)
+
+
+def is_hours_query(text: str) -> bool:
+    return bool(HOURS_QUESTION_PATTERN.search(text))
+
+
+def resolve_query_time(text: str, now: Optional[datetime] = None) -> Tuple[int, int]:
+    """(weekday, minute) the question asks about: an explicit time/day if given, else now in Malaysia."""
+    now = now or datetime.now(MALAYSIA_TZ)
+    weekday, minute = now.weekday(), now.hour * 60 + now.minute
+
+    if re.search(r"\btomorrow\b", text, re.IGNORECASE):
+        weekday = (weekday + 1) % 7
+    day_match = DAY_PATTERN.search(text)
+    if day_match and day_match.group(1).lower()[:3] in DAY_ALIASES:
+        weekday = DAY_ALIASES[day_match.group(1).lower()[:3]]
+
+    time_match = AT_TIME_PATTERN.search(text)
+    if time_match:
+        parsed = parse_time(time_match.group(1))
+        if parsed is not None:
+            minute = min(parsed, MINUTES_PER_DAY - 1)
+    return weekday, minute
+
+
+def normalize_place(text: str) -> str:
+    """Lowercase, single-spaced, with "SS 2" / "Seksyen 3" written as "ss2" / "seksyen3"."""
+    text = re.sub(r"\s+", " ", text or "").strip().lower()
+    return re.sub(r"(?<=[a-z]) (?=\d)", "", text)
+
+
+def place_tokens(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9]+", normalize_place(text))
+
+
+def ngrams(tokens: List[str], max_n: int) -> Iterator[str]:
+    for n in range(1, max_n + 1):
+        for i in range(len(tokens) - n + 1):
+            yield " ".join(tokens[i:i + n])
+
+
+def mentions_place(place: str, text: str) -> bool:
+    """Whole-token match, so "SS 2" finds "Jalan SS2/1" but not "Jalan SS21/39"."""
+    key = normalize_place(place)
+    return bool(key) and re.search(rf"(?<![a-z0-9]){re.escape(key)}(?![a-z0-9])", normalize_place(text)) is not None
+
+
+# Words that describe the kind of venue rather than name it: "Spectrum Shopping Mall" is "the Spectrum outlet"
+GENERIC_NAME_WORDS = {"shopping", "mall", "gallery", "centre", "center", "business", "park", "residence", "campus", "highway", "city"}
+# "the store", "your nearest outlet", "any branch": a determiner, not a name
+_DETERMINER = r"(?:any|an|a|the|this|that|your|our|my|which|what|every|each|one|some|nearest|closest|zus|coffee)"
+_OUTLET_WORD = r"(?:outlet|branch|store|shop|kiosk)"
+NAMED_OUTLET_PATTERN = re.compile(
+    rf"\b(?!{_DETERMINER}\b)\w+\s+{_OUTLET_WORD}\b"
+    rf"|^\s*is\s+(?!(?:there|any|it|zus)\b|(?:{_DETERMINER}\s+)+{_OUTLET_WORD}s?\b)",
+    re.IGNORECASE,
+)
+
+
+def outlet_aliases(name: str) -> List[str]:
+    """Ways a question refers to an outlet: "ZUS Coffee - LSH33, Sentul" -> ["lsh33", "sentul"]."""
+    aliases = []
+    for segment in re.sub(r"^\s*zus coffee\s*-\s*", "", name, flags=re.IGNORECASE).split(","):
+        words = normalize_place(segment).split()
+        while words and words[-1] in GENERIC_NAME_WORDS:
+            aliases.append(" ".join(words))
+            words.pop()
+        aliases.append(" ".join(words))
+    return [alias for alias in dict.fromkeys(aliases) if len(alias) >= 3]
+
+
+def mentioned_outlet(query: str) -> Optional[str]:
+    """Longest outlet name (or name part) the question mentions, if any."""
+    return get_hours_index().alias_in(query)
+
+
+def names_an_outlet(query: str) -> bool:
+    """"Is the Spectrum outlet open now?" asks about one outlet; "Which outlets are open now?" does not."""
+    return bool(NAMED_OUTLET_PATTERN.search(query))
+
+
+def open_outlets(query: str, place: Optional[str] = None, now: Optional[datetime] = None) -> dict:
+    """
+    Answer "open now" / "open at T" / "open 24 hours" from the interval index.
+
+    With a `place`, outlets whose name or address mention it are reported
+    whether open or not, with that day's hours.
+    """
+    index = get_hours_index()
+
+    if ALL_DAY_PATTERN.search(query):
+        ids = index.all_day
+        return {"kind": "24h", "result": [dict(index.outlets[oid]) for oid in ids]}
+
+    weekday, minute = resolve_query_time(query, now)
+    open_ids = set(index.open_at(weekday, minute))
+    when = f"{WEEKDAYS[weekday].title()} {format_minute(minute)}"
+
+    if place:
+        result = []
+        for oid in index.outlets_at(place):
+            outlet = dict(index.outlets[oid])
+            outlet["open"] = oid in open_ids
+            outlet["today"] = ", ".join(f"{format_minute(s)}-{format_minute(e)}" for s, e in index.hours_on(oid, weekday)) or "closed"
+            result.append(outlet)
+        return {"kind": "place", "when": when, "place": place, "result": result}
+
+    return {"kind": "open", "when": when, "result": [dict(index.outlets[oid]) for oid in sorted(open_ids)]}
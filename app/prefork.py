@@ -0,0 +1,113 @@
+"""
+Pre-fork deployment helpers.
+
+With `gunicorn -c gunicorn.conf.py app.main:app` the master imports app.main
+and loads the vector store (app.rag.load_store: MiniLM weights, FAISS index,
+product metadata) once, then forks the workers,
+which then share those pages copy-on-write. The FAISS index is memory-mapped
+(see app.rag.load_index), so its pages live in the page cache.
+
+    python -m app.prefork report <master_pid>
+
+prints per-process RSS split into unique (private) and shared memory.
+"""
+import gc
+import os
+import sys
+from typing import Dict, List
+
+SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty", "Swap")
+
+
+# === Fork hooks ===
+def freeze_master_heap():
+    """
+    Move everything allocated so far into the permanent GC generation.
+
+    Otherwise the first collection in each worker touches every object header
+    and copies the shared pages anyway.
+    """
+    gc.collect()
+    gc.freeze()
+
+
+def threads_per_worker(workers: int) -> int:
+    """Embedding threads per worker: TORCH_THREADS_PER_WORKER, else an equal share of the CPUs."""
+    return int(os.getenv("TORCH_THREADS_PER_WORKER", "0")) or max(1, (os.cpu_count() or 1) // max(workers, 1))
+
+
+def after_fork(workers: int):
+    """Per-worker setup: split CPU threads between workers and reopen network clients."""
+    # Only the torch backend loads torch; the ONNX session got its thread count in the master (load_store)
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads_per_worker(workers))
+
+    # gRPC channels opened in the master are not fork-safe: each worker opens its own
+    # transport (on first use) and takes an equal share of the LLM_RATE_LIMIT_RPM quota
+    from app import llm_clients
+    llm_clients.registry.reset(share=workers)
+
+
+# === Memory report ===
+def read_smaps_rollup(pid: int) -> Dict[str, int]:
+    """Memory totals for a process in kB, from /proc/<pid>/smaps_rollup."""
+    totals = {field: 0 for field in SMAPS_FIELDS}
+    with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].rstrip(":") in totals:
+                totals[parts[0].rstrip(":")] = int(parts[1])
+    return totals
+
+
+def child_pids(parent: int) -> List[int]:
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                # The command name may contain spaces; fields after ")" are space separated
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == parent:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def memory_report(master_pid: int) -> List[dict]:
+    rows = []
+    for role, pid in [("master", master_pid)] + [("worker", pid) for pid in child_pids(master_pid)]:
+        stats = read_smaps_rollup(pid)
+        rows.append({
+            "pid": pid,
+            "role": role,
+            "rss_kb": stats["Rss"],
+            "pss_kb": stats["Pss"],
+            "shared_kb": stats["Shared_Clean"] + stats["Shared_Dirty"],
+            "unique_kb": stats["Private_Clean"] + stats["Private_Dirty"],
+        })
+    return rows
+
+
+def print_memory_report(master_pid: int):
+    rows = memory_report(master_pid)
+    print(f"{'pid':>8} {'role':<7} {'rss MB':>9} {'pss MB':>9} {'shared MB':>10} {'unique MB':>10}")
+    for row in rows:
+        print(
+            f"{row['pid']:>8} {row['role']:<7} {row['rss_kb'] / 1024:>9.1f} {row['pss_kb'] / 1024:>9.1f} "
+            f"{row['shared_kb'] / 1024:>10.1f} {row['unique_kb'] / 1024:>10.1f}"
+        )
+    workers = [row for row in rows if row["role"] == "worker"]
+    if workers:
+        total_pss = sum(row["pss_kb"] for row in rows) / 1024
+        mean_unique = sum(row["unique_kb"] for row in workers) / len(workers) / 1024
+        print(f"\n{len(workers)} workers, total PSS {total_pss:.1f} MB, mean unique per worker {mean_unique:.1f} MB")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "report":
+        print("Usage: python -m app.prefork report <master_pid>")
+        sys.exit(1)
+    print_memory_report(int(sys.argv[2]))
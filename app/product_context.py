@@ -0,0 +1,111 @@
+"""
+Query-aware product context for summarize_results.
+
+Every hit used to be serialized with all of its attributes. Here the
+question picks the fields ("how much" -> price, "BPA free" -> materials),
+and each product becomes one compact line with those fields in a fixed
+order. Questions that match no field keep the full description.
+
+    python -m app.product_context
+
+prints estimated prompt tokens with all fields vs pruned for sample questions.
+"""
+import re
+from typing import Dict, List, Sequence
+
+# Fixed render order, so the same fields always produce the same text
+FIELDS = ["info", "variations", "price", "volume", "height", "materials"]
+
+# Word-bounded on both ends and specific to the field: a stray match prunes what the question needs
+QUERY_FIELDS = [
+    (r"\b(how much|prices?|costs?|rm\s?\d+|cheap|cheaper|cheapest|expensive|budget|under\s*(?:rm\s*)?\d+|affordable)\b", ["price"]),
+    (r"\b(materials?|made of|made from|bpa|stainless|steel|plastic|ceramic|glass|silicone|dishwasher|microwave|toxic)\b", ["info", "materials"]),
+    (r"\b(hot|cold|heat|warm|insulat\w*|retention)\b", ["info"]),
+    (r"\b(volume|capacity|ml|oz|litre|liter|how big|sizes?|large|small)\b", ["volume"]),
+    (r"\b(height|tall|how big|sizes?|dimensions?)\b", ["height"]),
+    (r"\b(colou?rs?|variations?|designs?|patterns?)\b", ["variations"]),
+]
+
+CHARS_PER_TOKEN = 4  # rough Gemini/SentencePiece average for English product text
+
+
+def select_fields(query: str) -> List[str]:
+    """Fields the question needs, in render order; all of them when nothing specific is asked."""
+    wanted = set()
+    for pattern, fields in QUERY_FIELDS:
+        if re.search(pattern, query, re.IGNORECASE):
+            wanted.update(fields)
+    return [f for f in FIELDS if f in wanted] or list(FIELDS)
+
+
+def _render(r: dict, field: str) -> str:
+    measurements = r.get("measurements") or {}
+    if field == "info":
+        return ", ".join(r.get("product_info") or ["No product info available"])
+    if field == "variations":
+        return f"Variations: {', '.join(r.get('variations') or ['N/A'])}"
+    if field == "price":
+        return f"Price: {r.get('price', 'N/A')}"
+    if field == "volume":
+        return f"Volume: {measurements.get('Volume', 'N/A')}"
+    if field == "height":
+        return f"Height: {measurements.get('Height', 'N/A')}"
+    if field == "materials":
+        materials = r.get("materials") or {}
+        return f"Material: {', '.join(f'{k} {v}' for k, v in materials.items()) or 'No material info available'}"
+    raise ValueError(f"Unknown field '{field}'")
+
+
+def format_results(results: Sequence[dict], fields: Sequence[str] = FIELDS) -> str:
+    return "\n".join(
+        " | ".join([f"- {r.get('name', 'Unknown')}"] + [_render(r, field) for field in fields])
+        for r in results
+    )
+
+
+def build_prompt(query: str, content: str) -> str:
+    return f"""
+You are a helpful assistant for ZUS Coffee product discovery. Answer the question below based on this product info:
+
+{content}
+
+User Question: {query}
+
+Answer:
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, round(len(text) / CHARS_PER_TOKEN))
+
+
+def context_report(query: str, results: Sequence[dict]) -> Dict[str, object]:
+    """Estimated prompt tokens with every field vs only the selected ones."""
+    fields = select_fields(query)
+    full = estimate_tokens(build_prompt(query, format_results(results)))
+    pruned = estimate_tokens(build_prompt(query, format_results(results, fields)))
+    return {"fields": fields, "prompt_tokens_full": full, "prompt_tokens": pruned}
+
+
+SAMPLE_QUERIES = [
+    "How much is the All Day Cup?",
+    "Which tumblers are BPA free?",
+    "What colours does the OG cup come in?",
+    "How tall is the Frozee cold cup?",
+    "Does it keep drinks hot?",
+    "Tell me about the All-Can Tumbler",
+]
+
+
+if __name__ == "__main__":
+    import pickle
+
+    with open("data/faiss_products_metadata.pkl", "rb") as f:
+        products = [p[0] if isinstance(p, list) else p for p in pickle.load(f)]
+    sample = products[:3]  # summarize_results sees top_k=3 hits
+
+    print(f"{'full':>6} {'pruned':>6} {'saved':>6}  fields / question")
+    for query in SAMPLE_QUERIES:
+        report = context_report(query, sample)
+        saved = 1 - report["prompt_tokens"] / report["prompt_tokens_full"]
+        print(f"{report['prompt_tokens_full']:>6} {report['prompt_tokens']:>6} {saved:>6.0%}  {','.join(report['fields'])} / {query}")
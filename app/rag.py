@@ -1,40 +1,109 @@
-import faiss
+import logging
 import pickle
 import os
+import threading
+import time
+from dataclasses import dataclass
 from dotenv import load_dotenv
 
-from sentence_transformers import SentenceTransformer
-from typing import List
-from langchain_google_genai import ChatGoogleGenerativeAI
+from typing import Any, List, Optional
 from langchain_core.messages import HumanMessage
+from app.embeddings import QueryBatcher, get_embedder
+from app.llm_clients import get_llm
+from app.logging_setup import log_payload
+from app.relevance import load_cutoff
+from app.product_context import build_prompt, context_report, format_results
 
 load_dotenv()
 
-# === Load on startup ===
+logger = logging.getLogger(__name__)
+
+# === Vector store, loaded on first use ===
 DATA_DIR = "data"
 INDEX_PATH = os.path.join(DATA_DIR, "faiss_products.index")
 META_PATH = os.path.join(DATA_DIR, "faiss_products_metadata.pkl")
 
-print("🔄 Loading vector store and metadata...")
-index = faiss.read_index(INDEX_PATH)
-with open(META_PATH, "rb") as f:
-    metadata = pickle.load(f)
-
-model = SentenceTransformer("all-MiniLM-L6-v2")
-
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    google_api_key=os.environ.get("GOOGLE_API_KEY")
+# Memory-map the index so pre-forked workers share its pages through the page cache
+MMAP_INDEX = os.getenv("RAG_MMAP_INDEX", "1") == "1"
+
+
+def load_index(path: str):
+    import faiss
+    if not MMAP_INDEX:
+        return faiss.read_index(path)
+    # Flat indexes map their codes with IO_FLAG_MMAP_IFC; IVF lists use IO_FLAG_MMAP
+    for flag_name in ("IO_FLAG_MMAP_IFC", "IO_FLAG_MMAP"):
+        flag = getattr(faiss, flag_name, None)
+        if flag is None:
+            continue
+        try:
+            return faiss.read_index(path, flag | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            continue
+    return faiss.read_index(path)
+
+
+@dataclass
+class ProductStore:
+    index: Any
+    metadata: list
+    model: Any
+    # Concurrent /products and product_search_tool queries share one encode + index.search
+    batcher: QueryBatcher
+
+
+_store: Optional[ProductStore] = None
+_store_lock = threading.Lock()
+
+
+def load_store(threads: int = 0) -> ProductStore:
+    """
+    FAISS index, product metadata and embedder, loaded once per process.
+
+    Importing this module stays cheap; gunicorn.conf.py calls this in the
+    master before forking so workers still share the pages copy-on-write,
+    passing each worker's share of the CPUs as the ONNX session's `threads`
+    (only the first call builds the store).
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                logger.info("Loading vector store and metadata")
+                index = load_index(INDEX_PATH)
+                with open(META_PATH, "rb") as f:
+                    metadata = pickle.load(f)
+                # Backend picked by EMBEDDING_BACKEND (torch, onnx, onnx-int8); the ONNX ones never import torch
+                model = get_embedder(threads=threads)
+                _store = ProductStore(index, metadata, model, QueryBatcher(model, index))
+    return _store
+
+
+# Hits farther than this (squared L2) are not about anything we sell; see app.relevance
+MAX_DISTANCE = load_cutoff()
+NO_MATCH_ANSWER = (
+    "Sorry, I couldn't find any ZUS drinkware matching your question. "
+    "I can help with our tumblers, cups and mugs, e.g. their materials, sizes, colours or prices."
 )
 
 def semantic_search(query: str, top_k: int = 3) -> List[dict]:
-    embedding = model.encode([query])
-    D, I = index.search(embedding, top_k)
-    print("Indexes returned:", I)
-    print("Raw metadata:", [metadata[i] for i in I[0]])  # Debug
-    results = [clean_result(metadata[i]) for i in I[0]]
+    store = load_store()
+    D, I = store.batcher.search(query, top_k)
+    log_payload(logger, "FAISS hits", lambda: {"ids": I.tolist(), "distances": D.tolist(), "metadata": [store.metadata[i] for i in I]})
+    results = []
+    for distance, i in zip(D, I):
+        if i < 0:
+            continue  # fewer products than top_k
+        result = clean_result(store.metadata[i])
+        result["distance"] = float(distance)
+        results.append(result)
     return results
 
+def relevant_results(results: List[dict], max_distance: float = None) -> List[dict]:
+    """Hits within the relevance cutoff; an empty list means answer with NO_MATCH_ANSWER, not the LLM."""
+    cutoff = MAX_DISTANCE if max_distance is None else max_distance
+    return [r for r in results if r.get("distance", 0.0) <= cutoff]
+
 def clean_result(r: dict) -> dict:
     if isinstance(r, list) and len(r) > 0:
         r = r[0]  # Unwrap if list of one dict
@@ -52,30 +121,17 @@ def clean_result(r: dict) -> dict:
 
 
 def summarize_results(query: str, results: List[dict]) -> str:
-    print("Results type:", type(results))
-    print("First result type:", type(results[0]))
-    print("First result keys:", results[0].keys())
-
-    content = "\n".join([
-        f"- {r.get('name', 'Unknown')} | "
-        f"{', '.join(r.get('product_info', ['No product info available']))} | "
-        f"Variations: {', '.join(r.get('variations', ['N/A']))} | "
-        f"Price: {r.get('price', 'N/A')} | "
-        f"Volume: {r.get('measurements', {}).get('Volume', 'N/A')} | "
-        f"Height: {r.get('measurements', {}).get('Height', 'N/A')} | "
-        f"Material: {', '.join(r.get('materials', {}).keys()) if r.get('materials') else 'No material info available'}"
-        for r in results
-    ])
-
-    prompt = f"""
-You are a helpful assistant for ZUS Coffee product discovery. Answer the question below based on this product info:
-
-{content}
-
-User Question: {query}
-
-Answer:
-"""
-    response = llm.invoke([HumanMessage(content=prompt)])
+    log_payload(logger, "Summarizing results", lambda: {"query": query, "results": results})
+
+    # Only the attributes the question is about go into the prompt; see app.product_context
+    report = context_report(query, results)
+    prompt = build_prompt(query, format_results(results, report["fields"]))
+    started = time.perf_counter()
+    # temperature=0 so identical concurrent summaries collapse into one upstream call
+    response = get_llm("summary").invoke([HumanMessage(content=prompt)])
+    usage = getattr(response, "usage_metadata", None) or {}
+    logger.info(
+        "Product summary prompt",
+        extra={**report, "input_tokens": usage.get("input_tokens"), "llm_ms": round((time.perf_counter() - started) * 1000, 1)},
+    )
     return response.content.strip()
-
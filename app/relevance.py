@@ -0,0 +1,97 @@
+"""
+Relevance cutoff for product search.
+
+FAISS always returns top_k products; for questions about things ZUS doesn't
+sell ("Any ZUS products made of gold?") they are just the least-bad matches.
+Hits whose L2 distance is above the cutoff are treated as no match, and the
+caller answers from a template instead of asking Gemini to summarize them.
+
+    python -m app.relevance calibrate [--labels data/relevance_queries.csv]
+
+fits the cutoff on a labelled query set (query,relevant) and writes it to
+data/relevance_cutoff.json. RAG_MAX_DISTANCE overrides it.
+"""
+import csv
+import json
+import os
+from typing import List, Sequence, Tuple
+
+CUTOFF_PATH = os.path.join("data", "relevance_cutoff.json")
+LABELS_PATH = os.path.join("data", "relevance_queries.csv")
+# Normalized MiniLM embeddings: squared L2 = 2 - 2*cos, so 1.4 is cos 0.3. Used until calibrated.
+DEFAULT_MAX_DISTANCE = 1.4
+
+
+def load_cutoff(path: str = CUTOFF_PATH) -> float:
+    override = os.getenv("RAG_MAX_DISTANCE")
+    if override:
+        return float(override)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return float(json.load(f)["max_distance"])
+    except (OSError, KeyError, ValueError):
+        return DEFAULT_MAX_DISTANCE
+
+
+def fit_cutoff(distances: Sequence[float], labels: Sequence[bool]) -> Tuple[float, dict]:
+    """
+    Threshold on the top-1 distance that best separates relevant from irrelevant queries.
+
+    Candidates are midpoints between consecutive sorted distances; the one
+    with the highest F1 for "relevant" wins, ties going to the larger
+    cutoff (missing a real product question costs more than one extra LLM call).
+    """
+    points = sorted(zip(distances, labels))
+    values = [d for d, _ in points]
+    candidates = [values[0] - 1e-6] + [(a + b) / 2 for a, b in zip(values, values[1:])] + [values[-1] + 1e-6]
+
+    best_cutoff, best = None, None
+    for cutoff in candidates:
+        tp = sum(1 for d, rel in points if rel and d <= cutoff)
+        fp = sum(1 for d, rel in points if not rel and d <= cutoff)
+        fn = sum(1 for d, rel in points if rel and d > cutoff)
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        if best is None or f1 >= best["f1"]:
+            best_cutoff = cutoff
+            best = {"f1": f1, "precision": precision, "recall": recall}
+    return best_cutoff, best
+
+
+def read_labels(path: str = LABELS_PATH) -> List[Tuple[str, bool]]:
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return [(row["query"], row["relevant"].strip() == "1") for row in csv.DictReader(f)]
+
+
+def calibrate(labels_path: str = LABELS_PATH, output_path: str = CUTOFF_PATH) -> dict:
+    from app.rag import load_store
+    batcher = load_store().batcher
+
+    labelled = read_labels(labels_path)
+    distances: List[float] = []
+    for query, _ in labelled:
+        D, _ = batcher.search(query, 1)
+        distances.append(float(D[0]))
+
+    cutoff, stats = fit_cutoff(distances, [relevant for _, relevant in labelled])
+    result = {"max_distance": round(cutoff, 4), "queries": len(labelled), **{k: round(v, 3) for k, v in stats.items()}}
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+
+    for (query, relevant), distance in sorted(zip(labelled, distances), key=lambda x: x[1]):
+        marker = "keep" if distance <= cutoff else "drop"
+        print(f"{distance:7.3f} {marker} {'relevant  ' if relevant else 'irrelevant'} {query}")
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fit the product-search relevance cutoff")
+    parser.add_argument("command", choices=["calibrate"])
+    parser.add_argument("--labels", default=LABELS_PATH)
+    parser.add_argument("--output", default=CUTOFF_PATH)
+    args = parser.parse_args()
+    result = calibrate(args.labels, args.output)
+    print(f"\nmax_distance={result['max_distance']} (F1 {result['f1']}, precision {result['precision']}, recall {result['recall']})")
@@ -0,0 +1,192 @@
+"""
+Response cache for repeatable lookups (/products, /outlets).
+
+Responses are stored per worker under a normalized request key (whitespace
+and case of the question do not matter) and the generation of the data they
+were computed from: the mtime and size of the FAISS index and metadata, or
+of outlets.db. Rebuilding either store therefore retires old entries without
+an explicit purge; RESPONSE_CACHE_TTL_S bounds everything else (prompt or
+model changes on the Gemini side).
+
+Every cacheable response gets an ETag and Cache-Control. A GET whose
+If-None-Match matches the current entry is answered 304 without touching the
+route, so browsers and CDNs can skip the body too. Partial answers (deadline
+hit) and error bodies are never stored.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl
+
+from fastapi import Request
+from fastapi.responses import Response
+
+ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "1") == "1"
+TTL_S = float(os.getenv("RESPONSE_CACHE_TTL_S", "300"))
+MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+
+# Fields that hold free text; case and whitespace are normalized away in the key
+TEXT_FIELDS = ("query", "question")
+
+
+@dataclass(frozen=True)
+class CacheRule:
+    """What a cached route depends on: data files whose generation versions the entries."""
+    files: Sequence[str] = field(default_factory=tuple)
+
+    def generation(self) -> str:
+        parts = []
+        for path in self.files:
+            try:
+                st = os.stat(path)
+                parts.append(f"{st.st_mtime_ns}:{st.st_size}")
+            except OSError:
+                parts.append("missing")
+        return "|".join(parts)
+
+
+@dataclass
+class CacheEntry:
+    body: bytes
+    media_type: str
+    etag: str
+    expires: float
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(str(text).split()).casefold()
+
+
+def normalize_params(params: Dict[str, object]) -> str:
+    normalized = {k: normalize_text(v) if k in TEXT_FIELDS and v is not None else v for k, v in params.items() if v is not None}
+    return json.dumps(normalized, sort_keys=True, default=str)
+
+
+def make_etag(body: bytes, generation: str) -> str:
+    return '"' + hashlib.sha256(generation.encode() + b"\0" + body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    # Weak comparison (RFC 9110 13.1.2): W/"x" matches "x"
+    return "*" in candidates or etag in (c[2:] if c.startswith("W/") else c for c in candidates)
+
+
+def cacheable_body(body: bytes) -> bool:
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return False
+    return not (isinstance(payload, dict) and (payload.get("partial") or "error" in payload))
+
+
+class ResponseCache:
+    """HTTP middleware: `app.middleware("http")(cache)`; `rules` maps (method, path) to a CacheRule."""
+
+    def __init__(self, rules: Dict[Tuple[str, str], CacheRule], ttl_s: float = TTL_S, max_entries: int = MAX_ENTRIES,
+                 enabled: bool = ENABLED, clock: Callable[[], float] = time.monotonic):
+        self.rules = rules
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, CacheEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.stored = 0
+
+    async def request_key(self, request: Request) -> Optional[str]:
+        if request.method == "GET":
+            params = dict(parse_qsl(request.url.query, keep_blank_values=True))
+        else:
+            try:
+                params = json.loads(await request.body() or b"{}")
+            except ValueError:
+                return None  # let the route produce its validation error
+            if not isinstance(params, dict):
+                return None
+        return f"{request.method} {request.url.path} {normalize_params(params)}"
+
+    def get(self, key: tuple) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, entry: CacheEntry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self.stored += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _respond(self, request: Request, entry: CacheEntry, status: str) -> Response:
+        headers = {"ETag": entry.etag, "X-Cache": status}
+        remaining = max(0, int(entry.expires - self._clock()))
+        # POST responses are only cached here; shared caches may keep GETs
+        headers["Cache-Control"] = f"public, max-age={remaining}" if request.method == "GET" else "private, no-cache"
+        if request.method == "GET" and etag_matches(request.headers.get("if-none-match"), entry.etag):
+            with self._lock:
+                self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(entry.body, media_type=entry.media_type, headers=headers)
+
+    async def __call__(self, request: Request, call_next):
+        rule = self.rules.get((request.method, request.url.path)) if self.enabled else None
+        key = await self.request_key(request) if rule is not None else None
+        if key is None:
+            return await call_next(request)
+
+        cache_key = (key, rule.generation())
+        entry = self.get(cache_key)
+        if entry is not None:
+            with self._lock:
+                self.hits += 1
+            return self._respond(request, entry, "HIT")
+
+        with self._lock:
+            self.misses += 1
+        response = await call_next(request)
+        media_type = response.headers.get("content-type", "")
+        if response.status_code != 200 or not media_type.startswith("application/json"):
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        if not cacheable_body(body):
+            return Response(body, status_code=response.status_code, headers=dict(response.headers))
+
+        entry = CacheEntry(body, media_type, make_etag(body, cache_key[1]), self._clock() + self.ttl_s)
+        self.put(cache_key, entry)
+        return self._respond(request, entry, "MISS")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "not_modified": self.not_modified,
+                "stored": self.stored,
+                "ttl_s": self.ttl_s,
+            }
@@ -0,0 +1,175 @@
+"""
+Single-flight deduplication of identical in-flight LLM calls.
+
+When many users ask the same thing at once (a promotion, a shared link), the
+summary, SQL and first agent prompts are byte-identical. The first caller for
+a (model, temperature, prompt hash) key goes upstream; callers arriving while
+it is in flight wait for it and get a copy of its result. Nothing is cached
+after the call returns.
+
+Only deterministic settings are collapsed (temperature <= SINGLE_FLIGHT_MAX_TEMPERATURE,
+default 0): with sampling, independent callers are entitled to independent samples.
+"""
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatResult
+
+from app.deadline import DeadlineExceeded, bounded_timeout, check_deadline, current_deadline
+
+MAX_TEMPERATURE = float(os.getenv("SINGLE_FLIGHT_MAX_TEMPERATURE", "0"))
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution of `fn`."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.upstream_calls = 0
+        self.collapsed_calls = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run `fn`, or wait up to `timeout` for the identical call already in flight.
+
+        A leader that ran out of its own deadline says nothing about the
+        waiters' budgets, so on DeadlineExceeded they try again (one of them
+        leading) with the time they have left; other errors reach every waiter.
+        """
+        expires = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+                    self.upstream_calls += 1
+                else:
+                    self.collapsed_calls += 1
+
+            if leader:
+                break
+            remaining = max(0.0, expires - time.monotonic()) if expires is not None else None
+            if not call.done.wait(remaining):
+                raise DeadlineExceeded("Request deadline exceeded waiting for an identical in-flight LLM call")
+            if isinstance(call.error, DeadlineExceeded):
+                continue
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            upstream, collapsed, in_flight = self.upstream_calls, self.collapsed_calls, len(self._calls)
+        total = upstream + collapsed
+        return {
+            "requests": total,
+            "upstream_calls": upstream,
+            "collapsed_calls": collapsed,
+            "collapse_ratio": collapsed / total if total else 0.0,
+            "in_flight": in_flight,
+        }
+
+
+# One group per process, shared by every wrapped model
+llm_flights = SingleFlight()
+
+
+def _prompt_hash(messages: List[BaseMessage], stop: Optional[List[str]], kwargs: dict) -> str:
+    payload = {
+        "messages": [(m.type, m.content) for m in messages],
+        "stop": stop,
+        "kwargs": kwargs,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class SingleFlightChatModel(BaseChatModel):
+    """Chat model wrapper that routes deterministic calls through `llm_flights`."""
+
+    inner: BaseChatModel
+    max_temperature: float = MAX_TEMPERATURE
+
+    @property
+    def _llm_type(self) -> str:
+        return f"single-flight-{self.inner._llm_type}"
+
+    def bind_tools(self, tools, **kwargs):
+        # Let the wrapped model format the tool schemas, then carry them through this wrapper
+        bound = self.inner.bind_tools(tools, **kwargs)
+        return self.bind(**bound.kwargs)
+
+    @property
+    def upstream(self) -> BaseChatModel:
+        """The provider model under any further wrappers (e.g. app.llm_clients.RateLimitedChatModel)."""
+        model = self.inner
+        while isinstance(getattr(model, "inner", None), BaseChatModel):
+            model = model.inner
+        return model
+
+    def flight_key(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, **kwargs) -> Optional[tuple]:
+        """(model, temperature, prompt hash), or None when the call must not be collapsed."""
+        upstream = self.upstream
+        temperature = kwargs.get("temperature", getattr(upstream, "temperature", None))
+        if temperature is None or temperature > self.max_temperature:
+            return None
+        if (getattr(upstream, "n", None) or 1) > 1:
+            return None
+        model = getattr(upstream, "model", None) or getattr(upstream, "model_name", None) or upstream._llm_type
+        return model, temperature, _prompt_hash(messages, stop, kwargs)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        check_deadline("LLM call")
+        key = self.flight_key(messages, stop, **kwargs)
+        rpc_timeout = kwargs.get("timeout", getattr(self.upstream, "timeout", None))
+
+        def call() -> ChatResult:
+            # A waiter may run this after its leader timed out, so the deadline is read per attempt
+            check_deadline("LLM call")
+            # The request deadline becomes the upstream RPC timeout
+            timeout = bounded_timeout(rpc_timeout)
+            call_kwargs = dict(kwargs, timeout=timeout) if timeout is not None else kwargs
+            try:
+                return self.inner._generate(messages, stop=stop, **call_kwargs)
+            except Exception as e:
+                deadline = current_deadline()
+                if deadline is not None and deadline.expired and not isinstance(e, DeadlineExceeded):
+                    raise DeadlineExceeded("Request deadline exceeded during LLM call") from e
+                raise
+
+        if key is None:
+            return call()
+        return llm_flights.do(key, call, timeout=bounded_timeout(rpc_timeout))
@@ -0,0 +1,143 @@
+import sqlite3
+import time
+from typing import Iterable, Optional
+
+from app.deadline import DeadlineExceeded, bounded_timeout
+
+# === Limits for LLM-generated SQL ===
+ALLOWED_TABLES = {"outlets"}
+DENIED_FUNCTIONS = {"load_extension", "randomblob", "zeroblob"}
+MAX_VM_INSTRUCTIONS = 5_000_000
+QUERY_TIMEOUT_S = 2.0
+PROGRESS_INTERVAL = 1000  # VM instructions between progress-handler calls
+MAX_VALUE_LENGTH = 1_000_000  # bytes per string/blob value
+
+
+class SQLSandboxError(Exception):
+    """Base class for generated SQL that the sandbox refused or stopped."""
+
+
+class UnsafeSQLError(SQLSandboxError):
+    """The statement touches something other than a plain SELECT on an allowed table."""
+
+
+class QueryBudgetExceeded(SQLSandboxError):
+    """The statement ran past its VM-instruction budget or wall-clock deadline."""
+
+
+class QueryDeadlineExceeded(QueryBudgetExceeded, DeadlineExceeded):
+    """The statement was stopped because the request deadline, not its own timeout, ran out."""
+
+
+class InvalidSQLError(SQLSandboxError):
+    """SQLite rejected the statement (syntax error, unknown column, ...)."""
+
+
+class SandboxedConnection(sqlite3.Connection):
+    """
+    Read-only connection that only lets SELECTs read the allowed tables.
+
+    Every `guarded_execute` starts a fresh instruction budget and deadline;
+    the progress handler aborts the statement once either runs out. Rows are
+    produced while they are fetched, so read them with `guarded_fetchall` /
+    `guarded_fetchone` to get the same typed errors.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_instructions = MAX_VM_INSTRUCTIONS
+        self.timeout_s = QUERY_TIMEOUT_S
+        self._instructions = 0
+        self._deadline = None
+        self._request_bound = False
+        self._denied: Optional[str] = None
+        self._stopped: Optional[str] = None
+
+        self.setlimit(sqlite3.SQLITE_LIMIT_LENGTH, MAX_VALUE_LENGTH)
+        self.set_authorizer(self._authorize)
+        self.set_progress_handler(self._on_progress, PROGRESS_INTERVAL)
+
+    def _authorize(self, action, arg1, arg2, db_name, trigger):
+        if action == sqlite3.SQLITE_SELECT:
+            return sqlite3.SQLITE_OK
+        if action == sqlite3.SQLITE_READ and arg1 in ALLOWED_TABLES:
+            return sqlite3.SQLITE_OK
+        if action == sqlite3.SQLITE_FUNCTION and (arg2 or "").lower() not in DENIED_FUNCTIONS:
+            return sqlite3.SQLITE_OK
+
+        if action == sqlite3.SQLITE_READ:
+            self._denied = f"reading table '{arg1}' is not allowed"
+        elif action == sqlite3.SQLITE_FUNCTION:
+            self._denied = f"function '{arg2}' is not allowed"
+        elif action == sqlite3.SQLITE_RECURSIVE:
+            self._denied = "recursive queries are not allowed"
+        else:
+            self._denied = "only SELECT statements are allowed"
+        return sqlite3.SQLITE_DENY
+
+    def _on_progress(self):
+        if self._deadline is None:
+            return 0
+        self._instructions += PROGRESS_INTERVAL
+        if self._instructions > self.max_instructions:
+            self._stopped = f"query exceeded {self.max_instructions} VM instructions"
+            return 1
+        if time.monotonic() > self._deadline:
+            if self._request_bound:
+                self._stopped = "Request deadline exceeded during SQL query"
+            else:
+                self._stopped = f"query exceeded {self.timeout_s}s"
+            return 1
+        return 0
+
+    def start_budget(self):
+        self._instructions = 0
+        timeout = bounded_timeout(self.timeout_s)
+        self._request_bound = timeout < self.timeout_s
+        self._deadline = time.monotonic() + timeout
+        self._denied = None
+        self._stopped = None
+
+    def translate_error(self, error: Exception) -> Exception:
+        """Map a raw sqlite3 error raised under the sandbox onto a typed error."""
+        if self._denied:
+            return UnsafeSQLError(self._denied)
+        if self._stopped:
+            return (QueryDeadlineExceeded if self._request_bound else QueryBudgetExceeded)(self._stopped)
+        if isinstance(error, sqlite3.Error):
+            return InvalidSQLError(str(error))
+        return error
+
+    def guarded_execute(self, sql: str, params: Iterable = ()) -> sqlite3.Cursor:
+        self.start_budget()
+        try:
+            return self.execute(sql, tuple(params))
+        except sqlite3.Error as e:
+            raise self.translate_error(e) from e
+
+    def guarded_fetchall(self, cursor: sqlite3.Cursor) -> list:
+        try:
+            return cursor.fetchall()
+        except sqlite3.Error as e:
+            raise self.translate_error(e) from e
+
+    def guarded_fetchone(self, cursor: sqlite3.Cursor) -> Optional[tuple]:
+        try:
+            return cursor.fetchone()
+        except sqlite3.Error as e:
+            raise self.translate_error(e) from e
+
+
+def connect(db_path: str, max_instructions: int = MAX_VM_INSTRUCTIONS,
+            timeout_s: float = QUERY_TIMEOUT_S, **kwargs) -> SandboxedConnection:
+    """Open `db_path` read-only behind the sandbox. Extra kwargs go to sqlite3.connect."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, factory=SandboxedConnection, **kwargs)
+    conn.max_instructions = max_instructions
+    conn.timeout_s = timeout_s
+    return conn
+
+
+def limit_sql(sql: str, limit: int, offset: int = 0):
+    """Rewrite a generated SELECT so it can never return more than `limit` rows."""
+    sql = sql.strip().rstrip(";").strip()
+    return f"SELECT * FROM ({sql}) LIMIT ? OFFSET ?", (limit, offset)
@@ -0,0 +1,128 @@
+"""
+Startup budget for app.main.
+
+    python -m app.startup_budget [--top 15]
+
+Runs two fresh interpreters without GOOGLE_API_KEY and with the warm-up off:
+
+  * `python -X importtime -c "import app.main"`: the import cost, with the
+    import self time summed per package;
+  * import app.main and serve GET /healthz: time to first response, measured
+    from process start.
+
+It also checks that no heavy module (torch, faiss, the LangChain agent
+stack, the Gemini client) is imported by app.main itself; those load on
+first use. Exits 1 when a budget is exceeded or a heavy import slips back in.
+tests/test_startup_budget.py checks the deferred imports only: wall-clock
+budgets depend on machine load, so they are enforced here, not in pytest.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "2000"))
+FIRST_RESPONSE_BUDGET_MS = float(os.getenv("STARTUP_FIRST_RESPONSE_BUDGET_MS", "4000"))
+
+# Loaded on first use (app.rag.load_store, first chatbot request, first LLM call), never by `import app.main`
+DEFERRED_MODULES = [
+    "torch",
+    "faiss",
+    "sentence_transformers",
+    "transformers",
+    "onnxruntime",
+    "langchain.agents",
+    "langchain_google_genai",
+    "chatbot_app.chatbot_part4",
+]
+
+FIRST_RESPONSE_SCRIPT = """
+from fastapi.testclient import TestClient
+import app.main
+response = TestClient(app.main.app).get("/healthz")
+assert response.status_code == 200, response.text
+"""
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ, WARMUP_ENABLED="0", PYTHONDONTWRITEBYTECODE="1")
+    env.pop("GOOGLE_API_KEY", None)  # importing must not need it
+    return env
+
+
+def import_times(module: str = "app.main") -> List[Tuple[str, int, int, int]]:
+    """(module, self us, cumulative us, nesting depth) for every import, from -X importtime."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=_env(), capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.split(":", 1)[1].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def first_response_ms() -> float:
+    """Process start to the first /healthz response, in ms."""
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", FIRST_RESPONSE_SCRIPT], cwd=ROOT, env=_env(), capture_output=True, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"first request failed:\n{proc.stderr[-2000:]}")
+    return elapsed
+
+
+def measure(module: str = "app.main") -> dict:
+    rows = import_times(module)
+    total_us = sum(self_us for _, self_us, _, _ in rows)
+    # Self time summed per distribution (fastapi, langchain_core, pydantic, ...), whoever imported it
+    by_package: Dict[str, int] = {}
+    for name, self_us, _, _ in rows:
+        root = name.split(".")[0]
+        by_package[root] = by_package.get(root, 0) + self_us
+    imported = {name for name, *_ in rows}
+    return {
+        "import_ms": total_us / 1000,
+        "slowest": sorted(by_package.items(), key=lambda row: -row[1]),
+        "deferred_imported": [m for m in DEFERRED_MODULES if m in imported],
+        "first_response_ms": first_response_ms(),
+    }
+
+
+def problems(result: dict, import_budget_ms: float = IMPORT_BUDGET_MS, first_response_budget_ms: float = FIRST_RESPONSE_BUDGET_MS) -> List[str]:
+    found = []
+    if result["deferred_imported"]:
+        found.append(f"imported at startup, should load on first use: {', '.join(result['deferred_imported'])}")
+    if result["import_ms"] > import_budget_ms:
+        found.append(f"import app.main took {result['import_ms']:.0f} ms (budget {import_budget_ms:.0f} ms)")
+    if result["first_response_ms"] > first_response_budget_ms:
+        found.append(f"first response after {result['first_response_ms']:.0f} ms (budget {first_response_budget_ms:.0f} ms)")
+    return found
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import-time and time-to-first-response budget for app.main")
+    parser.add_argument("--top", type=int, default=15, help="Slowest packages to list")
+    args = parser.parse_args()
+
+    result = measure()
+    print(f"{'self ms':>9}  package")
+    for name, self_us in result["slowest"][:args.top]:
+        print(f"{self_us / 1000:>9.1f}  {name}")
+    print(f"\nimport app.main     {result['import_ms']:>8.1f} ms  (budget {IMPORT_BUDGET_MS:.0f})")
+    print(f"first /healthz      {result['first_response_ms']:>8.1f} ms  (budget {FIRST_RESPONSE_BUDGET_MS:.0f})")
+
+    found = problems(result)
+    for problem in found:
+        print(f"FAIL: {problem}")
+    sys.exit(1 if found else 0)
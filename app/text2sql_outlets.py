@@ -1,27 +1,157 @@
 import sqlite3
+import os
+import json
+import hmac
+import base64
+import hashlib
+import secrets
+from typing import Iterator, Optional
 from app.llm_sql_generator import generate_sql_query, extract_sql_codeblock
+from app import sql_sandbox
+from app.sql_sandbox import SQLSandboxError
+from app.deadline import DeadlineExceeded
 
 DB_PATH = "data/outlets.db"
 
-def query_outlets_from_db(question: str):
-    sql_raw = generate_sql_query(question)
-    sql = extract_sql_codeblock(sql_raw)
+# Server-side caps: a page never returns more than MAX_LIMIT rows, a stream never more than STREAM_MAX_ROWS
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+STREAM_MAX_ROWS = 10000
+STREAM_TIMEOUT_S = 10.0
+
+# Cursors carry the generated SQL so later pages skip the LLM; they are signed so clients can't inject SQL.
+# Set OUTLETS_CURSOR_SECRET when running several workers so any worker accepts any cursor.
+_CURSOR_SECRET = os.environ.get("OUTLETS_CURSOR_SECRET", "").encode() or secrets.token_bytes(32)
+
+
+class InvalidCursor(ValueError):
+    pass
 
+
+def encode_cursor(sql: str, offset: int) -> str:
+    payload = base64.urlsafe_b64encode(json.dumps({"sql": sql, "offset": offset}).encode()).decode()
+    signature = hmac.new(_CURSOR_SECRET, payload.encode(), hashlib.sha256).hexdigest()[:32]
+    return f"{payload}.{signature}"
+
+
+def decode_cursor(cursor: str):
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute(sql)
-        rows = cursor.fetchall()
+        payload, signature = cursor.rsplit(".", 1)
+        expected = hmac.new(_CURSOR_SECRET, payload.encode(), hashlib.sha256).hexdigest()[:32]
+        if not hmac.compare_digest(signature, expected):
+            raise InvalidCursor("Cursor signature mismatch")
+        data = json.loads(base64.urlsafe_b64decode(payload.encode()))
+        return data["sql"], int(data["offset"])
+    except InvalidCursor:
+        raise
+    except Exception as e:
+        raise InvalidCursor(f"Malformed cursor: {e}")
+
+
+def clamp_limit(limit: Optional[int], cap: int = MAX_LIMIT) -> int:
+    if not limit or limit < 1:
+        return min(DEFAULT_LIMIT, cap)
+    return min(limit, cap)
+
+
+def _strip_sql(sql: str) -> str:
+    return sql.strip().rstrip(";").strip()
+
+
+def run_outlet_sql(sql: str, limit: Optional[int] = None, offset: int = 0) -> dict:
+    """Run one page of `sql` in the SQL sandbox (rewritten with LIMIT/OFFSET) and report the total row count."""
+    sql = _strip_sql(sql)
+    limit = clamp_limit(limit)
+    conn = None
+
+    try:
+        conn = sql_sandbox.connect(DB_PATH)
+        # Fetch one extra row to know whether another page exists
+        cursor = conn.guarded_execute(*sql_sandbox.limit_sql(sql, limit + 1, offset))
+        rows = conn.guarded_fetchall(cursor)
         columns = [description[0] for description in cursor.description]
 
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if has_more or offset:
+            total = conn.guarded_fetchone(conn.guarded_execute(f"SELECT COUNT(*) FROM ({sql})"))[0]
+        else:
+            total = len(rows)
+
         result = [
             {k: v for k, v in zip(columns, row) if k != "id"}
             for row in rows
         ]
-        return {"result": result}
+        return {
+            "result": result,
+            "total": total,
+            "limit": limit,
+            "next_cursor": encode_cursor(sql, offset + limit) if has_more else None,
+        }
+
+    except DeadlineExceeded:
+        raise  # /outlets and the outlet tool answer these themselves
+
+    except SQLSandboxError as e:
+        return {"error": str(e), "error_type": type(e).__name__}
 
     except Exception as e:
         return {"error": str(e)}
 
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
+
+
+def query_outlets_from_db(question: str, limit: Optional[int] = None, cursor: Optional[str] = None):
+    if cursor:
+        try:
+            sql, offset = decode_cursor(cursor)
+        except InvalidCursor as e:
+            return {"error": str(e)}
+        return run_outlet_sql(sql, limit, offset)
+
+    sql_raw = generate_sql_query(question)
+    sql = extract_sql_codeblock(sql_raw)
+    return run_outlet_sql(sql, limit)
+
+
+def stream_outlets_from_db(question: str, max_rows: int = STREAM_MAX_ROWS) -> Iterator[str]:
+    """
+    Yield NDJSON lines for every row of the generated query, reading the cursor lazily.
+
+    The connection is opened on first iteration and closed when the generator
+    finishes or is closed, so it is safe to hand to a StreamingResponse.
+    """
+    conn = None
+
+    try:
+        sql = _strip_sql(extract_sql_codeblock(generate_sql_query(question)))
+        # The response iterates this generator from a threadpool, one step at a time
+        conn = sql_sandbox.connect(DB_PATH, timeout_s=STREAM_TIMEOUT_S, check_same_thread=False)
+        cursor = conn.guarded_execute(*sql_sandbox.limit_sql(sql, max_rows + 1))
+        columns = [description[0] for description in cursor.description]
+
+        count = 0
+        while True:
+            try:
+                row = next(cursor, None)
+            except sqlite3.Error as e:
+                raise conn.translate_error(e) from e
+            if row is None:
+                break
+            if count >= max_rows:
+                yield json.dumps({"truncated": True, "max_rows": max_rows}) + "\n"
+                break
+            count += 1
+            yield json.dumps({k: v for k, v in zip(columns, row) if k != "id"}, ensure_ascii=False) + "\n"
+
+    except SQLSandboxError as e:
+        yield json.dumps({"error": str(e), "error_type": type(e).__name__}) + "\n"
+
+    except Exception as e:
+        yield json.dumps({"error": str(e)}) + "\n"
+
+    finally:
+        if conn is not None:
+            conn.close()
@@ -0,0 +1,176 @@
+"""
+Start-up warm-up and health probes.
+
+Each worker runs the warm-up once, in a background thread, right after it
+starts (after the pre-fork, so kernels, page faults and gRPC channels are its
+own):
+
+  * embedder       representative encodes (lazy kernel init, thread pools)
+  * vector_search  searches through the batcher, faulting in the mmapped index
+  * outlets_db     a query through the SQL sandbox
+  * llm            a tiny Gemini call (WARMUP_LLM=1; spends quota, optional)
+
+/healthz is liveness: the process answers. /readyz is 200 only once every
+required component warmed up, and reports each one's status and timing, so
+the load balancer sends traffic to warm workers only.
+
+A failed required check (say outlets.db briefly locked by an import) is
+retried with exponential backoff, up to WARMUP_MAX_ATTEMPTS. A worker that
+still fails after that will not get better by itself: /healthz turns 503 so
+the orchestrator restarts it instead of leaving it unready forever.
+"""
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("WARMUP_ENABLED", "1") == "1"
+WARMUP_LLM = os.getenv("WARMUP_LLM", "0") == "1"
+MAX_ATTEMPTS = int(os.getenv("WARMUP_MAX_ATTEMPTS", "5"))
+RETRY_BASE_S = float(os.getenv("WARMUP_RETRY_BASE_S", "1"))
+RETRY_MAX_S = float(os.getenv("WARMUP_RETRY_MAX_S", "30"))
+
+WARMUP_QUERIES = [
+    "Which tumblers are BPA free?",
+    "How much is the All Day Cup?",
+    "stainless steel mug 500ml",
+    "What colours does the OG cup come in?",
+]
+
+
+@dataclass
+class Check:
+    name: str
+    run: Callable[[], None]
+    required: bool = True
+
+
+class Readiness:
+    """Per-component warm-up status: pending, ok, failed or skipped."""
+
+    def __init__(self, checks: List[Check], clock: Callable[[], float] = time.perf_counter,
+                 max_attempts: int = MAX_ATTEMPTS, retry_base_s: float = RETRY_BASE_S, retry_max_s: float = RETRY_MAX_S,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.checks = checks
+        self._clock = clock
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base_s = retry_base_s
+        self.retry_max_s = retry_max_s
+        self._sleep = sleep
+        self.gave_up = False
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.components: Dict[str, dict] = {
+            check.name: {"status": "pending", "required": check.required} for check in checks
+        }
+        self.finished = False
+        self._thread: Optional[threading.Thread] = None
+
+    def _run_check(self, check: Check, attempt: int) -> bool:
+        start = self._clock()
+        try:
+            check.run()
+            status, error = "ok", None
+        except Exception as e:
+            logger.exception("Warm-up of %s failed (attempt %d)", check.name, attempt)
+            status, error = "failed", f"{type(e).__name__}: {e}"
+        duration_ms = round((self._clock() - start) * 1000, 1)
+        with self._lock:
+            self.components[check.name].update(status=status, duration_ms=duration_ms, error=error, attempts=attempt)
+        logger.info("Warm-up %s %s", check.name, status, extra={"duration_ms": duration_ms})
+        return status == "ok"
+
+    def run(self):
+        pending = list(self.checks)
+        attempt = 1
+        while True:
+            # Optional checks get one attempt; required ones are retried until they pass or we give up
+            pending = [check for check in pending if not self._run_check(check, attempt) and check.required]
+            if not pending or attempt >= self.max_attempts:
+                break
+            self._sleep(min(self.retry_max_s, self.retry_base_s * 2 ** (attempt - 1)))
+            attempt += 1
+        with self._lock:
+            self.finished = True
+            self.gave_up = bool(pending)
+        if pending:
+            logger.error("Warm-up gave up after %d attempts: %s", attempt, ", ".join(check.name for check in pending))
+
+    def start(self):
+        """Warm up in the background; /healthz answers meanwhile and /readyz says 503."""
+        self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+        self._thread.start()
+
+    def skip(self):
+        with self._lock:
+            for component in self.components.values():
+                component["status"] = "skipped"
+            self.finished = True
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            return self.finished and all(
+                c["status"] in ("ok", "skipped") for c in self.components.values() if c["required"]
+            )
+
+    @property
+    def healthy(self) -> bool:
+        """False once required checks kept failing after every retry: restart the worker."""
+        with self._lock:
+            return not self.gave_up
+
+    def report(self) -> dict:
+        with self._lock:
+            components = {name: dict(c) for name, c in self.components.items()}
+            finished = self.finished
+        return {
+            "ready": self.ready,
+            "warmup_finished": finished,
+            "uptime_s": round(time.time() - self.started, 1),
+            "pid": os.getpid(),
+            "components": components,
+        }
+
+
+# === Checks ===
+def warm_embedder():
+    from app.rag import load_store
+    load_store().model.encode(WARMUP_QUERIES)
+
+
+def warm_vector_search():
+    from app.rag import load_store
+    for query in WARMUP_QUERIES:
+        load_store().batcher.search(query, 3)
+
+
+def warm_outlets_db():
+    from app import sql_sandbox
+    from app.text2sql_outlets import DB_PATH
+    conn = sql_sandbox.connect(DB_PATH)
+    try:
+        conn.guarded_execute("SELECT COUNT(*) FROM outlets").fetchone()
+    finally:
+        conn.close()
+
+
+def warm_llm():
+    from app.llm_clients import get_llm
+    get_llm("summary").invoke("Reply with OK.")
+
+
+def default_checks() -> List[Check]:
+    checks = [
+        Check("embedder", warm_embedder),
+        Check("vector_search", warm_vector_search),
+        Check("outlets_db", warm_outlets_db),
+    ]
+    if WARMUP_LLM:
+        # Gemini being slow or rate limited should not take the worker out of rotation
+        checks.append(Check("llm", warm_llm, required=False))
+    return checks
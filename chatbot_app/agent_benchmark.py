@@ -0,0 +1,91 @@
+"""
+ReAct vs native function calling on the same questions.
+
+    python -m chatbot_app.agent_benchmark [--modes react tools] [--rounds 1]
+
+For every question and agent mode, reports LLM calls, prompt tokens and
+wall-clock time. Needs GOOGLE_API_KEY and the local data (FAISS index,
+outlets.db); each turn uses a fresh chatbot so memory doesn't carry over.
+"""
+import statistics
+import time
+from typing import Any, Dict, List
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+BENCH_QUESTIONS = [
+    "What is the price of the All Day Cup and is there an outlet in Bangsar?",
+    "What is 23 * 47?",
+    "Which tumblers are BPA free?",
+    "How many outlets are in Shah Alam, and which ones are open 24 hours?",
+    "Do you sell stainless steel bottles, and what is 12% of RM79?",
+]
+
+
+class LLMUsageCounter(BaseCallbackHandler):
+    """Counts chat-model calls and the prompt tokens Gemini reports for them."""
+
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[list], **kwargs: Any):
+        self.calls += 1
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any):
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                self.prompt_tokens += usage.get("input_tokens", 0)
+
+
+def run_question(mode: str, question: str) -> dict:
+    from app.llm_clients import get_llm
+    from chatbot_app.chatbot_part4 import MindhiveChatbot
+
+    counter = LLMUsageCounter()
+    llm = get_llm("agent").model_copy(update={"callbacks": [counter]})
+    bot = MindhiveChatbot(llm=llm, agent_mode=mode)
+
+    start = time.perf_counter()
+    result = bot.respond(question)
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "question": question,
+        "llm_calls": counter.calls,
+        "prompt_tokens": counter.prompt_tokens,
+        "seconds": elapsed,
+        "partial": result["partial"],
+    }
+
+
+def run_benchmark(modes: List[str], rounds: int = 1) -> List[dict]:
+    return [run_question(mode, question) for _ in range(rounds) for question in BENCH_QUESTIONS for mode in modes]
+
+
+def print_report(rows: List[dict], modes: List[str]):
+    print(f"{'mode':<6} {'calls':>5} {'prompt tok':>10} {'seconds':>8}  question")
+    for row in rows:
+        flag = " (partial)" if row["partial"] else ""
+        print(f"{row['mode']:<6} {row['llm_calls']:>5} {row['prompt_tokens']:>10} {row['seconds']:>8.2f}  {row['question'][:60]}{flag}")
+
+    print("\nMean per question")
+    for mode in modes:
+        own = [row for row in rows if row["mode"] == mode]
+        print(
+            f"{mode:<6} {statistics.mean(r['llm_calls'] for r in own):>5.1f} "
+            f"{statistics.mean(r['prompt_tokens'] for r in own):>10.0f} "
+            f"{statistics.mean(r['seconds'] for r in own):>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark ReAct vs function-calling agent modes")
+    parser.add_argument("--modes", nargs="+", default=["react", "tools"])
+    parser.add_argument("--rounds", type=int, default=1)
+    args = parser.parse_args()
+    print_report(run_benchmark(args.modes, args.rounds), args.modes)
@@ -0,0 +1,79 @@
+import json
+import os
+from typing import Iterator, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# === Settings ===
+BASE_URL = os.getenv("CHATBOT_API_URL", "http://127.0.0.1:8000")
+CONNECT_TIMEOUT_S = float(os.getenv("CHATBOT_API_CONNECT_TIMEOUT_S", "3.05"))
+READ_TIMEOUT_S = float(os.getenv("CHATBOT_API_READ_TIMEOUT_S", "60"))  # an agent turn can take several LLM calls
+POOL_SIZE = int(os.getenv("CHATBOT_API_POOL_SIZE", "10"))
+
+
+class ChatbotAPIError(Exception):
+    """The backend could not be reached or returned an error."""
+
+
+class ChatbotClient:
+    """
+    HTTP client for the FastAPI /chatbot endpoints.
+
+    One keep-alive requests.Session with a bounded connection pool is shared
+    by every UI session in the process. Only connection failures are
+    retried: a POST that reached the server may already have run the agent.
+    """
+
+    def __init__(
+        self,
+        base_url: str = BASE_URL,
+        timeout: Tuple[float, float] = (CONNECT_TIMEOUT_S, READ_TIMEOUT_S),
+        pool_size: int = POOL_SIZE,
+        session: Optional[requests.Session] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        retry = Retry(total=None, connect=2, read=0, redirect=0, status=0, other=0, backoff_factor=0.2)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def chat(self, question: str, session_id: Optional[str] = None) -> str:
+        try:
+            response = self.session.post(
+                f"{self.base_url}/chatbot",
+                json={"question": question, "session_id": session_id},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            data = response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise ChatbotAPIError(f"Chatbot backend unavailable: {e}") from e
+        if "error" in data:
+            raise ChatbotAPIError(data["error"])
+        return data.get("answer", "")
+
+    def stream_chat(self, question: str, session_id: Optional[str] = None) -> Iterator[dict]:
+        """Events from /chatbot/stream; falls back to a single answer event on servers without it."""
+        try:
+            with self.session.post(
+                f"{self.base_url}/chatbot/stream",
+                json={"question": question, "session_id": session_id},
+                timeout=self.timeout,
+                stream=True,
+            ) as response:
+                if response.status_code in (404, 405):
+                    yield {"type": "answer", "answer": self.chat(question, session_id)}
+                    return
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if line:
+                        yield json.loads(line)
+        except (requests.RequestException, ValueError) as e:
+            raise ChatbotAPIError(f"Chatbot backend unavailable: {e}") from e
+
+    def close(self):
+        self.session.close()
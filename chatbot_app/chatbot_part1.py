@@ -1,10 +1,10 @@
 import os
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.memory import ConversationBufferMemory
 from langchain.chains import LLMChain
 from langchain_core.prompts import PromptTemplate
 from langchain_core.language_models import BaseChatModel # Import for type hinting of LLM
+from app.llm_clients import get_llm
 
 # Load environment variables (like GOOGLE_API_KEY)
 load_dotenv()
@@ -14,7 +14,7 @@ class MindhiveChatbot:
         # Initialize the LLM (Large Language Model)
         # If an LLM is provided, use it. Otherwise, create a default one.
         if llm is None:
-            self.llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.7)
+            self.llm = get_llm("chat")
         else:
             self.llm = llm # Use the provided LLM (e.g., a mock)
 
@@ -1,13 +1,15 @@
 import os
 from dotenv import load_dotenv
 
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.memory import ConversationBufferMemory
 from langchain.prompts import PromptTemplate
 from langchain.agents import create_react_agent, AgentExecutor
 from langchain.tools import Tool
 from langchain_core.language_models import BaseChatModel
 
+from app.logging_setup import AGENT_VERBOSE
+from app.llm_clients import get_llm
+
 # Import your tools
 from chatbot_app.tools.calculator import calculate
 from chatbot_app.tools.rag_placeholder import zus_info_retriever
@@ -18,7 +20,7 @@ load_dotenv()
 class MindhiveChatbot:
     def __init__(self, llm: BaseChatModel = None, memory_obj: ConversationBufferMemory = None):
         # Init LLM
-        self.llm = llm or ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.3)
+        self.llm = llm or get_llm("planner")
 
         # Init Memory
         self.memory = memory_obj or ConversationBufferMemory(
@@ -124,7 +126,7 @@ User question: {input}
             agent=self.agent,
             tools=self.tools,
             memory=self.memory,
-            verbose=True,
+            verbose=AGENT_VERBOSE,
             handle_parsing_errors=True,
             agent_kwargs={
                 "tool_names": tool_names,
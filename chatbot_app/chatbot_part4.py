@@ -1,28 +1,39 @@
+import logging
 import os
+from typing import Iterator
 from dotenv import load_dotenv
 
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.memory import ConversationBufferMemory
 from langchain.prompts import PromptTemplate
 from langchain.agents import create_react_agent, AgentExecutor
 from langchain_core.tools import Tool
 from langchain_core.language_models import BaseChatModel
 
-import requests
+from app.deadline import DeadlineExceeded, bounded_timeout
+from app.llm_clients import get_llm
+from app.logging_setup import AGENT_VERBOSE
 
 # Import your tools
 from chatbot_app.tools.calculator import calculate
 from chatbot_app.tools.products import rag_tool
 from chatbot_app.tools.outlets import outlet_tool
+from chatbot_app.tool_agent import ToolCallingAgent
 
 load_dotenv()
 
-BASE_URL = "http://127.0.0.1:8000"
+logger = logging.getLogger(__name__)
+
+# A confused ReAct loop stops here even when the request deadline is still far away
+MAX_AGENT_ITERATIONS = 6
+
+# "react" (text ReAct prompt) or "tools" (native function calling, parallel tool calls)
+AGENT_MODE = os.getenv("CHATBOT_AGENT_MODE", "react")
 
 class MindhiveChatbot:
-    def __init__(self, llm: BaseChatModel = None, memory_obj: ConversationBufferMemory = None):
+    def __init__(self, llm: BaseChatModel = None, memory_obj: ConversationBufferMemory = None, agent_mode: str = AGENT_MODE):
         # Init LLM
-        self.llm = llm or ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.2)
+        # First agent steps of identical questions collapse when SINGLE_FLIGHT_MAX_TEMPERATURE >= 0.2
+        self.llm = llm or get_llm("agent")
 
         # Init Memory
         self.memory = memory_obj or ConversationBufferMemory(
@@ -159,8 +170,9 @@ User question: {input}
             agent=self.agent,
             tools=self.tools,
             memory=self.memory,
-            verbose=True,
-            return_intermediate_steps=True, 
+            verbose=AGENT_VERBOSE,
+            return_intermediate_steps=True,
+            max_iterations=MAX_AGENT_ITERATIONS,
             handle_parsing_errors=True,
             agent_kwargs={
                 "tool_names": tool_names,
@@ -174,25 +186,80 @@ User question: {input}
             return_messages=False
         )
 
+        # Function-calling mode: the structured tools' pydantic schemas replace the format instructions above
+        self.agent_mode = agent_mode
+        if agent_mode == "tools":
+            self.tool_agent = ToolCallingAgent(self.llm, [calculate, rag_tool, outlet_tool])
+        elif agent_mode != "react":
+            raise ValueError(f"Unknown CHATBOT_AGENT_MODE '{agent_mode}' (expected react or tools)")
+
     def chat_4(self, user_input: str) -> str:
+        return self.respond(user_input)["answer"]
+
+    def respond(self, user_input: str) -> dict:
+        """One turn as {"answer": ..., "partial": bool}; partial answers were cut short by the deadline or step limit."""
+        result = {"answer": "Sorry, the agent couldn't complete the task.", "partial": True}
+        for event in self.stream_4(user_input):
+            if event["type"] == "answer":
+                result = {"answer": event["answer"], "partial": event["partial"]}
+        return result
+
+    def stream_4(self, user_input: str) -> Iterator[dict]:
+        """Same turn as respond(), as events: {"type": "tool", ...} per tool call, then {"type": "answer", ...}."""
+        if self.agent_mode == "tools":
+            yield from self._stream_tool_agent(user_input)
+            return
+
+        steps = []
+        # Whatever is left of the request deadline (app.deadline) bounds the whole agent loop
+        self.agent_executor.max_execution_time = bounded_timeout(None)
         try:
-            response = self.agent_executor.invoke({"input": user_input})
-            output = response.get("output", "").strip()
+            for chunk in self.agent_executor.stream({"input": user_input}):
+                for action in chunk.get("actions", []):
+                    yield {"type": "tool", "tool": action.tool, "input": str(action.tool_input)}
+                steps += [(step.action, step.observation) for step in chunk.get("steps", [])]
+                if "output" in chunk:
+                    partial = "Agent stopped" in chunk["output"]
+                    yield {"type": "answer", "answer": self._final_answer(chunk), "partial": partial}
+                    return
+
+        except DeadlineExceeded as e:
+            logger.warning("Deadline reached during chat: %s", e)
+            answer = self._last_observation(steps) or "Sorry, that took too long. Please try again or ask something more specific."
+            yield {"type": "answer", "answer": answer, "partial": True}
+
+        except Exception:
+            logger.exception("Error during chat")
+            yield {"type": "answer", "answer": "Sorry, something went wrong. Try again.", "partial": False}
+
+    def _stream_tool_agent(self, user_input: str) -> Iterator[dict]:
+        memory = self.agent_executor.memory  # the conversation memory the ReAct executor would use
+        try:
+            for event in self.tool_agent.stream(user_input, history=memory.chat_memory.messages):
+                if event["type"] == "answer":
+                    memory.save_context({"input": user_input}, {"output": event["answer"]})
+                yield event
+
+        except Exception:
+            logger.exception("Error during chat")
+            yield {"type": "answer", "answer": "Sorry, something went wrong. Try again.", "partial": False}
+
+    def _final_answer(self, response: dict) -> str:
+        output = response.get("output", "").strip()
 
         # If final output is empty or contains common agent failure messages
-            if not output or "Agent stopped" in output or "try again" in output.lower():
-                steps = response.get("intermediate_steps", [])
-                # Loop backwards through steps to find last meaningful observation
-                for action, observation in reversed(steps):
-                    if isinstance(observation, str) and len(observation.strip()) > 30:
-                        return observation.strip()
-                return output or "Sorry, the agent couldn't complete the task."
-        
-            return output
-
-        except Exception as e:
-            print(f"Error during chat: {e}")
-            return "Sorry, something went wrong. Try again."
+        if not output or "Agent stopped" in output or "try again" in output.lower():
+            return self._last_observation(response.get("intermediate_steps", [])) or output or "Sorry, the agent couldn't complete the task."
+
+        return output
+
+    @staticmethod
+    def _last_observation(steps) -> str:
+        # Loop backwards through steps to find last meaningful observation
+        for action, observation in reversed(steps):
+            if isinstance(observation, str) and len(observation.strip()) > 30:
+                return observation.strip()
+        return ""
 
 # CLI testing
 if __name__ == "__main__":
@@ -0,0 +1,354 @@
+"""
+Conversation suite: the tests/test_part1-5 scenarios as data, run in parallel.
+
+    python -m chatbot_app.conversation_suite [--llm live|record|replay] [--workers 4]
+                                             [--only part4] [--report reports/conversation_suite.json]
+
+Scenarios live in tests/scenarios/conversations.json. Each one is a
+conversation with one chatbot (part1 .. part4) or direct calls to one tool.
+Every turn checks its answer against keywords (`expect_all`, `expect_any`)
+and, optionally, the tools it had to use (`expect_tools`). Scenarios are
+independent, so they are spread over a process pool.
+
+LLM responses come from:
+
+  * live    Gemini, through the usual app.llm_clients registry;
+  * record  Gemini, and every response is saved to --recordings;
+  * replay  the saved responses only; no API key or network is needed, and a
+            prompt that was never recorded fails its scenario.
+
+The report has per-scenario pass/fail, per-turn latency, LLM calls and tool
+usage, plus a summary to compare runs.
+"""
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+SCENARIOS_PATH = os.path.join("tests", "scenarios", "conversations.json")
+RECORDINGS_PATH = os.path.join("tests", "scenarios", "recordings.json")
+REPORT_PATH = os.path.join("reports", "conversation_suite.json")
+LLM_MODES = ("live", "record", "replay")
+
+# Per-call kwargs that don't change the answer (the deadline timeout) or whose
+# format depends on the provider (tool schemas, keyed by name via bind_tools)
+_UNKEYED_KWARGS = {"timeout", "tools", "tool_config", "tool_choice", "functions", "cassette_tools"}
+
+
+# === Recorded LLM responses ===
+class UnrecordedPrompt(LookupError):
+    pass
+
+
+class Cassette:
+    """Recorded responses by prompt key; `new` holds what this process recorded since the last take_new()."""
+
+    def __init__(self, entries: Optional[Dict[str, dict]] = None):
+        self.entries = dict(entries or {})
+        self.new: Dict[str, dict] = {}
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls(json.load(f))
+        except FileNotFoundError:
+            return cls()
+
+    @staticmethod
+    def key(messages: List[BaseMessage], stop: Optional[List[str]], temperature: Optional[float], tools: List[str], kwargs: dict) -> str:
+        payload = {
+            "messages": [
+                (m.type, m.content, getattr(m, "tool_calls", None), getattr(m, "tool_call_id", None)) for m in messages
+            ],
+            "stop": stop,
+            "temperature": temperature,
+            "tools": tools,
+            "kwargs": {k: v for k, v in kwargs.items() if k not in _UNKEYED_KWARGS},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[BaseMessage]:
+        entry = self.entries.get(key)
+        return messages_from_dict([entry])[0] if entry is not None else None
+
+    def put(self, key: str, message: BaseMessage):
+        self.entries[key] = self.new[key] = message_to_dict(message)
+
+    def take_new(self) -> Dict[str, dict]:
+        new, self.new = self.new, {}
+        return new
+
+
+class CassetteChatModel(BaseChatModel):
+    """
+    Base model for the LLM registry in record/replay runs.
+
+    The registry copies it per role with that role's temperature, like the
+    Gemini model it stands in for; all copies share one Cassette.
+    """
+
+    cassette: Any
+    mode: str = "replay"
+    inner: Optional[BaseChatModel] = None
+    model: str = "cassette"
+    temperature: Optional[float] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return f"cassette-{self.mode}"
+
+    def bind_tools(self, tools, **kwargs):
+        from langchain_core.utils.function_calling import convert_to_openai_tool
+        names = sorted(convert_to_openai_tool(t)["function"]["name"] for t in tools)
+        bound = self.inner.bind_tools(tools, **kwargs).kwargs if self.inner is not None else {}
+        return self.bind(**bound, cassette_tools=names)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tools = kwargs.pop("cassette_tools", [])
+        key = Cassette.key(messages, stop, self.temperature, tools, kwargs)
+        if self.mode == "replay":
+            message = self.cassette.get(key)
+            if message is None:
+                self.cassette.misses += 1
+                raise UnrecordedPrompt(f"No recorded response for prompt {key[:12]}")
+            return ChatResult(generations=[ChatGeneration(message=message)])
+
+        inner = self.inner.model_copy(update={"temperature": self.temperature}) if self.temperature is not None else self.inner
+        result = inner._generate(messages, stop=stop, **kwargs)
+        if self.mode == "record":
+            self.cassette.put(key, result.generations[0].message)
+        return result
+
+
+# === Worker process ===
+_cassette: Optional[Cassette] = None
+
+
+def configure_llm(mode: str, recordings_path: str = RECORDINGS_PATH, workers: int = 1,
+                  inner_factory: Optional[Callable[[], BaseChatModel]] = None):
+    """Point app.llm_clients at live Gemini or at the cassette, in this process."""
+    global _cassette
+    from app import llm_clients
+
+    if mode not in LLM_MODES:
+        raise ValueError(f"Unknown LLM mode '{mode}' (expected one of {', '.join(LLM_MODES)})")
+    if mode == "live" and inner_factory is None:
+        llm_clients.registry.reset(share=workers)  # the pool shares the quota like pre-forked workers
+        return
+
+    _cassette = Cassette.load(recordings_path) if mode == "replay" else Cassette()
+    inner_factory = inner_factory or llm_clients._gemini
+
+    def factory():
+        inner = inner_factory() if mode != "replay" else None
+        return CassetteChatModel(cassette=_cassette, mode=mode, inner=inner)
+
+    rpm = 0 if mode == "replay" else llm_clients.RATE_LIMIT_RPM / max(workers, 1)
+    llm_clients.registry = llm_clients.LLMRegistry(factory=factory, rpm=rpm)
+
+
+def _tools() -> Dict[str, Any]:
+    from chatbot_app.tools.calculator import calculate
+    from chatbot_app.tools.outlets import outlet_tool
+    from chatbot_app.tools.products import rag_tool
+    from chatbot_app.tools.rag_placeholder import zus_info_retriever
+    return {t.name: t for t in (calculate, outlet_tool, rag_tool, zus_info_retriever)}
+
+
+def conversation(scenario: dict) -> Callable[[str], str]:
+    """One fresh chatbot (or tool) per scenario; the returned function runs one turn."""
+    target = scenario["target"]
+    if target == "part1":
+        from chatbot_app.chatbot_part1 import MindhiveChatbot
+        return MindhiveChatbot().chat
+    if target == "part2":
+        from chatbot_app.chatbot_part2 import MindhiveChatbot
+        return MindhiveChatbot().chat_2
+    if target == "part3":
+        from chatbot_app.chatbot_part3 import MindhiveChatbot
+        return MindhiveChatbot().chat_3
+    if target == "part4":
+        from chatbot_app.chatbot_part4 import AGENT_MODE, MindhiveChatbot
+        bot = MindhiveChatbot(agent_mode=scenario.get("agent_mode", AGENT_MODE))
+        return lambda text: bot.respond(text)["answer"]
+    if target == "tool":
+        tool = _tools()[scenario["tool"]]
+        arg = next(iter(tool.args))
+        return lambda text: str(tool.invoke({arg: text}))
+    raise ValueError(f"Unknown scenario target '{target}'")
+
+
+def _walk(runs) -> Counter:
+    usage = Counter()
+    for run in runs:
+        if run.run_type == "llm":
+            usage["__llm__"] += 1
+        elif run.run_type == "tool":
+            usage[run.name] += 1
+        usage.update(_walk(run.child_runs))
+    return usage
+
+
+def check_turn(turn: dict, answer: str, tools: List[str]) -> List[str]:
+    """Why a turn failed; empty when it passed."""
+    lowered = answer.lower()
+    failures = [f"missing '{k}'" for k in turn.get("expect_all", []) if k.lower() not in lowered]
+    expect_any = turn.get("expect_any", [])
+    if expect_any and not any(k.lower() in lowered for k in expect_any):
+        failures.append(f"none of {expect_any}")
+    failures += [f"tool '{t}' not used" for t in turn.get("expect_tools", []) if t not in tools]
+    return failures
+
+
+def run_scenario(scenario: dict) -> dict:
+    from langchain_core.tracers.context import collect_runs
+
+    result = {"id": scenario["id"], "target": scenario["target"], "turns": [], "error": None}
+    misses_before = _cassette.misses if _cassette else 0
+    try:
+        turn_fn = conversation(scenario)
+        for turn in scenario["turns"]:
+            start = time.perf_counter()
+            with collect_runs() as collector:
+                answer = turn_fn(turn["user"])
+            latency_ms = (time.perf_counter() - start) * 1000
+            usage = _walk(collector.traced_runs)
+            llm_calls = usage.pop("__llm__", 0)
+            tools = sorted(usage.elements())
+            failures = check_turn(turn, answer, tools)
+            result["turns"].append({
+                "user": turn["user"],
+                "answer": answer,
+                "passed": not failures,
+                "failures": failures,
+                "latency_ms": round(latency_ms, 1),
+                "llm_calls": llm_calls,
+                "tools": tools,
+            })
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+
+    unrecorded = (_cassette.misses if _cassette else 0) - misses_before
+    if unrecorded and not result["error"]:
+        # Chatbots turn LLM errors into apology answers; name the real cause
+        result["error"] = f"{unrecorded} LLM prompt(s) had no recording"
+    result["passed"] = result["error"] is None and all(t["passed"] for t in result["turns"])
+    result["latency_ms"] = round(sum(t["latency_ms"] for t in result["turns"]), 1)
+    result["llm_calls"] = sum(t["llm_calls"] for t in result["turns"])
+    result["recorded"] = _cassette.take_new() if _cassette else {}
+    return result
+
+
+# === Suite ===
+def load_scenarios(path: str = SCENARIOS_PATH, only: Optional[str] = None) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        scenarios = json.load(f)["scenarios"]
+    return [s for s in scenarios if not only or s["id"].startswith(only)]
+
+
+def summarize(results: List[dict]) -> dict:
+    latencies = sorted(t["latency_ms"] for r in results for t in r["turns"])
+    tool_usage = Counter(tool for r in results for t in r["turns"] for tool in t["tools"])
+    passed = sum(r["passed"] for r in results)
+    return {
+        "scenarios": len(results),
+        "passed": passed,
+        "pass_rate": passed / len(results) if results else 0.0,
+        "errors": sum(r["error"] is not None for r in results),
+        "turns": len(latencies),
+        "turn_latency_ms": {
+            "p50": statistics.median(latencies) if latencies else 0.0,
+            "p95": latencies[max(0, int(len(latencies) * 0.95) - 1)] if latencies else 0.0,
+            "max": latencies[-1] if latencies else 0.0,
+        },
+        "llm_calls": sum(r["llm_calls"] for r in results),
+        "tool_usage": dict(tool_usage.most_common()),
+    }
+
+
+def run_suite(scenarios: List[dict], llm: str = "replay", workers: int = 4, recordings_path: str = RECORDINGS_PATH) -> dict:
+    """Run every scenario (in-process when workers == 0) and build the report; record mode updates the recordings."""
+    start = time.perf_counter()
+    if workers <= 0:
+        configure_llm(llm, recordings_path)
+        results = [run_scenario(s) for s in scenarios]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=configure_llm, initargs=(llm, recordings_path, workers)) as pool:
+            results = list(pool.map(run_scenario, scenarios))
+
+    recorded = {}
+    for result in results:
+        recorded.update(result.pop("recorded"))
+    if llm == "record" and recorded:
+        cassette = Cassette.load(recordings_path)
+        cassette.entries.update(recorded)
+        os.makedirs(os.path.dirname(recordings_path) or ".", exist_ok=True)
+        with open(recordings_path, "w", encoding="utf-8") as f:
+            json.dump(cassette.entries, f, indent=1, sort_keys=True)
+
+    return {
+        "started": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "llm": llm,
+        "workers": workers,
+        "wall_s": round(time.perf_counter() - start, 2),
+        "summary": summarize(results),
+        "scenarios": results,
+    }
+
+
+def print_report(report: dict):
+    print(f"{'result':<6} {'ms':>8} {'llm':>4}  scenario")
+    for r in report["scenarios"]:
+        status = "PASS" if r["passed"] else ("ERROR" if r["error"] else "FAIL")
+        print(f"{status:<6} {r['latency_ms']:>8.0f} {r['llm_calls']:>4}  {r['id']}")
+        if r["error"]:
+            print(f"{'':<20}{r['error']}")
+        for t in r["turns"]:
+            if not t["passed"]:
+                print(f"{'':<20}{t['user'][:40]!r}: {'; '.join(t['failures'])}")
+
+    s = report["summary"]
+    print(
+        f"\n{s['passed']}/{s['scenarios']} passed ({s['pass_rate']:.0%}), {s['turns']} turns, "
+        f"turn p50 {s['turn_latency_ms']['p50']:.0f} ms / p95 {s['turn_latency_ms']['p95']:.0f} ms, "
+        f"{s['llm_calls']} LLM calls, {report['wall_s']} s wall with {report['workers']} workers ({report['llm']})"
+    )
+    if s["tool_usage"]:
+        print("tools: " + ", ".join(f"{name} x{count}" for name, count in s["tool_usage"].items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the conversation scenarios in parallel and report pass rate and latency")
+    parser.add_argument("--llm", choices=LLM_MODES, default="replay")
+    parser.add_argument("--workers", type=int, default=4, help="Processes; 0 runs in this process")
+    parser.add_argument("--scenarios", default=SCENARIOS_PATH)
+    parser.add_argument("--recordings", default=RECORDINGS_PATH)
+    parser.add_argument("--only", help="Run scenarios whose id starts with this, e.g. part4")
+    parser.add_argument("--report", default=REPORT_PATH, help="Where to write the JSON report")
+    args = parser.parse_args()
+
+    report = run_suite(load_scenarios(args.scenarios, args.only), llm=args.llm, workers=args.workers, recordings_path=args.recordings)
+    os.makedirs(os.path.dirname(args.report) or ".", exist_ok=True)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print_report(report)
+    print(f"\nReport written to {args.report}")
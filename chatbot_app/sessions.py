@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, Optional
+
+# === Settings ===
+MAX_SESSIONS = int(os.getenv("CHATBOT_MAX_SESSIONS", "200"))
+SESSION_IDLE_TTL_S = float(os.getenv("CHATBOT_SESSION_IDLE_TTL_S", "1800"))
+
+
+class ChatSession:
+    """One user's chatbot (agent executor + memory) and the lock that serialises its turns."""
+
+    def __init__(self, chatbot, now: float):
+        self.chatbot = chatbot
+        self.lock = threading.Lock()
+        self.created = now
+        self.last_used = now
+
+
+class SessionPool:
+    """
+    Per-session chatbot state, bounded in size and evicted when idle.
+
+    `factory(session_id)` builds a fresh chatbot that owns its memory and
+    executor but reuses the process-wide LLM client and retrieval engine.
+    Sessions unused for `idle_ttl` seconds are dropped; when `max_sessions`
+    are live the least recently used one is dropped to make room.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[str], object],
+        max_sessions: int = MAX_SESSIONS,
+        idle_ttl: float = SESSION_IDLE_TTL_S,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.factory = factory
+        self.max_sessions = max(1, max_sessions)
+        self.idle_ttl = idle_ttl
+        self.clock = clock
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def get(self, session_id: str) -> ChatSession:
+        with self._lock:
+            now = self.clock()
+            self._evict_idle(now)
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_used = now
+                self._sessions.move_to_end(session_id)
+                return session
+            while len(self._sessions) >= self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted += 1
+
+        # Build outside the pool lock so one slow construction doesn't block other users
+        session = ChatSession(self.factory(session_id), now)
+        with self._lock:
+            existing = self._sessions.get(session_id)
+            if existing is not None:
+                return existing
+            self._sessions[session_id] = session
+            return session
+
+    def chat(self, session_id: str, message: str, method: str = "chat_4") -> str:
+        session = self.get(session_id)
+        with session.lock:
+            reply = getattr(session.chatbot, method)(message)
+        session.last_used = self.clock()
+        return reply
+
+    def stream(self, session_id: str, message: str, method: str = "stream_4") -> Iterator[dict]:
+        """Like chat(), for generator methods; the session stays locked until the stream ends."""
+        session = self.get(session_id)
+        with session.lock:
+            yield from getattr(session.chatbot, method)(message)
+        session.last_used = self.clock()
+
+    def drop(self, session_id: str) -> Optional[ChatSession]:
+        with self._lock:
+            return self._sessions.pop(session_id, None)
+
+    def _evict_idle(self, now: float):
+        # Oldest first, so stop at the first session that is still fresh
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_used < self.idle_ttl:
+                break
+            del self._sessions[session_id]
+            self.evicted += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"live_sessions": len(self._sessions), "max_sessions": self.max_sessions, "evicted": self.evicted}
@@ -0,0 +1,103 @@
+import contextvars
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Sequence
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.tools import BaseTool
+
+from app.deadline import DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+# === Settings ===
+MAX_ITERATIONS = 6
+MAX_PARALLEL_TOOLS = int(os.getenv("AGENT_MAX_PARALLEL_TOOLS", "4"))
+
+SYSTEM_PROMPT = """You are a helpful and knowledgeable assistant for ZUS Coffee.
+
+Use the tools for facts: product_search_tool for drinkware (materials, sizes, prices, variations),
+outlet_search_tool for outlet locations, opening hours and services, Calculator for arithmetic.
+When a question has independent parts, call all the tools you need at once.
+If the user's intent is unclear (which product, which outlet or area), ask one short clarifying
+question instead of calling a tool. Answer concisely from the tool results."""
+
+
+def message_text(content) -> str:
+    """Text of a message whose content may be a list of parts."""
+    if isinstance(content, list):
+        return "".join(part if isinstance(part, str) else part.get("text", "") for part in content).strip()
+    return (content or "").strip()
+
+
+class ToolCallingAgent:
+    """
+    Agent loop on the model's native tool calling instead of a text ReAct prompt.
+
+    Tools are described by their pydantic args schemas, so no format
+    instructions or output parsing are needed. Each step is one LLM call;
+    when it requests several tools they run concurrently, each in a copy of
+    the caller's context so the request deadline still applies.
+    """
+
+    def __init__(
+        self,
+        llm: BaseChatModel,
+        tools: Sequence[BaseTool],
+        system_prompt: str = SYSTEM_PROMPT,
+        max_iterations: int = MAX_ITERATIONS,
+        max_workers: int = MAX_PARALLEL_TOOLS,
+    ):
+        self.tools = {tool.name: tool for tool in tools}
+        self.llm = llm.bind_tools(list(tools))
+        self.system_prompt = system_prompt
+        self.max_iterations = max_iterations
+        self.max_workers = max_workers
+
+    def stream(self, user_input: str, history: Sequence[BaseMessage] = ()) -> Iterator[dict]:
+        """Events as MindhiveChatbot.stream_4: {"type": "tool", ...} per call, then {"type": "answer", ...}."""
+        messages: List[BaseMessage] = [SystemMessage(content=self.system_prompt), *history, HumanMessage(content=user_input)]
+        observations: List[str] = []
+        try:
+            for _ in range(self.max_iterations):
+                reply = self.llm.invoke(messages)
+                messages.append(reply)
+                if not reply.tool_calls:
+                    yield {"type": "answer", "answer": message_text(reply.content), "partial": False}
+                    return
+
+                for call in reply.tool_calls:
+                    yield {"type": "tool", "tool": call["name"], "input": json.dumps(call["args"])}
+                for call, result in zip(reply.tool_calls, self.run_tools(reply.tool_calls)):
+                    messages.append(ToolMessage(content=result, tool_call_id=call["id"]))
+                    observations.append(result)
+
+        except DeadlineExceeded as e:
+            logger.warning("Deadline reached during chat: %s", e)
+
+        # Out of steps or time: fall back to the last useful tool output
+        useful = [o for o in observations if len(o.strip()) > 30]
+        answer = useful[-1].strip() if useful else "Sorry, that took too long. Please try again or ask something more specific."
+        yield {"type": "answer", "answer": answer, "partial": True}
+
+    def run_tools(self, calls: List[dict]) -> List[str]:
+        if len(calls) == 1:
+            return [self._run_tool(calls[0])]
+        with ThreadPoolExecutor(max_workers=min(len(calls), self.max_workers)) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, self._run_tool, call) for call in calls]
+            return [future.result() for future in futures]
+
+    def _run_tool(self, call: dict) -> str:
+        tool = self.tools.get(call["name"])
+        if tool is None:
+            return f"Error: unknown tool '{call['name']}'. Available tools: {', '.join(self.tools)}"
+        try:
+            return str(tool.invoke(call["args"]))
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            # Bad arguments go back to the model, which can retry with corrected ones
+            return f"Error: {e}"
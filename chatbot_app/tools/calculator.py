@@ -1,6 +1,7 @@
 # calculator.py
 from pydantic import BaseModel, Field
 from langchain.tools import tool
+from app.deadline import check_deadline
 
 class CalculatorTool(BaseModel):
     expression: str = Field(..., description="Mathematical expression to evaluate")
@@ -8,6 +9,7 @@ class CalculatorTool(BaseModel):
 @tool("Calculator", args_schema=CalculatorTool)
 def calculate(expression: str) -> str:
     """Evaluates a math expression like '2 + 3'."""
+    check_deadline("Calculator")
     if not expression or expression.strip() == "":
         return "Error: No expression provided. Please enter a valid mathematical expression."
 
@@ -4,10 +4,18 @@ import logging
 from typing import Optional
 
 from app.llm_sql_generator import generate_sql_query, extract_sql_codeblock
-from app.text2sql_outlets import query_outlets_from_db
+from app.text2sql_outlets import run_outlet_sql
+from app.outlet_geo import NEAREST_PATTERN, find_place, is_proximity_query, nearest_outlets
+from app.outlet_hours import is_hours_query, mentioned_outlet, names_an_outlet, open_outlets
+from app.deadline import DeadlineExceeded, check_deadline
+from app.logging_setup import log_payload
 
 logger = logging.getLogger(__name__)
 
+# Keep the agent's observation small; the total is reported when more rows match
+MAX_TOOL_ROWS = 10
+NEARBY_RADIUS_KM = 5
+
 class OutletTool(BaseModel):
     query: str = Field(..., description="The user's question about ZUS Coffee outlets.")
 
@@ -15,6 +23,7 @@ class OutletTool(BaseModel):
 def outlet_tool(query: str) -> str:
     """Uses LLM to convert natural language into SQL and returns query results from the outlets database like location, opening hours, services."""
     try:
+        check_deadline("outlet_search_tool")
         if not query or query.strip() == "":
             return "Error: No query provided. Please ask something like 'Show all outlets in Selangor'."
 
@@ -25,23 +34,32 @@ def outlet_tool(query: str) -> str:
             return "Your query looks suspicious. Please ask about outlets using natural language."
 
 
+        # "Open now" / "open at 10pm" / "24 hours" questions are answered from the hours index, no LLM needed
+        if is_hours_query(query):
+            hours_answer = opening_hours_answer(query)
+            if hours_answer:
+                return hours_answer
+
+        # Distance questions ("nearest outlet to Setia Alam") are answered from the spatial index, no LLM needed
+        if is_proximity_query(query) and find_place(query):
+            proximity_answer = nearest_outlet_answer(query)
+            if proximity_answer:
+                return proximity_answer
+
         # Step 1: Generate SQL from natural language
         sql_raw = generate_sql_query(query)
         sql_clean = extract_sql_codeblock(sql_raw)
         logger.debug(f"Generated SQL: {sql_clean}")
 
-        # Step 2: Query SQLite database
-        result = query_outlets_from_db(sql_clean)
-        logger.debug(f"Raw result from query_outlets_from_db: {result}")
+        # Step 2: Query SQLite database (reuse the SQL above instead of generating it again)
+        result = run_outlet_sql(sql_clean, limit=MAX_TOOL_ROWS)
+        log_payload(logger, "Raw result from run_outlet_sql", result)
 
         if not result or not result.get("result"):
             return "I couldn't find any information matching your query."
 
         rows = result["result"]
 
-        # Add this line to debug
-        print("DEBUG - Raw result from query_outlets_from_db:", result)
-
         # Step 3: Format output
         if "COUNT(" in sql_clean.upper():
             count_value = list(rows[0].values())[0]
@@ -53,9 +71,63 @@ def outlet_tool(query: str) -> str:
             outlet_info = ', '.join(f"{k}: {v}" for k, v in row.items())
             formatted_rows.append(outlet_info)
 
+        if result.get("total", len(rows)) > len(rows):
+            formatted_rows.append(f"(Showing {len(rows)} of {result['total']} matching outlets.)")
+
         return "\n\n".join(formatted_rows)
 
+    except DeadlineExceeded:
+        raise  # the agent turns this into a partial answer
     except Exception as e:
         logger.exception("Error while processing outlet search.")
         return f"Sorry, something went wrong while processing your request. Details: {e}"
 
+
+def nearest_outlet_answer(query: str) -> Optional[str]:
+    if NEAREST_PATTERN.search(query):
+        result = nearest_outlets(place=query, k=3)
+    else:
+        result = nearest_outlets(place=query, radius_km=NEARBY_RADIUS_KM)
+        if not result.get("result"):
+            result = nearest_outlets(place=query, k=3)
+
+    if result.get("error") or not result.get("result"):
+        return None
+
+    formatted_rows = [
+        f"name: {o['name']}, address: {o['address']}, hours: {o['hours']}, distance: {o['distance_km']} km from {result['place']}"
+        for o in result["result"]
+    ]
+    return "\n\n".join(formatted_rows)
+
+
+def opening_hours_answer(query: str) -> Optional[str]:
+    place = mentioned_outlet(query)
+    if place is None:
+        gazetteer_place = find_place(query)
+        place = gazetteer_place["name"] if gazetteer_place else None
+    if place is None and names_an_outlet(query):
+        return None  # an outlet we cannot resolve; answering for every outlet would be wrong, let the SQL path try
+    result = open_outlets(query, place=place)
+    rows = result["result"]
+
+    if result["kind"] == "24h":
+        if not rows:
+            return "None of the ZUS Coffee outlets are open 24 hours."
+        return "\n\n".join(f"name: {o['name']}, address: {o['address']}, hours: {o['hours']}" for o in rows)
+
+    if result["kind"] == "place":
+        if not rows:
+            return None  # place not in any outlet name/address, let the SQL path try
+        return "\n\n".join(
+            f"name: {o['name']}, {'open' if o['open'] else 'closed'} at {result['when']}, hours that day: {o['today']}"
+            for o in rows
+        )
+
+    if not rows:
+        return f"No ZUS Coffee outlets are open at {result['when']}."
+    formatted_rows = [f"name: {o['name']}, hours: {o['hours']}" for o in rows[:MAX_TOOL_ROWS]]
+    formatted_rows.insert(0, f"{len(rows)} ZUS Coffee outlets are open at {result['when']}:")
+    if len(rows) > MAX_TOOL_ROWS:
+        formatted_rows.append(f"(Showing {MAX_TOOL_ROWS} of {len(rows)} open outlets.)")
+    return "\n\n".join(formatted_rows)
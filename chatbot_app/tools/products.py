@@ -1,7 +1,8 @@
 from langchain.tools import tool
 from pydantic import BaseModel, Field
 from typing import List
-from app.rag import semantic_search, summarize_results
+from app.rag import NO_MATCH_ANSWER, relevant_results, semantic_search, summarize_results
+from app.deadline import DeadlineExceeded, check_deadline
 
 
 class ProductTool(BaseModel):
@@ -13,9 +14,14 @@ def rag_tool(query: str) -> str:
     Use this to answer questions about ZUS Coffee products such as material (e.g. BPA-free, stainless steel), volume, product types (tumblers, mugs), price, variations, measurements, etc.
     """
     try:
-        results = semantic_search(query)
+        check_deadline("product_search_tool")
+        results = relevant_results(semantic_search(query))
+        if not results:
+            return NO_MATCH_ANSWER  # nothing close enough to summarize, skip the LLM call
         summary = summarize_results(query, results)
         return summary
+    except DeadlineExceeded:
+        raise  # the agent turns this into a partial answer
     except Exception:
         return "Sorry, the ZUS server is currently unavailable. Please try again later."
 
@@ -1,8 +1,24 @@
 -- ZUS Coffee Outlet Schema
-CREATE TABLE outlets (
+CREATE TABLE IF NOT EXISTS outlets (
     id INTEGER PRIMARY KEY,
     name TEXT NOT NULL,
     address TEXT NOT NULL,
     hours TEXT,
-    services TEXT
-);
\ No newline at end of file
+    services TEXT,
+    lat REAL,
+    lon REAL
+);
+
+-- One row per outlet: re-scrapes upsert on the normalized name + address
+CREATE UNIQUE INDEX IF NOT EXISTS idx_outlets_name_address
+    ON outlets (name COLLATE NOCASE, address COLLATE NOCASE);
+
+-- Opening hours parsed from outlets.hours: one row per outlet, weekday (0 = Monday) and open interval
+CREATE TABLE IF NOT EXISTS outlet_hours (
+    outlet_id INTEGER NOT NULL REFERENCES outlets (id) ON DELETE CASCADE,
+    weekday INTEGER NOT NULL,
+    open_min INTEGER NOT NULL,
+    close_min INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_outlet_hours_outlet ON outlet_hours (outlet_id, weekday);
@@ -1,11 +1,12 @@
 import os
 import json
 import time
-import requests
 from bs4 import BeautifulSoup
 from tqdm import tqdm
 from datetime import datetime
 
+from data_ingestion.http_cache import fetch, store_parsed
+
 BASE_URL = "https://shop.zuscoffee.com"
 COLLECTION_URL = f"{BASE_URL}/collections/drinkware"
 
@@ -15,10 +16,15 @@ HEADERS = {
 
 def get_product_links():
     print("🔍 Sending request to collection page...")
-    response = requests.get(COLLECTION_URL, headers=HEADERS)
-    soup = BeautifulSoup(response.text, 'html.parser')
+    page = fetch(COLLECTION_URL, headers=HEADERS)
+    if page.not_modified and page.parsed is not None:
+        print("♻️ Collection page unchanged, reusing cached links.")
+        return page.parsed
+
+    soup = BeautifulSoup(page.text, 'html.parser')
     links = soup.select('a[href^="/products/"]')
     unique_links = sorted(set(BASE_URL + link['href'] for link in links))
+    store_parsed(COLLECTION_URL, unique_links)
     print(f"✅ Found {len(unique_links)} product links.")
     return unique_links
 
@@ -74,14 +80,20 @@ def scrape_all_products():
     print("=== 🛠️ ZUS Drinkware Scraper Started ===")
     product_links = get_product_links()
     products = []
+    unchanged = 0
 
     print("📦 Starting product scraping...\n")
 
     for link in tqdm(product_links, total=len(product_links), desc="🔎 Scraping"):
         try:
-            # Fetch individual product page
-            response = requests.get(link, headers=HEADERS)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            # Fetch individual product page (conditional GET via the HTTP cache)
+            page = fetch(link, headers=HEADERS)
+            if page.not_modified and page.parsed is not None:
+                products.append(page.parsed)
+                unchanged += 1
+                continue
+
+            soup = BeautifulSoup(page.text, 'html.parser')
 
             # Now parse name, price, variation from this page directly
             name_tag = soup.select_one('.product__title')
@@ -95,7 +107,7 @@ def scrape_all_products():
             # Parse details
             details = parse_product_details(soup)
 
-            products.append({
+            product = {
                 "name": name,
                 "price": price,
                 "variations": variations,
@@ -103,7 +115,9 @@ def scrape_all_products():
                 "measurements": details.get("measurements", {}),
                 "materials": details.get("materials", {}),
                 "url": link
-            })
+            }
+            products.append(product)
+            store_parsed(link, product)
 
             time.sleep(0.5)
 
@@ -111,6 +125,8 @@ def scrape_all_products():
             print(f"❌ Error processing {link}: {e}")
             continue
 
+    print(f"♻️ {unchanged}/{len(product_links)} product pages unchanged since last run.")
+
     if products:
         os.makedirs("data", exist_ok=True)
 
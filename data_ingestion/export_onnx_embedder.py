@@ -0,0 +1,59 @@
+import os
+
+import torch
+from transformers import AutoModel, AutoTokenizer
+
+from app.embeddings import EMBED_MODEL_NAME, ONNX_FILES, ONNX_MODEL_DIR
+
+# === SETTINGS ===
+HF_MODEL_ID = f"sentence-transformers/{EMBED_MODEL_NAME}"
+OPSET = 17
+
+
+def export(model_dir: str = ONNX_MODEL_DIR, quantize: bool = True, hf_model_id: str = HF_MODEL_ID):
+    os.makedirs(model_dir, exist_ok=True)
+    fp32_path = os.path.join(model_dir, ONNX_FILES["onnx"])
+
+    print(f"📦 Loading {hf_model_id}...")
+    tokenizer = AutoTokenizer.from_pretrained(hf_model_id)
+    model = AutoModel.from_pretrained(hf_model_id)
+    model.eval()
+
+    # Same tokenizer at serve time: tokenizer.json is loaded with the `tokenizers` library
+    tokenizer.save_pretrained(model_dir)
+
+    dummy = tokenizer(["ZUS Coffee tumbler"], return_tensors="pt")
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in ("input_ids", "attention_mask", "token_type_ids")}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    print(f"🧠 Exporting to {fp32_path}...")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy["input_ids"], dummy["attention_mask"], dummy["token_type_ids"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=OPSET,
+            dynamo=False,  # TorchScript exporter: no onnxscript dependency, stable dynamic axes
+        )
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = os.path.join(model_dir, ONNX_FILES["onnx-int8"])
+        print(f"🗜️ Quantizing weights to int8: {int8_path}...")
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+
+    print("✅ ONNX embedder exported. Serve it with EMBEDDING_BACKEND=onnx or EMBEDDING_BACKEND=onnx-int8")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export MiniLM to ONNX for the onnxruntime embedding backend")
+    parser.add_argument("--model-dir", default=ONNX_MODEL_DIR)
+    parser.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args()
+    export(args.model_dir, quantize=not args.no_quantize)
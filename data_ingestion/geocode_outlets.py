@@ -0,0 +1,42 @@
+import os
+import sqlite3
+
+from app.outlet_geo import geocode_address
+from data_ingestion.outlet_schema import migrate
+
+# === Constants ===
+DB_PATH = os.path.join("data", "outlets.db")
+
+
+def geocode_missing(conn: sqlite3.Connection, refresh: bool = False) -> int:
+    """Fill lat/lon from the bundled gazetteer (offline). Returns the number of outlets geocoded."""
+    where = "" if refresh else " WHERE lat IS NULL OR lon IS NULL"
+    rows = conn.execute(f"SELECT id, address FROM outlets{where}").fetchall()
+
+    updates = []
+    for outlet_id, address in rows:
+        coords = geocode_address(address)
+        if coords:
+            updates.append((coords[0], coords[1], outlet_id))
+
+    with conn:
+        conn.executemany("UPDATE outlets SET lat = ?, lon = ? WHERE id = ?", updates)
+
+    unresolved = len(rows) - len(updates)
+    if unresolved:
+        print(f"⚠️ {unresolved} outlets have no gazetteer match; add their area or postcode to data/gazetteer_my.csv")
+    return len(updates)
+
+
+def main():
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        migrate(conn)
+        count = geocode_missing(conn, refresh=True)
+    finally:
+        conn.close()
+    print(f"✅ Geocoded {count} outlets in {DB_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import os
+import json
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional
+
+import requests
+
+# === SETTINGS ===
+CACHE_DIR = os.path.join("data", "http_cache")
+
+# Set SCRAPER_OFFLINE=1 to replay cached pages without touching the network
+OFFLINE = os.getenv("SCRAPER_OFFLINE", "0") == "1"
+
+
+@dataclass
+class CachedPage:
+    url: str
+    text: str
+    status: int
+    not_modified: bool = False
+    parsed: Optional[Any] = None
+
+
+def _cache_paths(url: str):
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return os.path.join(CACHE_DIR, f"{key}.body"), os.path.join(CACHE_DIR, f"{key}.json")
+
+
+def _load_meta(url: str) -> Optional[dict]:
+    body_path, meta_path = _cache_paths(url)
+    if not (os.path.exists(body_path) and os.path.exists(meta_path)):
+        return None
+    with open(meta_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_meta(url: str, meta: dict):
+    _, meta_path = _cache_paths(url)
+    tmp_path = meta_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp_path, meta_path)
+
+
+def _read_body(url: str) -> str:
+    body_path, _ = _cache_paths(url)
+    with open(body_path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def fetch(url: str, headers: Optional[dict] = None, session=None, offline: Optional[bool] = None) -> CachedPage:
+    """
+    GET a page through the on-disk cache.
+
+    Cached pages are revalidated with If-None-Match / If-Modified-Since. A 304
+    (or an offline replay) returns the cached body with `not_modified=True` and
+    whatever was stored with `store_parsed`, so callers can skip parsing.
+    """
+    offline = OFFLINE if offline is None else offline
+    meta = _load_meta(url)
+
+    if offline:
+        if meta is None:
+            raise FileNotFoundError(f"No cached copy of {url} (offline mode)")
+        return CachedPage(url, _read_body(url), meta.get("status", 200), True, meta.get("parsed"))
+
+    request_headers = dict(headers or {})
+    if meta:
+        if meta.get("etag"):
+            request_headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            request_headers["If-Modified-Since"] = meta["last_modified"]
+
+    response = (session or requests).get(url, headers=request_headers, timeout=30)
+
+    if response.status_code == 304 and meta:
+        meta["checked_at"] = datetime.now().isoformat(timespec="seconds")
+        _write_meta(url, meta)
+        return CachedPage(url, _read_body(url), meta.get("status", 200), True, meta.get("parsed"))
+
+    if response.status_code == 200:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        body_path, _ = _cache_paths(url)
+        with open(body_path, "w", encoding="utf-8") as f:
+            f.write(response.text)
+        now = datetime.now().isoformat(timespec="seconds")
+        _write_meta(url, {
+            "url": url,
+            "status": response.status_code,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": now,
+            "checked_at": now,
+            "parsed": None,
+        })
+
+    return CachedPage(url, response.text, response.status_code)
+
+
+def store_parsed(url: str, parsed: Any):
+    """Attach the parse result of a cached page so a later 304 can reuse it."""
+    meta = _load_meta(url)
+    if meta is None:
+        return
+    meta["parsed"] = parsed
+    _write_meta(url, meta)
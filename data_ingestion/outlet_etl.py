@@ -0,0 +1,148 @@
+"""
+Outlet ETL: clean, import and export the outlets table in constant memory.
+
+    python -m data_ingestion.outlet_etl clean  data/outlets.csv data/outlets_fixed.csv --encoding cp1252
+    python -m data_ingestion.outlet_etl import data/outlets_fixed.csv
+    python -m data_ingestion.outlet_etl export data/outlets.csv
+
+Rows are streamed through the cleaning step and written in chunks, so neither
+import nor export ever holds the whole table in memory.
+"""
+import argparse
+import csv
+import os
+import sqlite3
+from typing import Iterable, Iterator, List
+
+from data_ingestion.outlet_schema import migrate, normalize_row, upsert_outlets
+from data_ingestion.geocode_outlets import geocode_missing
+from data_ingestion.parse_outlet_hours import rebuild_hours
+
+# === Constants ===
+DB_PATH = os.path.join("data", "outlets.db")
+CHUNK_SIZE = 1000
+EXPORT_COLUMNS = ["id", "name", "address", "hours", "services"]
+
+
+# === Clean ===
+def clean_value(value: str) -> str:
+    return (
+        value.replace("�", "-")  # Replace with dash or remove
+             .replace("?", "")   # Remove stray question marks
+             .replace("–", "-")  # Normalize en dash to hyphen
+             .replace("—", "-")  # Normalize em dash to hyphen
+             .strip()
+    )
+
+
+def clean_rows(rows: Iterable[List[str]]) -> Iterator[List[str]]:
+    for row in rows:
+        yield [clean_value(col) for col in row]
+
+
+def clean_csv(src: str, dest: str, encoding: str = "cp1252") -> int:
+    count = 0
+    with open(src, "r", encoding=encoding, errors="replace", newline="") as infile, \
+         open(dest, "w", encoding="utf-8", newline="") as outfile:
+        writer = csv.writer(outfile)
+        for row in clean_rows(csv.reader(infile)):
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+# === Import ===
+def tune_for_load(conn: sqlite3.Connection):
+    # Connection-scoped only: journal_mode=WAL would persist in outlets.db and make
+    # every later reader, including the read-only SQL sandbox, need -wal/-shm files
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA temp_store=MEMORY")
+
+
+def read_outlet_rows(path: str, encoding: str = "utf-8") -> Iterator[tuple]:
+    """Stream cleaned, normalized (name, address, hours, services) rows from a CSV with a header."""
+    with open(path, "r", encoding=encoding, errors="replace", newline="") as infile:
+        reader = csv.reader(infile)
+        header = next(reader, None)
+        if header is None:
+            return
+        positions = {name.strip().lower(): i for i, name in enumerate(header)}
+        missing = {"name", "address"} - positions.keys()
+        if missing:
+            raise ValueError(f"CSV is missing required columns: {', '.join(sorted(missing))}")
+
+        for row in clean_rows(reader):
+            values = {key: (row[i] if i < len(row) else None) for key, i in positions.items()}
+            if not values.get("name") or not values.get("address"):
+                continue
+            yield normalize_row(values["name"], values["address"], values.get("hours"), values.get("services"))
+
+
+def import_csv(path: str, db_path: str = DB_PATH, encoding: str = "utf-8", chunk_size: int = CHUNK_SIZE) -> int:
+    conn = sqlite3.connect(db_path)
+    try:
+        migrate(conn)
+        tune_for_load(conn)
+        written = upsert_outlets(conn, read_outlet_rows(path, encoding), batch_size=chunk_size)
+        geocode_missing(conn)
+        rebuild_hours(conn)
+        return written
+    finally:
+        conn.close()
+
+
+# === Export ===
+def export_csv(path: str, db_path: str = DB_PATH, chunk_size: int = CHUNK_SIZE) -> int:
+    conn = sqlite3.connect(db_path)
+    count = 0
+    try:
+        cursor = conn.execute(f"SELECT {', '.join(EXPORT_COLUMNS)} FROM outlets ORDER BY id")
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(EXPORT_COLUMNS)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                writer.writerows(rows)
+                count += len(rows)
+        return count
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ZUS outlet ETL")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    clean_parser = subparsers.add_parser("clean", help="Normalize a raw CSV export to UTF-8")
+    clean_parser.add_argument("src")
+    clean_parser.add_argument("dest")
+    clean_parser.add_argument("--encoding", default="cp1252")
+
+    import_parser = subparsers.add_parser("import", help="Clean and upsert a CSV into the outlets table")
+    import_parser.add_argument("csv_path")
+    import_parser.add_argument("--db", default=DB_PATH)
+    import_parser.add_argument("--encoding", default="utf-8")
+    import_parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    export_parser = subparsers.add_parser("export", help="Stream the outlets table to CSV")
+    export_parser.add_argument("csv_path")
+    export_parser.add_argument("--db", default=DB_PATH)
+    export_parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "clean":
+        count = clean_csv(args.src, args.dest, args.encoding)
+        print(f"✅ Cleaned {count} rows into {args.dest}")
+    elif args.command == "import":
+        count = import_csv(args.csv_path, args.db, args.encoding, args.chunk_size)
+        print(f"✅ Imported {count} rows into {args.db}")
+    elif args.command == "export":
+        count = export_csv(args.csv_path, args.db, args.chunk_size)
+        print(f"✅ Exported {count} rows to {args.csv_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import os
+import re
+import sqlite3
+from typing import Iterable, Optional, Tuple
+
+# === Constants ===
+SCHEMA_PATH = os.path.join("data", "dbschema.sql")
+
+# Columns added to dbschema.sql after the first scraper runs
+MIGRATED_COLUMNS = {"hours": "TEXT", "services": "TEXT", "lat": "REAL", "lon": "REAL"}
+
+UPSERT_SQL = """
+    INSERT INTO outlets (name, address, hours, services)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT (name COLLATE NOCASE, address COLLATE NOCASE) DO UPDATE SET
+        name = excluded.name,
+        address = excluded.address,
+        hours = COALESCE(excluded.hours, outlets.hours),
+        services = COALESCE(excluded.services, outlets.services)
+"""
+
+OutletRow = Tuple[str, str, Optional[str], Optional[str]]
+
+
+def normalize_text(value: Optional[str]) -> Optional[str]:
+    """Collapse whitespace so the same outlet always maps to the same unique key."""
+    if value is None:
+        return None
+    value = re.sub(r"\s+", " ", value).strip()
+    return value or None
+
+
+def normalize_row(name: str, address: str, hours: Optional[str] = None, services: Optional[str] = None) -> OutletRow:
+    return normalize_text(name), normalize_text(address), normalize_text(hours), normalize_text(services)
+
+
+def migrate(conn: sqlite3.Connection):
+    """
+    Bring an outlets table up to `data/dbschema.sql`.
+
+    Older scraper runs created the table without `services`, coordinates or a
+    unique key, so missing columns are added, name and address are
+    whitespace-normalized like new rows, and duplicate rows (same name and
+    address, ignoring case) are collapsed onto the oldest id before the unique
+    index is created.
+    """
+    with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
+        schema = f.read()
+
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(outlets)")}
+    if columns:
+        for column, column_type in MIGRATED_COLUMNS.items():
+            if column not in columns:
+                conn.execute(f"ALTER TABLE outlets ADD COLUMN {column} {column_type}")
+        conn.create_function("normalize_text", 1, normalize_text, deterministic=True)
+        stale = "name != COALESCE(normalize_text(name), name) OR address != COALESCE(normalize_text(address), address)"
+        if conn.execute(f"SELECT 1 FROM outlets WHERE {stale} LIMIT 1").fetchone():
+            # Normalizing can make two rows equal under the unique key; the schema recreates it below
+            conn.execute("DROP INDEX IF EXISTS idx_outlets_name_address")
+            conn.execute(f"""
+                UPDATE outlets
+                SET name = COALESCE(normalize_text(name), name), address = COALESCE(normalize_text(address), address)
+                WHERE {stale}
+            """)
+        conn.execute("""
+            DELETE FROM outlets WHERE id NOT IN (
+                SELECT MIN(id) FROM outlets
+                GROUP BY name COLLATE NOCASE, address COLLATE NOCASE
+            )
+        """)
+
+    conn.executescript(schema)
+
+
+def upsert_outlets(conn: sqlite3.Connection, rows: Iterable[OutletRow], batch_size: int = 500) -> int:
+    """Upsert rows in batches inside a single transaction. Returns the number of rows written."""
+    written = 0
+    batch = []
+    with conn:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                conn.executemany(UPSERT_SQL, batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            conn.executemany(UPSERT_SQL, batch)
+            written += len(batch)
+    return written
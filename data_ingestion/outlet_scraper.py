@@ -1,45 +1,113 @@
-import requests
 from bs4 import BeautifulSoup
 import sqlite3
 import os
 
+from data_ingestion.http_cache import fetch, store_parsed
+from data_ingestion.outlet_schema import migrate, normalize_row, upsert_outlets
+from data_ingestion.geocode_outlets import geocode_missing
+from data_ingestion.parse_outlet_hours import rebuild_hours
+
 # === Constants ===
-URL = "https://zuscoffee.com/category/store/kuala-lumpur-selangor/"
+BASE_URL = "https://zuscoffee.com/category/store"
+REGIONS = [
+    "kuala-lumpur-selangor",
+    "putrajaya",
+    "negeri-sembilan",
+    "melaka",
+    "johor",
+    "pahang",
+    "perak",
+    "penang",
+    "kedah",
+    "kelantan",
+    "terengganu",
+    "sabah",
+    "sarawak",
+]
+MAX_PAGES = 50
 DB_PATH = os.path.join("data", "outlets.db")
 
-# === Get HTML ===
-response = requests.get(URL)
-soup = BeautifulSoup(response.text, "html.parser")
+
+def page_url(region: str, page: int) -> str:
+    if page == 1:
+        return f"{BASE_URL}/{region}/"
+    return f"{BASE_URL}/{region}/page/{page}/"
+
 
 # === Extract store name and address ===
-outlets = []
-containers = soup.find_all("div", class_="elementor-widget-container")
-
-for container in containers:
-    name_tag = container.find("span", class_="entry-title")
-    address_tag = container.find("p")
-
-    if name_tag and address_tag:
-        name = name_tag.get_text(strip=True)
-        address = address_tag.get_text(strip=True)
-        outlets.append((name, address, "N/A"))  # hours not available
-
-# === Save to SQLite ===
-os.makedirs("data", exist_ok=True)
-conn = sqlite3.connect(DB_PATH)
-cursor = conn.cursor()
-
-cursor.execute("""
-    CREATE TABLE IF NOT EXISTS outlets (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT,
-        address TEXT,
-        hours TEXT
-    )
-""")
-
-cursor.executemany("INSERT INTO outlets (name, address, hours) VALUES (?, ?, ?)", outlets)
-conn.commit()
-conn.close()
-
-print(f"✅ Scraped and saved {len(outlets)} outlets to {DB_PATH}")
+def parse_outlets(html: str):
+    soup = BeautifulSoup(html, "html.parser")
+    outlets = []
+    containers = soup.find_all("div", class_="elementor-widget-container")
+
+    for container in containers:
+        name_tag = container.find("span", class_="entry-title")
+        address_tag = container.find("p")
+
+        if name_tag and address_tag:
+            name = name_tag.get_text(strip=True)
+            address = address_tag.get_text(strip=True)
+            if not name or not address:
+                continue
+            outlets.append(normalize_row(name, address))  # hours/services not on listing pages
+
+    return outlets
+
+
+def scrape_region(region: str):
+    """Walk /page/N/ for one region until a page is missing, empty or repeats."""
+    outlets = []
+    seen = set()
+
+    for page_number in range(1, MAX_PAGES + 1):
+        url = page_url(region, page_number)
+        try:
+            page = fetch(url)
+        except FileNotFoundError:
+            break  # offline replay ran past the cached pages
+        if page.status == 404:
+            break
+
+        if page.not_modified and page.parsed is not None:
+            rows = [tuple(row) for row in page.parsed]
+        else:
+            rows = parse_outlets(page.text)
+            store_parsed(url, rows)
+
+        new_rows = [row for row in rows if (row[0].lower(), row[1].lower()) not in seen]
+        if not new_rows:
+            break
+
+        seen.update((row[0].lower(), row[1].lower()) for row in new_rows)
+        outlets.extend(new_rows)
+
+    return outlets
+
+
+def main():
+    outlets = []
+    for region in REGIONS:
+        try:
+            region_outlets = scrape_region(region)
+        except Exception as e:
+            print(f"❌ Error scraping region {region}: {e}")
+            continue
+        print(f"📍 {region}: {len(region_outlets)} outlets")
+        outlets.extend(region_outlets)
+
+    # === Save to SQLite (idempotent upsert, one transaction) ===
+    os.makedirs("data", exist_ok=True)
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        migrate(conn)
+        written = upsert_outlets(conn, outlets)
+        geocoded = geocode_missing(conn)
+        rebuild_hours(conn)
+    finally:
+        conn.close()
+
+    print(f"✅ Scraped and upserted {written} outlets into {DB_PATH} ({geocoded} newly geocoded)")
+
+
+if __name__ == "__main__":
+    main()
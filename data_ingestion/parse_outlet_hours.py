@@ -0,0 +1,44 @@
+import os
+import sqlite3
+
+from app.outlet_hours import parse_hours
+from data_ingestion.outlet_schema import migrate
+
+# === Constants ===
+DB_PATH = os.path.join("data", "outlets.db")
+
+
+def rebuild_hours(conn: sqlite3.Connection) -> int:
+    """Re-parse every outlet's free-text hours into the outlet_hours side table. Returns the interval count."""
+    intervals = []
+    unparsed = 0
+    for outlet_id, hours in conn.execute("SELECT id, hours FROM outlets"):
+        parsed = parse_hours(hours)
+        if not parsed and hours and hours.strip().upper() != "N/A":
+            unparsed += 1
+        intervals.extend((outlet_id, day, start, end) for day, start, end in parsed)
+
+    with conn:
+        conn.execute("DELETE FROM outlet_hours")
+        conn.executemany(
+            "INSERT INTO outlet_hours (outlet_id, weekday, open_min, close_min) VALUES (?, ?, ?, ?)",
+            intervals,
+        )
+
+    if unparsed:
+        print(f"⚠️ {unparsed} outlets have hours text that could not be parsed")
+    return len(intervals)
+
+
+def main():
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        migrate(conn)
+        count = rebuild_hours(conn)
+    finally:
+        conn.close()
+    print(f"✅ Stored {count} opening intervals in {DB_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+# gunicorn.conf.py — pre-fork multi-worker mode
+#   gunicorn -c gunicorn.conf.py app.main:app
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+
+# Import app.main (model, FAISS index, metadata) once in the master so workers share it copy-on-write
+preload_app = True
+
+
+def when_ready(server):
+    # app.main imports lazily; load the model and index now so the workers inherit them
+    from app.rag import load_store
+    from app.prefork import freeze_master_heap, threads_per_worker
+    load_store(threads=threads_per_worker(workers))
+    freeze_master_heap()
+    server.log.info("Model and index loaded in master (pid %s); forking %s workers", os.getpid(), workers)
+
+
+def post_fork(server, worker):
+    from app.prefork import after_fork
+    after_fork(workers)
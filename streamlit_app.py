@@ -1,24 +1,11 @@
 import streamlit as st
 import os
+import uuid
 from dotenv import load_dotenv
 
 print("--- Streamlit App Start (Final Stable Part 4 Agent) ---")
 
-# --- LangChain Imports ---
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.memory import ConversationBufferMemory
-from langchain_core.language_models import BaseChatModel
-
-# --- Import ONLY the required Chatbot Part 4 ---
-from chatbot_app.chatbot_part4 import MindhiveChatbot as MindhiveChatbotPart4
-
-# Import your tools (Tools are essential for Part 4)
-from chatbot_app.tools.calculator import calculate
-from chatbot_app.tools.products import rag_tool
-from chatbot_app.tools.outlets import outlet_tool
-from chatbot_app.tools.rag_placeholder import zus_info_retriever # Included if used by Part 4 logic
-
-# --- API Key Setup (Kept for completeness) ---
+# --- API Key / Mode Setup ---
 if not st.secrets:
     try:
         load_dotenv()
@@ -26,11 +13,28 @@ if not st.secrets:
     except NameError:
         print("⚠️ dotenv not available — skipping .env load") 
 
-GOOGLE_API_KEY = st.secrets.get("GOOGLE_API_KEY") or os.getenv("GOOGLE_API_KEY")
+# Client mode: with CHATBOT_API_URL set, this UI only talks HTTP to the FastAPI backend
+# (app.main) and never loads langchain, the FAISS index or the embedding model.
+CHATBOT_API_URL = st.secrets.get("CHATBOT_API_URL") or os.getenv("CHATBOT_API_URL")
+CLIENT_MODE = bool(CHATBOT_API_URL)
+
+if CLIENT_MODE:
+    from chatbot_app.api_client import ChatbotAPIError, ChatbotClient
+else:
+    # --- LangChain Imports ---
+    from langchain.memory import ConversationBufferMemory
+    from langchain_core.language_models import BaseChatModel
 
-if not GOOGLE_API_KEY:
-    st.error("❌ GOOGLE_API_KEY not found. Please set it in .env (local) or secrets (Streamlit Cloud).")
-    st.stop()
+    # --- Import ONLY the required Chatbot Part 4 (it imports its tools) ---
+    from chatbot_app.chatbot_part4 import MindhiveChatbot as MindhiveChatbotPart4
+    from chatbot_app.sessions import SessionPool
+    from app.llm_clients import get_llm
+
+    GOOGLE_API_KEY = st.secrets.get("GOOGLE_API_KEY") or os.getenv("GOOGLE_API_KEY")
+
+    if not GOOGLE_API_KEY:
+        st.error("❌ GOOGLE_API_KEY not found. Please set it in .env (local) or secrets (Streamlit Cloud).")
+        st.stop()
 
 # ===============================================
 # === CUSTOM CSS FOR COFFEE SHOP AESTHETICS & LAYOUT (RESTORED) ===
@@ -110,36 +114,75 @@ st.title("☕ CoffeBot Agent")
 
 # Define the single mode name and class for consistency
 SELECTED_MODE_NAME = "Part 4: Advanced Agent with Multiple Tools"
-SELECTED_CHATBOT_CLASS = MindhiveChatbotPart4
-
-@st.cache_resource(hash_funcs={ChatGoogleGenerativeAI: lambda _: None, ConversationBufferMemory: lambda _: None})
-def get_llm_and_chatbot_instance() -> tuple[BaseChatModel, ConversationBufferMemory, object]:
-    """Caches and initializes the LLM and the Part 4 Chatbot instance."""
-    
-    # Use the stable temperature from the demo's Part 4 logic
-    temperature = 0.2 
-    
-    print(f"Initializing ChatGoogleGenerativeAI with model='gemini-2.5-flash', temperature={temperature}...")
-    llm_instance = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        temperature=temperature
-    )
-
-    print("Initializing ConversationBufferMemory...")
-    memory_instance = ConversationBufferMemory(
-        memory_key="chat_history",
-        return_messages=True
-    )
-    
-    print(f"Initializing selected chatbot class: {SELECTED_CHATBOT_CLASS.__name__}...")
-    chatbot_instance = SELECTED_CHATBOT_CLASS(
-        llm=llm_instance,
-        memory_obj=memory_instance
-    )
-    return llm_instance, memory_instance, chatbot_instance
-
-# Call the cached function
-llm_instance, memory_instance, current_chatbot_instance = get_llm_and_chatbot_instance()
+
+if CLIENT_MODE:
+    @st.cache_resource
+    def get_api_client() -> "ChatbotClient":
+        # One pooled keep-alive HTTP session for every browser session of this replica
+        return ChatbotClient(CHATBOT_API_URL)
+
+    def ask_backend(prompt: str, session_id: str) -> str:
+        """Stream the turn from /chatbot/stream, showing tool calls as they happen."""
+        progress = st.empty()
+        answer = ""
+        try:
+            for event in get_api_client().stream_chat(prompt, session_id=session_id):
+                if event.get("type") == "tool":
+                    progress.caption(f"Using {event.get('tool')}...")
+                elif event.get("type") == "answer":
+                    answer = event.get("answer", "")
+        except ChatbotAPIError as e:
+            print(f"Backend error: {e}")
+            answer = "Sorry, the ZUS server is currently unavailable. Please try again later."
+        progress.empty()
+        return answer
+
+else:
+    SELECTED_CHATBOT_CLASS = MindhiveChatbotPart4
+
+    @st.cache_resource
+    def get_shared_llm() -> BaseChatModel:
+        """The LLM client is the only chatbot piece shared across browser sessions."""
+        # The Part 4 agent role: temperature 0.2, shared rate limiter and retries (app.llm_clients)
+        print("Initializing the shared 'agent' LLM client...")
+        return get_llm("agent")
+
+
+    def build_session_chatbot(session_id: str):
+        """Fresh memory and agent executor for one browser session, seeded from its visible history."""
+        memory_instance = ConversationBufferMemory(
+            memory_key="chat_history",
+            return_messages=True
+        )
+        # A session evicted while idle comes back with the conversation the user can still see
+        history = st.session_state.get(CHAT_HISTORY_KEY, [])
+        if history and history[-1][0] == "You":
+            history = history[:-1]  # the pending question is passed as input, not memory
+        for speaker, message in history:
+            if speaker == "You":
+                memory_instance.chat_memory.add_user_message(message)
+            else:
+                memory_instance.chat_memory.add_ai_message(message)
+
+        print(f"Initializing {SELECTED_CHATBOT_CLASS.__name__} for session {session_id[:8]}...")
+        return SELECTED_CHATBOT_CLASS(
+            llm=get_shared_llm(),
+            memory_obj=memory_instance
+        )
+
+
+    @st.cache_resource
+    def get_session_pool() -> SessionPool:
+        # Bounded by CHATBOT_MAX_SESSIONS, idle sessions dropped after CHATBOT_SESSION_IDLE_TTL_S
+        return SessionPool(build_session_chatbot)
+
+
+CHAT_HISTORY_KEY = f"chat_history_{SELECTED_MODE_NAME}"
+SESSION_ID_KEY = "chatbot_session_id"
+if SESSION_ID_KEY not in st.session_state:
+    st.session_state[SESSION_ID_KEY] = uuid.uuid4().hex
+session_id = st.session_state[SESSION_ID_KEY]
+session_pool = None if CLIENT_MODE else get_session_pool()
 
 
 # --- START OF GLASS BOX WRAPPER (st.container() defines the wrapped area) ---
@@ -156,7 +199,6 @@ with st.container():
     """, unsafe_allow_html=True)
 
     # --- Initialize Chat History ---
-    CHAT_HISTORY_KEY = f"chat_history_{SELECTED_MODE_NAME}"
     if CHAT_HISTORY_KEY not in st.session_state:
         st.session_state[CHAT_HISTORY_KEY] = []
 
@@ -183,14 +225,11 @@ with st.container():
         with st.chat_message("assistant"):
             with st.spinner("Brewing a response..."):
                 try:
-                    # Explicitly look for the 'chat_4' method
-                    method = getattr(current_chatbot_instance, "chat_4", None) or getattr(current_chatbot_instance, "chat", None)
-                    
-                    if callable(method):
-                        # Ensure all tool imports the Part 4 agent relies on are available.
-                        response = method(prompt) 
+                    if CLIENT_MODE:
+                        response = ask_backend(prompt, session_id)
                     else:
-                        response = "❌ Configuration Error: Could not find 'chat_4' or 'chat' method on the chatbot instance."
+                        # This session's own chatbot; its lock serialises turns from the same user
+                        response = session_pool.chat(session_id, prompt)
 
                     if not isinstance(response, str):
                         response = str(response)
@@ -214,4 +253,8 @@ col1, col2, col3 = st.columns([1,1,1])
 with col2:
     if st.button("Clear Chat History", key=f"clear_button_{SELECTED_MODE_NAME}"):
         st.session_state[CHAT_HISTORY_KEY] = []
+        if session_pool is not None:
+            session_pool.drop(session_id)
+        # New id so the backend (client mode) starts a fresh conversation too
+        st.session_state[SESSION_ID_KEY] = uuid.uuid4().hex
         st.rerun()
\ No newline at end of file
@@ -12,6 +12,7 @@ from langchain_core.prompts import PromptTemplate
 from langchain_core.language_models import BaseChatModel
 from langchain.agents import create_react_agent, AgentExecutor, initialize_agent
 from langchain_core.tools import Tool
+from app.llm_clients import get_llm
 
 # --- Import Chatbot Parts from their respective files (using relative imports) ---
 
@@ -85,20 +86,17 @@ def get_llm_and_chatbot_instance(mode_name: str, chatbot_class: type) -> tuple[B
     print(f"Caching LLM and chatbot instance for {mode_name}. Initializing...")
     # Determine temperature based on the selected mode, as per your original parts
     if "Part 1" in mode_name:
-        temperature = 0.5
+        role, temperature = "chat", 0.5
     elif "Part 2" in mode_name:
-        temperature = 0.3
+        role, temperature = "planner", 0.3
     elif "Part 3" in mode_name or "Part 4" in mode_name:
-        temperature = 0.2
+        role, temperature = "agent", 0.2
     else:
-        temperature = 0.2 # Default for other parts if not specified yet
+        role, temperature = "agent", 0.2 # Default for other parts if not specified yet
 
-    print(f"Initializing ChatGoogleGenerativeAI with model='gemini-2.5-flash', temperature={temperature}...")
-    llm_instance = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        temperature=temperature
-    )
-    print("ChatGoogleGenerativeAI initialized.")
+    print(f"Getting the '{role}' LLM client with temperature={temperature}...")
+    llm_instance = get_llm(role, temperature=temperature)
+    print("LLM client ready.")
 
     print(f"Initializing ConversationBufferMemory for {mode_name}...")
     memory_instance = ConversationBufferMemory(
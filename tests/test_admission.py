@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.admission import AdmissionController, ClientBuckets, EndpointLimiter, EndpointPolicy, Rejected, client_id, parse_networks
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def policy(**overrides) -> EndpointPolicy:
+    settings = dict(max_concurrent=1, max_queue=1, max_wait_s=0.2, client_rpm=0, client_burst=1)
+    settings.update(overrides)
+    return EndpointPolicy(**settings)
+
+
+def test_client_buckets_refill():
+    clock = FakeClock()
+    buckets = ClientBuckets(rate_per_s=1, burst=2, clock=clock)
+    assert buckets.take("a") == 0
+    assert buckets.take("a") == 0
+    assert buckets.take("a") == pytest.approx(1.0)
+    assert buckets.take("b") == 0  # other clients have their own bucket
+    clock.now = 1.0
+    assert buckets.take("a") == 0
+
+
+def test_client_buckets_forget_oldest_clients():
+    buckets = ClientBuckets(rate_per_s=1, burst=1, clock=FakeClock(), max_clients=2)
+    for client in "abc":
+        buckets.take(client)
+    assert buckets.take("a") == 0  # evicted, so it starts with a full bucket again
+
+
+def test_limiter_queues_then_rejects():
+    async def scenario():
+        limiter = EndpointLimiter("chatbot", policy(max_concurrent=1, max_queue=1, max_wait_s=0.5))
+        await limiter.acquire("a")  # holds the only slot
+
+        waiter = asyncio.create_task(limiter.acquire("b"))
+        await asyncio.sleep(0)
+        assert limiter.queued == 1
+
+        with pytest.raises(Rejected) as full:
+            await limiter.acquire("c")  # queue is full: rejected without waiting
+        assert full.value.status_code == 503 and full.value.retry_after >= 1
+
+        limiter.release(0.1)
+        await waiter
+        assert limiter.in_flight == 1 and limiter.queued == 0
+        limiter.release(0.1)
+        return limiter.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["admitted"] == 2
+    assert stats["max_queued"] == 1
+    assert stats["rejected"] == {"rate_limited": 0, "queue_full": 1, "queue_timeout": 0}
+
+
+def test_limiter_queue_timeout():
+    async def scenario():
+        limiter = EndpointLimiter("products", policy(max_concurrent=1, max_queue=5, max_wait_s=0.05))
+        await limiter.acquire("a")
+        with pytest.raises(Rejected) as timeout:
+            await limiter.acquire("b")
+        return limiter, timeout.value
+
+    limiter, rejected = asyncio.run(scenario())
+    assert rejected.status_code == 503
+    assert limiter.rejected["queue_timeout"] == 1
+    assert limiter.queued == 0
+
+
+def make_app(**policy_overrides) -> TestClient:
+    app = FastAPI()
+    controller = AdmissionController(
+        policies={"demo": policy(**policy_overrides)}, routes={"/demo": "demo", "/demo/stream": "demo"}, enabled=True
+    )
+    app.middleware("http")(controller)
+
+    @app.get("/demo")
+    def demo():
+        return {"ok": True}
+
+    @app.get("/demo/stream")
+    def demo_stream():
+        return StreamingResponse(iter(["a\n", "b\n"]), media_type="application/x-ndjson")
+
+    @app.get("/free")
+    def free():
+        return {"ok": True}
+
+    client = TestClient(app)
+    client.controller = controller
+    return client
+
+
+def test_middleware_rate_limits_per_client():
+    client = make_app(client_rpm=60, client_burst=2)
+    assert [client.get("/demo").status_code for _ in range(2)] == [200, 200]
+
+    # A fresh X-Client-ID from an untrusted peer does not buy a fresh bucket
+    limited = client.get("/demo", headers={"X-Client-ID": "someone-else"})
+    assert limited.status_code == 429
+    assert limited.headers["Retry-After"] == "1"
+    assert limited.json()["error_type"] == "RateLimited"
+
+    # Routes outside any group are never limited
+    assert all(client.get("/free").status_code == 200 for _ in range(5))
+
+
+def test_middleware_releases_slot_after_streamed_body():
+    client = make_app()
+    for _ in range(3):
+        response = client.get("/demo/stream")
+        assert response.text == "a\nb\n"
+    stats = client.controller.stats()["demo"]
+    assert stats["admitted"] == 3
+    assert stats["in_flight"] == 0
+
+
+def request_from(peer: str, **headers) -> Request:
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw, "client": (peer, 1234)})
+
+
+def test_client_id_trusts_headers_only_from_proxies():
+    proxies = parse_networks(["10.0.0.0/8"])
+    # Direct callers are their address, whatever they claim
+    assert client_id(request_from("203.0.113.9", x_client_id="a", x_forwarded_for="1.2.3.4"), proxies) == "203.0.113.9"
+    # Behind the gateway: its X-Client-ID, else the last hop before our proxies
+    assert client_id(request_from("10.0.0.2", x_client_id="team-a"), proxies) == "id:team-a"
+    assert client_id(request_from("10.0.0.2", x_forwarded_for="1.2.3.4, 198.51.100.7, 10.0.0.5"), proxies) == "198.51.100.7"
+    assert client_id(request_from("10.0.0.2"), proxies) == "10.0.0.2"
+    assert client_id(request_from("10.0.0.2", x_client_id="a")) == "10.0.0.2"  # no proxies configured
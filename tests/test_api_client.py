@@ -0,0 +1,61 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from chatbot_app.api_client import ChatbotAPIError, ChatbotClient
+
+
+class FakeBackend(BaseHTTPRequestHandler):
+    streaming = True
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path == "/chatbot":
+            self._send(200, "application/json", json.dumps({"answer": f"{body['session_id']}: {body['question']}"}))
+        elif self.path == "/chatbot/stream" and self.streaming:
+            lines = [{"type": "tool", "tool": "OutletInfo", "input": body["question"]}, {"type": "answer", "answer": "42"}]
+            self._send(200, "application/x-ndjson", "".join(json.dumps(line) + "\n" for line in lines))
+        else:
+            self._send(404, "application/json", json.dumps({"detail": "Not Found"}))
+
+    def _send(self, status, content_type, text):
+        data = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def backend():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeBackend)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    FakeBackend.streaming = True
+
+
+def test_chat_and_stream(backend):
+    client = ChatbotClient(backend)
+    assert client.chat("hi", session_id="s1") == "s1: hi"
+    events = list(client.stream_chat("outlets in SS2", session_id="s1"))
+    assert [e["type"] for e in events] == ["tool", "answer"]
+    assert events[-1]["answer"] == "42"
+
+
+def test_stream_falls_back_to_plain_chat(backend):
+    FakeBackend.streaming = False
+    events = list(ChatbotClient(backend).stream_chat("hi", session_id="s2"))
+    assert events == [{"type": "answer", "answer": "s2: hi"}]
+
+
+def test_unreachable_backend_raises_api_error():
+    client = ChatbotClient("http://127.0.0.1:9", timeout=(0.2, 0.2))
+    with pytest.raises(ChatbotAPIError):
+        client.chat("hi")
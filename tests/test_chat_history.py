@@ -0,0 +1,56 @@
+from langchain.memory import ConversationBufferMemory
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.chat_history import SQLiteChatMessageHistory, SQLiteChatStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_turns_are_visible_to_another_worker(tmp_path):
+    db = str(tmp_path / "chat.db")
+    worker_a = ConversationBufferMemory(
+        memory_key="chat_history", chat_memory=SQLiteChatMessageHistory("s1", SQLiteChatStore(db))
+    )
+    worker_a.save_context({"input": "Is there an outlet in Petaling Jaya?"}, {"output": "Yes! Which area?"})
+
+    # A different process opening the same file sees the first turn
+    worker_b = ConversationBufferMemory(
+        memory_key="chat_history", chat_memory=SQLiteChatMessageHistory("s1", SQLiteChatStore(db))
+    )
+    history = worker_b.load_memory_variables({})["chat_history"]
+    assert "Petaling Jaya" in history and "Which area?" in history
+
+    other = SQLiteChatMessageHistory("s2", SQLiteChatStore(db))
+    assert other.messages == []
+
+
+def test_reads_are_bounded_to_newest_messages(tmp_path):
+    store = SQLiteChatStore(str(tmp_path / "chat.db"), max_messages=4)
+    history = SQLiteChatMessageHistory("s1", store)
+    for i in range(5):
+        history.add_messages([HumanMessage(content=f"q{i}"), AIMessage(content=f"a{i}")])
+
+    messages = history.messages
+    assert [m.content for m in messages] == ["q3", "a3", "q4", "a4"]
+    assert isinstance(messages[0], HumanMessage) and isinstance(messages[1], AIMessage)
+
+
+def test_ttl_expiry_and_clear(tmp_path):
+    clock = FakeClock()
+    store = SQLiteChatStore(str(tmp_path / "chat.db"), ttl_s=60, clock=clock)
+    history = SQLiteChatMessageHistory("s1", store)
+    history.add_messages([HumanMessage(content="old")])
+    clock.now += 120
+    history.add_messages([HumanMessage(content="new")])
+
+    assert [m.content for m in history.messages] == ["new"]
+    assert store.purge_expired() == 1
+
+    history.clear()
+    assert history.messages == []
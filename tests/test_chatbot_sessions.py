@@ -0,0 +1,71 @@
+import threading
+import time
+
+from chatbot_app.sessions import SessionPool
+
+
+class EchoBot:
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.history = []
+
+    def chat_4(self, message):
+        self.history.append(message)
+        return f"{self.session_id}: {len(self.history)}"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_sessions_keep_separate_history():
+    pool = SessionPool(EchoBot)
+    assert pool.chat("alice", "hi") == "alice: 1"
+    assert pool.chat("bob", "hello") == "bob: 1"
+    assert pool.chat("alice", "again") == "alice: 2"
+    assert pool.get("bob").chatbot.history == ["hello"]
+
+
+def test_lru_bound_and_idle_eviction():
+    clock = FakeClock()
+    pool = SessionPool(EchoBot, max_sessions=2, idle_ttl=60, clock=clock)
+    pool.chat("a", "1")
+    clock.now = 1
+    pool.chat("b", "1")
+    clock.now = 2
+    pool.chat("a", "2")  # b is now least recently used
+    pool.chat("c", "1")
+    assert pool.stats() == {"live_sessions": 2, "max_sessions": 2, "evicted": 1}
+    assert pool.chat("a", "3") == "a: 3"
+    assert pool.chat("b", "x") == "b: 1"  # rebuilt from scratch
+
+    clock.now = 1000
+    pool.get("d")
+    assert pool.stats()["live_sessions"] == 1
+
+
+def test_turns_within_a_session_are_serialised():
+    active = []
+    overlaps = []
+
+    class SlowBot(EchoBot):
+        def chat_4(self, message):
+            active.append(message)
+            if len(active) > 1:
+                overlaps.append(message)
+            time.sleep(0.05)
+            active.remove(message)
+            return super().chat_4(message)
+
+    pool = SessionPool(SlowBot)
+    threads = [threading.Thread(target=pool.chat, args=("same", str(i))) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert overlaps == []
+    assert len(pool.get("same").chatbot.history) == 4
@@ -0,0 +1,96 @@
+import json
+from typing import Any, List, Optional
+
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from app import llm_clients
+from chatbot_app import conversation_suite as suite
+
+PART1_SCENARIO = {
+    "id": "part1-happy-path",
+    "target": "part1",
+    "turns": [
+        {"user": "Is there an outlet in Petaling Jaya?", "expect_any": ["yes"]},
+        {"user": "SS 2, whats the opening time?", "expect_all": ["open"], "expect_any": ["ss 2"]},
+    ],
+}
+
+
+UPSTREAM_CALLS: List[str] = []
+
+
+class ScriptedModel(BaseChatModel):
+    """Live stand-in: answers by turn number, so replays must come from the recording."""
+
+    model: str = "scripted"
+    temperature: float = 0.0
+    answers: List[str] = ["Yes! Which outlet are you referring to?", "The SS 2 outlet is open from 9am."]
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any):
+        answer = self.answers[len(UPSTREAM_CALLS) % len(self.answers)]
+        UPSTREAM_CALLS.append(messages[-1].content)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=answer))])
+
+
+@pytest.fixture(autouse=True)
+def isolated_registry(monkeypatch):
+    monkeypatch.setattr(llm_clients, "registry", llm_clients.registry)
+    monkeypatch.setattr(suite, "_cassette", None)
+    UPSTREAM_CALLS.clear()
+
+
+def test_check_turn():
+    turn = {"expect_all": ["open"], "expect_any": ["ss2", "ss 2"], "expect_tools": ["Calculator"]}
+    assert suite.check_turn(turn, "SS 2 is OPEN at 9", ["Calculator"]) == []
+    assert suite.check_turn(turn, "closed", []) == ["missing 'open'", "none of ['ss2', 'ss 2']", "tool 'Calculator' not used"]
+
+
+def test_record_then_replay_conversation(tmp_path):
+    suite.configure_llm("record", inner_factory=ScriptedModel)
+    recorded = suite.run_scenario(PART1_SCENARIO)
+    assert recorded["passed"], recorded
+    assert [t["llm_calls"] for t in recorded["turns"]] == [1, 1]
+    assert len(recorded["recorded"]) == 2
+
+    recordings = tmp_path / "recordings.json"
+    recordings.write_text(json.dumps(recorded["recorded"]))
+    suite.configure_llm("replay", str(recordings))
+    replayed = suite.run_scenario(PART1_SCENARIO)
+    assert replayed["passed"], replayed
+    assert [t["answer"] for t in replayed["turns"]] == [t["answer"] for t in recorded["turns"]]
+    assert len(UPSTREAM_CALLS) == 2  # only the recording run reached the model
+
+
+def test_replay_without_recording_is_an_error(tmp_path):
+    suite.configure_llm("replay", str(tmp_path / "missing.json"))
+    result = suite.run_scenario(PART1_SCENARIO)
+    assert not result["passed"]
+    assert result["error"] == "2 LLM prompt(s) had no recording"
+
+
+def test_tool_scenarios_run_in_a_process_pool(tmp_path):
+    scenarios = [s for s in suite.load_scenarios() if s["target"] == "tool"]
+    report = suite.run_suite(scenarios, llm="replay", workers=2, recordings_path=str(tmp_path / "none.json"))
+    summary = report["summary"]
+    assert summary["scenarios"] == len(scenarios)
+    assert summary["pass_rate"] == 1.0
+    assert summary["llm_calls"] == 0
+    assert summary["tool_usage"]["Calculator"] >= 3
+    assert all(t["latency_ms"] >= 0 for r in report["scenarios"] for t in r["turns"])
+
+
+def test_scenario_file_is_well_formed():
+    scenarios = suite.load_scenarios()
+    assert len({s["id"] for s in scenarios}) == len(scenarios)
+    tools = suite._tools()
+    for scenario in scenarios:
+        assert scenario["target"] in ("part1", "part2", "part3", "part4", "tool")
+        assert scenario["target"] != "tool" or scenario["tool"] in tools
+        assert scenario["turns"] and all("user" in turn for turn in scenario["turns"])
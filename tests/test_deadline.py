@@ -0,0 +1,78 @@
+import contextvars
+from typing import Any, List, Optional
+
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from app.deadline import (
+    Deadline,
+    DeadlineExceeded,
+    bounded_timeout,
+    check_deadline,
+    current_deadline,
+    deadline_scope,
+    iterate_with_deadline,
+)
+from app.single_flight import SingleFlightChatModel
+
+
+class RecordingModel(BaseChatModel):
+    temperature: float = 0.0
+    timeouts: List[Optional[float]] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "recording"
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any):
+        self.timeouts.append(kwargs.get("timeout"))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="ok"))])
+
+
+def test_scope_nesting_never_extends_deadline():
+    assert current_deadline() is None
+    assert bounded_timeout(5.0) == 5.0
+    with deadline_scope(1.0) as outer:
+        with deadline_scope(60.0) as inner:
+            assert inner is outer
+            assert bounded_timeout(5.0) <= 1.0
+        with deadline_scope(0.0):
+            with pytest.raises(DeadlineExceeded):
+                check_deadline("test")
+    assert current_deadline() is None
+
+
+def test_llm_calls_get_the_remaining_budget_as_timeout():
+    inner = RecordingModel(timeouts=[])
+    llm = SingleFlightChatModel(inner=inner)
+    llm.invoke([HumanMessage(content="no deadline")])
+    with deadline_scope(2.0):
+        llm.invoke([HumanMessage(content="with deadline")])
+    with deadline_scope(0.0):
+        with pytest.raises(DeadlineExceeded):
+            llm.invoke([HumanMessage(content="too late")])
+
+    assert inner.timeouts[0] is None
+    assert 0 < inner.timeouts[1] <= 2.0
+    assert len(inner.timeouts) == 2
+
+
+def test_generator_sees_deadline_when_driven_from_fresh_contexts():
+    seen = []
+
+    def steps():
+        for i in range(3):
+            seen.append(current_deadline())
+            yield i
+
+    deadline = Deadline(5.0)
+    events = iterate_with_deadline(steps(), deadline)
+    # Like a streaming response, advance the generator from a new context each time
+    while True:
+        try:
+            contextvars.Context().run(next, events)
+        except StopIteration:
+            break
+    assert seen == [deadline] * 3
@@ -0,0 +1,80 @@
+import threading
+
+import numpy as np
+import pytest
+
+from app.embeddings import QueryBatcher
+
+faiss = pytest.importorskip("faiss")
+
+VOCAB = ["tumbler", "mug", "bottle", "cup", "straw", "lid", "flask", "glass"]
+
+
+class FakeEmbedder:
+    """One-hot bag of words; records the size of every encode call."""
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def encode(self, texts):
+        with self.lock:
+            self.calls.append(len(texts))
+        out = np.zeros((len(texts), len(VOCAB)), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.split():
+                if word in VOCAB:
+                    out[row, VOCAB.index(word)] = 1.0
+        return out
+
+
+def make_index():
+    index = faiss.IndexFlatL2(len(VOCAB))
+    index.add(np.eye(len(VOCAB), dtype=np.float32))
+    return index
+
+
+def test_concurrent_queries_are_batched_and_resolved_individually():
+    embedder = FakeEmbedder()
+    batcher = QueryBatcher(embedder, make_index(), max_batch=16, max_wait_ms=50)
+    results = {}
+    barrier = threading.Barrier(len(VOCAB))
+
+    def worker(word):
+        barrier.wait()
+        results[word] = batcher.search(word, top_k=1 + VOCAB.index(word) % 3)
+
+    threads = [threading.Thread(target=worker, args=(w,)) for w in VOCAB]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for word, (D, I) in results.items():
+        assert I[0] == VOCAB.index(word)
+        assert len(I) == len(D) == 1 + VOCAB.index(word) % 3
+    assert len(embedder.calls) < len(VOCAB)
+
+    stats = batcher.stats()
+    assert stats["queries"] == len(VOCAB)
+    assert stats["mean_batch_size"] > 1
+    assert stats["queue_delay_ms"]["max"] >= 0
+
+
+def test_batch_errors_reach_every_caller():
+    class Broken(FakeEmbedder):
+        def encode(self, texts):
+            raise RuntimeError("model crashed")
+
+    batcher = QueryBatcher(Broken(), make_index(), max_batch=4, max_wait_ms=1)
+    with pytest.raises(RuntimeError, match="model crashed"):
+        batcher.search("mug", top_k=1)
+
+
+def test_max_batch_one_runs_inline():
+    embedder = FakeEmbedder()
+    batcher = QueryBatcher(embedder, make_index(), max_batch=1)
+    D, I = batcher.search("flask", top_k=2)
+    assert I[0] == VOCAB.index("flask")
+    assert embedder.calls == [1]
+    assert batcher.stats()["batch_size_histogram"] == {1: 1}
@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+from app.embeddings import BENCH_QUERIES, ONNX_FILES, ONNX_MODEL_DIR, cosine_drift
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("sentence_transformers")
+if not os.path.exists(os.path.join(ONNX_MODEL_DIR, "tokenizer.json")):
+    pytest.skip("Run python -m data_ingestion.export_onnx_embedder first", allow_module_level=True)
+
+# The FAISS index was built with the torch model; ONNX query vectors must stay close to it
+MIN_COSINE = {"onnx": 0.99, "onnx-int8": 0.97}
+
+
+@pytest.fixture(scope="module")
+def reference():
+    from app.embeddings import TorchEmbedder
+    try:
+        return TorchEmbedder().encode(BENCH_QUERIES)
+    except OSError as e:
+        pytest.skip(f"sentence-transformers model unavailable: {e}")
+
+
+@pytest.mark.parametrize("backend", ["onnx", "onnx-int8"])
+def test_onnx_embeddings_match_torch(reference, backend):
+    if not os.path.exists(os.path.join(ONNX_MODEL_DIR, ONNX_FILES[backend])):
+        pytest.skip("Run python -m data_ingestion.export_onnx_embedder first")
+    from app.embeddings import OnnxEmbedder
+
+    candidate = OnnxEmbedder(backend).encode(BENCH_QUERIES)
+    assert candidate.shape == reference.shape
+    assert min(cosine_drift(reference, candidate)) >= MIN_COSINE[backend]
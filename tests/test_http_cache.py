@@ -0,0 +1,58 @@
+import pytest
+from data_ingestion import http_cache
+
+
+class FakeResponse:
+    def __init__(self, status_code, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.sent_headers = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.sent_headers.append(headers or {})
+        return self.responses.pop(0)
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cache, "CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_conditional_get_reuses_parsed_result():
+    url = "https://example.com/products/cup"
+    session = FakeSession([
+        FakeResponse(200, "<html>cup</html>", {"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}),
+        FakeResponse(304),
+    ])
+
+    first = http_cache.fetch(url, session=session)
+    assert first.status == 200 and not first.not_modified
+    http_cache.store_parsed(url, {"name": "Cup"})
+
+    second = http_cache.fetch(url, session=session)
+    assert second.not_modified
+    assert second.text == "<html>cup</html>"
+    assert second.parsed == {"name": "Cup"}
+    assert session.sent_headers[1]["If-None-Match"] == '"v1"'
+    assert "If-Modified-Since" in session.sent_headers[1]
+
+
+def test_offline_replay_without_cache_raises():
+    with pytest.raises(FileNotFoundError):
+        http_cache.fetch("https://example.com/missing", offline=True)
+
+
+def test_offline_replay_serves_cached_body():
+    url = "https://example.com/collections/drinkware"
+    http_cache.fetch(url, session=FakeSession([FakeResponse(200, "<html>list</html>")]))
+
+    page = http_cache.fetch(url, offline=True)
+    assert page.not_modified
+    assert page.text == "<html>list</html>"
@@ -0,0 +1,178 @@
+from typing import Any, List, Optional
+
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from app.deadline import DeadlineExceeded, deadline_scope
+from app.llm_clients import LLMRegistry, RateLimitedChatModel, RetryPolicy, TokenBucket, is_transient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept: List[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class QuotaError(Exception):
+    code = 429
+
+
+class FlakyModel(BaseChatModel):
+    """Fails with the queued errors first, then echoes."""
+
+    model: str = "fake-model"
+    temperature: float = 0.0
+    errors: List[Any] = []
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "flaky"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=f"t={self.temperature}"))])
+
+
+def test_token_bucket_allows_burst_then_paces():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_s=2, capacity=3, clock=clock, sleep=clock.sleep)
+    assert [bucket.acquire() for _ in range(3)] == [0, 0, 0]
+    # Queued callers reserve successive slots instead of all waking at once
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert bucket.stats()["throttled"] == 2
+
+
+def test_token_bucket_rejects_waits_past_timeout():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_s=1, capacity=1, clock=clock, sleep=clock.sleep)
+    bucket.acquire()
+    with pytest.raises(DeadlineExceeded):
+        bucket.acquire(timeout=0.5)
+    assert bucket.stats()["rejected"] == 1
+    assert bucket.acquire(timeout=1.0) == pytest.approx(1.0)
+
+
+def test_is_transient():
+    assert is_transient(QuotaError())
+    assert is_transient(ConnectionError())
+    assert not is_transient(ValueError("bad prompt"))
+    assert not is_transient(DeadlineExceeded("late"))
+
+
+def test_retry_policy_backs_off_with_jitter():
+    clock = FakeClock()
+    policy = RetryPolicy(max_retries=3, base_s=1, max_s=3, rng=lambda: 0.5, sleep=clock.sleep)
+    errors = [QuotaError(), QuotaError(), QuotaError()]
+
+    def call():
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    assert policy.run(call) == "ok"
+    assert clock.slept == [0.5, 1.0, 1.5]  # half of min(3, 1 * 2**attempt)
+    assert policy.stats() == {"calls": 1, "retries": 3, "gave_up": 0}
+
+
+def test_retry_policy_gives_up():
+    policy = RetryPolicy(max_retries=1, base_s=0.01, sleep=lambda s: None)
+    with pytest.raises(QuotaError):
+        policy.run(lambda: (_ for _ in ()).throw(QuotaError()))
+    with pytest.raises(ValueError):
+        policy.run(lambda: (_ for _ in ()).throw(ValueError("not transient")))
+    assert policy.stats()["gave_up"] == 1
+    assert policy.stats()["retries"] == 1
+
+
+def test_retry_policy_stops_at_deadline():
+    policy = RetryPolicy(max_retries=5, base_s=10, max_s=10, rng=lambda: 1.0, sleep=lambda s: pytest.fail("slept past deadline"))
+    with deadline_scope(1):
+        with pytest.raises(QuotaError):
+            policy.run(lambda: (_ for _ in ()).throw(QuotaError()))
+
+
+def test_rate_limited_model_retries_and_spends_a_token_per_attempt():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_s=100, capacity=5, clock=clock, sleep=clock.sleep)
+    inner = FlakyModel(errors=[QuotaError()])
+    llm = RateLimitedChatModel(inner=inner, limiter=bucket, retry=RetryPolicy(base_s=0.01, sleep=clock.sleep))
+    assert llm.invoke([HumanMessage(content="hi")]).content == "t=0.0"
+    assert inner.calls == 2
+    assert bucket.stats()["acquired"] == 2
+
+
+def test_registry_shares_base_client_per_role():
+    built = []
+
+    def factory():
+        built.append(1)
+        return FlakyModel()
+
+    registry = LLMRegistry(factory=factory, rpm=600)
+    summary, agent = registry.get("summary"), registry.get("agent")
+    assert registry.get("summary") is summary
+    assert len(built) == 1
+    assert summary.invoke("q").content == "t=0.0"
+    assert agent.invoke("q").content == "t=0.2"
+    assert registry.get("agent", temperature=0.5).invoke("q").content == "t=0.5"
+    assert registry.stats()["rate_limiter"]["acquired"] == 3
+
+    with pytest.raises(ValueError):
+        registry.get("poetry")
+
+
+def test_registry_reset_splits_quota():
+    registry = LLMRegistry(factory=FlakyModel, rpm=600)
+    before = registry.get("sql")
+    registry.reset(share=4)
+    assert registry.get("sql") is not before
+    assert registry.stats()["rate_limiter"]["rate_per_min"] == pytest.approx(150)
+
+
+def test_registry_clients_still_single_flight():
+    registry = LLMRegistry(factory=FlakyModel, rpm=600)
+    messages = [HumanMessage(content="hi")]
+    assert registry.get("summary").flight_key(messages) is not None
+    assert registry.get("agent").flight_key(messages) is None  # sampled, never collapsed
+
+
+def test_gemini_client_sends_each_attempt_once_through_the_limiter():
+    import google.api_core.exceptions
+    from google.ai.generativelanguage_v1beta.types import Candidate, Content, GenerateContentResponse, Part
+
+    from app.gemini_client import SingleAttemptGemini
+
+    class FakeTransport:
+        def __init__(self):
+            self.calls = []
+            self.errors = [google.api_core.exceptions.ResourceExhausted("quota")]
+
+        def generate_content(self, request, **kwargs):
+            self.calls.append(kwargs)
+            if self.errors:
+                raise self.errors.pop(0)
+            return GenerateContentResponse(candidates=[Candidate(content=Content(parts=[Part(text="ok")], role="model"))])
+
+    transport = FakeTransport()
+    gemini = SingleAttemptGemini(model="gemini-2.5-flash", google_api_key="test-key").model_copy(update={"client": transport})
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_s=100, capacity=5, clock=clock, sleep=clock.sleep)
+    llm = RateLimitedChatModel(inner=gemini, limiter=bucket, retry=RetryPolicy(base_s=0.01, sleep=clock.sleep))
+
+    assert llm.invoke([HumanMessage(content="hi")]).content == "ok"
+    assert len(transport.calls) == 2  # the 429 was retried once, by RetryPolicy only
+    assert all(call["retry"] is None for call in transport.calls)
+    assert bucket.stats()["acquired"] == 2
@@ -0,0 +1,75 @@
+import io
+import json
+import logging
+import logging.handlers
+import queue
+
+from app.logging_setup import ContextFilter, JsonFormatter, _QueueHandler, log_context, log_payload
+
+
+def make_logger(name: str):
+    """Logger -> queue handler -> listener -> JSON stream, like configure_logging but isolated."""
+    stream = io.StringIO()
+    stream_handler = logging.StreamHandler(stream)
+    stream_handler.setFormatter(JsonFormatter())
+    log_queue = queue.Queue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+
+    logger = logging.getLogger(name)
+    logger.handlers = [queue_handler]
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    return logger, listener, stream
+
+
+def read_records(listener, stream):
+    listener.start()
+    listener.stop()  # drains the queue
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_records_are_json_with_request_context():
+    logger, listener, stream = make_logger("test.json")
+    with log_context(request_id="req-1", session_id="sess-1"):
+        logger.info("hello %s", "world", extra={"duration_ms": 1.5})
+    logger.warning("outside")
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("failed")
+
+    first, second, third = read_records(listener, stream)
+    assert first["msg"] == "hello world"
+    assert first["request_id"] == "req-1" and first["session_id"] == "sess-1"
+    assert first["duration_ms"] == 1.5
+    assert "request_id" not in second
+    assert "ValueError: boom" in third["exc"]
+
+
+def test_payloads_are_sampled_per_request_and_built_lazily():
+    logger, listener, stream = make_logger("test.sampling")
+    built = []
+
+    def payload():
+        built.append(1)
+        return {"rows": list(range(5000))}
+
+    with log_context(request_id="skipped", sample_rate=0.0):
+        log_payload(logger, "raw rows", payload)
+    with log_context(request_id="kept", sample_rate=1.0):
+        log_payload(logger, "raw rows", payload)
+
+    records = read_records(listener, stream)
+    assert len(built) == 1
+    assert [r["request_id"] for r in records] == ["kept"]
+    assert records[0]["payload"].endswith("chars)")  # truncated
+
+
+def test_payloads_skipped_when_debug_disabled():
+    logger, listener, stream = make_logger("test.level")
+    logger.setLevel(logging.INFO)
+    with log_context(sample_rate=1.0):
+        log_payload(logger, "raw rows", lambda: 1 / 0)
+    assert read_records(listener, stream) == []
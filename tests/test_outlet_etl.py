@@ -0,0 +1,52 @@
+import csv
+import os
+import shutil
+import sqlite3
+from data_ingestion.outlet_etl import export_csv, import_csv
+
+
+def test_import_export_round_trip(tmp_path):
+    src = tmp_path / "outlets.csv"
+    db = tmp_path / "outlets.db"
+    out = tmp_path / "export.csv"
+
+    with open(src, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "address", "hours", "services"])
+        writer.writerow(["1", "ZUS Coffee – SS 2 ", "Jalan SS 2/55, Petaling Jaya", "Daily 8am-9:40pm", "Dine-in"])
+        writer.writerow(["2", "ZUS Coffee - SS 2", "Jalan SS 2/55, Petaling Jaya", "", ""])
+        writer.writerow(["3", "ZUS Coffee - Bangsar", "Jalan Telawi, Bangsar", "Daily 7am-10:40pm", "Takeaway"])
+
+    assert import_csv(str(src), str(db), chunk_size=2) == 3
+    assert export_csv(str(out), str(db), chunk_size=1) == 2
+
+    with open(out, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+
+    assert rows[0]["name"] == "ZUS Coffee - SS 2"
+    assert rows[0]["hours"] == "Daily 8am-9:40pm"
+    assert rows[1]["services"] == "Takeaway"
+
+
+def test_reimporting_an_export_keeps_row_count(tmp_path):
+    db = tmp_path / "outlets.db"
+    out = tmp_path / "export.csv"
+    shutil.copy(os.path.join("data", "outlets.db"), db)
+    before = sqlite3.connect(db).execute("SELECT COUNT(*) FROM outlets").fetchone()[0]
+
+    export_csv(str(out), str(db))
+    import_csv(str(out), str(db))
+
+    assert sqlite3.connect(db).execute("SELECT COUNT(*) FROM outlets").fetchone()[0] == before
+
+
+def test_import_leaves_rollback_journal(tmp_path):
+    src = tmp_path / "outlets.csv"
+    db = tmp_path / "outlets.db"
+    with open(src, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows([["name", "address"], ["ZUS Coffee - Bangsar", "Jalan Telawi, Bangsar"]])
+
+    import_csv(str(src), str(db))
+
+    assert sqlite3.connect(db).execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    assert not os.path.exists(f"{db}-wal")
@@ -0,0 +1,40 @@
+import random
+from app.outlet_geo import KDTree, OutletGeoIndex, find_place, haversine_km
+
+
+def test_find_place_prefers_most_specific_match():
+    assert find_place("Nearest ZUS to Setia Alam")["name"] == "Setia Alam"
+    assert find_place("Jalan Setia Murni U13/51, Setia Alam Seksyen U13, 40170 Shah Alam")["name"] == "Setia Alam"
+    assert find_place("No 5, Jalan Test, 40150 Shah Alam, Selangor")["name"] == "40150"
+    assert find_place("Anything in ss2?")["name"] == "SS 2"
+    assert find_place("Is there an outlet in Antarctica?") is None
+
+
+def test_kdtree_matches_brute_force():
+    rng = random.Random(42)
+    points = [(rng.uniform(2.7, 3.4), rng.uniform(101.3, 101.9), i) for i in range(500)]
+    tree = KDTree(points)
+
+    for _ in range(20):
+        lat, lon = rng.uniform(2.7, 3.4), rng.uniform(101.3, 101.9)
+        expected = sorted(points, key=lambda p: haversine_km(lat, lon, p[0], p[1]))[:5]
+        got = [payload for _, payload in tree.nearest(lat, lon, 5)]
+        assert got[:3] == [p[2] for p in expected[:3]]
+
+        radius = 10
+        brute = {p[2] for p in points if haversine_km(lat, lon, p[0], p[1]) <= radius * 0.99}
+        assert brute <= {payload for _, payload in tree.within(lat, lon, radius)}
+
+
+def test_index_nearest_and_radius():
+    index = OutletGeoIndex([
+        {"name": "Setia Alam", "address": "", "hours": None, "services": None, "lat": 3.108, "lon": 101.462},
+        {"name": "Shah Alam", "address": "", "hours": None, "services": None, "lat": 3.073, "lon": 101.518},
+        {"name": "Bangsar", "address": "", "hours": None, "services": None, "lat": 3.129, "lon": 101.679},
+    ])
+
+    nearest = index.nearest(3.108, 101.462, k=2)
+    assert [o["name"] for o in nearest] == ["Setia Alam", "Shah Alam"]
+    assert nearest[0]["distance_km"] == 0
+
+    assert [o["name"] for o in index.within(3.129, 101.679, 5)] == ["Bangsar"]
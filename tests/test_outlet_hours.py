@@ -0,0 +1,90 @@
+import random
+from datetime import datetime
+from app.outlet_hours import (
+    MALAYSIA_TZ, HoursIndex, mentioned_outlet, mentions_place, names_an_outlet, outlet_aliases, parse_hours, resolve_query_time,
+)
+
+
+def test_parse_daily_hours():
+    intervals = parse_hours("Daily 8am-11:40pm")
+    assert len(intervals) == 7
+    assert intervals[0] == (0, 480, 1420)
+
+
+def test_parse_weekend_off_and_minute_typo():
+    intervals = parse_hours("Daily 9am-5:100pm, Weekend off")
+    assert {day for day, _, _ in intervals} == {0, 1, 2, 3, 4}
+    assert intervals[0] == (0, 540, 1020)
+
+
+def test_parse_day_ranges_overnight_and_24_hours():
+    assert parse_hours("Mon-Fri 8am-10pm, Sat-Sun 9am-6pm")[-1] == (6, 540, 1080)
+    assert (1, 0, 120) in parse_hours("Mon 6pm-2am")
+    assert parse_hours("24 hours") == [(day, 0, 1440) for day in range(7)]
+    assert parse_hours("N/A") == []
+
+
+def test_index_matches_brute_force():
+    rng = random.Random(7)
+    intervals = {}
+    for oid in range(200):
+        start = rng.randrange(0, 1200, 10)
+        intervals[oid] = [(day, start, start + rng.randrange(60, 240, 10)) for day in range(7) if rng.random() > 0.2]
+    index = HoursIndex({oid: {"name": str(oid), "address": "", "hours": ""} for oid in intervals}, intervals)
+
+    for _ in range(200):
+        day, minute = rng.randrange(7), rng.randrange(1440)
+        expected = sorted(oid for oid, ivs in intervals.items() if any(d == day and s <= minute < e for d, s, e in ivs))
+        assert index.open_at(day, minute) == expected
+
+
+def test_resolve_query_time():
+    now = datetime(2026, 10, 19, 15, 30, tzinfo=MALAYSIA_TZ)  # Monday
+    assert resolve_query_time("open now?", now) == (0, 930)
+    assert resolve_query_time("open at 10pm on Sunday?", now) == (6, 1320)
+    assert resolve_query_time("open tomorrow at 7am", now) == (1, 420)
+    assert resolve_query_time("Is Mont Kiara open now?", now) == (0, 930)
+
+
+def test_place_matches_whole_tokens():
+    assert mentions_place("SS 2", "12, Jalan SS2/64, 47300 Petaling Jaya")
+    assert not mentions_place("SS 2", "44-G, JALAN SS21/39, DAMANSARA UTAMA")
+    assert not mentions_place("SS 2", "Kiosk CK9, Jalan SS 22/23, Damansara Jaya")
+    assert mentions_place("shah  alam", "Seksyen 13, 40100 Shah Alam, Selangor")
+    assert mentions_place("Seksyen 3", "47-G, Jalan 3/69, Seksyen 3, 43650 Bandar Baru Bangi")
+    assert not mentions_place("Seksyen 3", "Giant Shah Alam Stadium, Persiaran Sukan, Seksyen 13")
+
+
+def test_named_outlet_questions():
+    assert outlet_aliases("ZUS Coffee - Spectrum Shopping Mall")[-1] == "spectrum"
+    assert mentioned_outlet("Is the Spectrum outlet open now?") == "spectrum"
+    assert mentioned_outlet("Is the SS 2 outlet open now?") is None
+    assert names_an_outlet("Is the SS 2 outlet open now?")
+    assert not names_an_outlet("Which outlets are open now?")
+    assert not names_an_outlet("Is there a ZUS outlet open at 11pm?")
+    assert not names_an_outlet("Is the store open now?")
+    assert not names_an_outlet("Is your nearest outlet open now?")
+    assert names_an_outlet("Is the Mont Kiara branch open now?")
+    assert names_an_outlet("Is Sunway Pyramid open now?")
+
+
+def test_unknown_outlet_is_left_to_sql_path():
+    from chatbot_app.tools.outlets import opening_hours_answer
+
+    assert opening_hours_answer("Is the Spectrum outlet open now?").startswith("name: ZUS Coffee - Spectrum Shopping Mall,")
+    assert opening_hours_answer("Is the SS 2 outlet open now?") is None
+    assert opening_hours_answer("Is the store open now?") is not None
+
+
+def test_place_lookups_use_the_index():
+    outlets = {
+        1: {"name": "ZUS Coffee - Uptown Damansara", "address": "44-G, JALAN SS21/39, 47400 Petaling Jaya", "hours": ""},
+        2: {"name": "ZUS Coffee - SS 2", "address": "12, Jalan SS2/64, 47300 Petaling Jaya", "hours": ""},
+        3: {"name": "ZUS Coffee - Spectrum Shopping Mall", "address": "Jalan Wawasan Ampang, 68000 Ampang", "hours": ""},
+    }
+    index = HoursIndex(outlets, {})
+    assert index.outlets_at("SS 2") == [2]
+    assert index.outlets_at("petaling  jaya") == [1, 2]
+    assert index.outlets_at("12, Jalan SS2/64, 47300 Petaling Jaya") == [2]  # longer than the indexed runs
+    assert index.alias_in("Is the Spectrum outlet open now?") == "spectrum"
+    assert index.alias_in("Is the uptown damansara outlet open?") == "uptown damansara"
@@ -0,0 +1,60 @@
+import sqlite3
+from data_ingestion.outlet_schema import migrate, normalize_row, upsert_outlets
+
+
+def test_upsert_is_idempotent():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+
+    rows = [
+        normalize_row("ZUS Coffee - SS 2", "Jalan SS 2/55,  Petaling Jaya", "Daily 8am-9:40pm", "Dine-in"),
+        normalize_row("ZUS Coffee - Bangsar", "Jalan Telawi, Bangsar"),
+    ]
+    upsert_outlets(conn, rows)
+    upsert_outlets(conn, rows, batch_size=1)
+
+    # Same outlet, different casing/spacing and no hours: updates in place and keeps the hours
+    upsert_outlets(conn, [normalize_row("zus coffee - ss 2", "Jalan SS 2/55, Petaling  Jaya")])
+
+    result = conn.execute("SELECT name, hours, services FROM outlets ORDER BY id").fetchall()
+    assert len(result) == 2
+    assert result[0] == ("zus coffee - ss 2", "Daily 8am-9:40pm", "Dine-in")
+
+
+def test_migrate_legacy_scraper_table():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""
+        CREATE TABLE outlets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            address TEXT,
+            hours TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO outlets (name, address, hours) VALUES (?, ?, ?)",
+        [("ZUS Coffee - Bangsar", "Jalan Telawi", "N/A")] * 3,
+    )
+    conn.commit()
+
+    migrate(conn)
+
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(outlets)")]
+    assert "services" in columns
+    assert conn.execute("SELECT COUNT(*) FROM outlets").fetchone()[0] == 1
+
+
+def test_migrate_normalizes_existing_rows():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    conn.executemany(
+        "INSERT INTO outlets (name, address) VALUES (?, ?)",
+        [("ZUS Coffee - Jabatan Peguam Negara,  Putrajaya", "Persint 4,  Putrajaya"), ("ZUS Coffee - Bangsar", "Jalan Telawi")],
+    )
+    conn.commit()
+
+    migrate(conn)
+    upsert_outlets(conn, [normalize_row("ZUS Coffee - Jabatan Peguam Negara, Putrajaya", "Persint 4, Putrajaya", "Daily 8am-5pm")])
+
+    result = conn.execute("SELECT name, hours FROM outlets ORDER BY id").fetchall()
+    assert result == [("ZUS Coffee - Jabatan Peguam Negara, Putrajaya", "Daily 8am-5pm"), ("ZUS Coffee - Bangsar", None)]
@@ -0,0 +1,58 @@
+import json
+import sqlite3
+import pytest
+
+from app import text2sql_outlets
+
+
+@pytest.fixture
+def outlets_db(tmp_path, monkeypatch):
+    db_path = tmp_path / "outlets.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE outlets (id INTEGER PRIMARY KEY, name TEXT, address TEXT, hours TEXT, services TEXT)")
+    conn.executemany(
+        "INSERT INTO outlets (name, address, hours, services) VALUES (?, ?, ?, ?)",
+        [(f"ZUS Coffee - Outlet {i}", f"{i} Jalan Test, Selangor", "Daily 8am-9:40pm", "Dine-in") for i in range(25)],
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(text2sql_outlets, "DB_PATH", str(db_path))
+    monkeypatch.setattr(text2sql_outlets, "generate_sql_query", lambda q: "SELECT name, address FROM outlets;")
+
+
+def test_pages_follow_cursor_without_regenerating_sql(outlets_db, monkeypatch):
+    first = text2sql_outlets.query_outlets_from_db("List all outlets", limit=10)
+    assert len(first["result"]) == 10
+    assert first["total"] == 25
+    assert first["next_cursor"]
+
+    # Later pages must not call the LLM again
+    monkeypatch.setattr(text2sql_outlets, "generate_sql_query", lambda q: pytest.fail("SQL regenerated"))
+    second = text2sql_outlets.query_outlets_from_db("List all outlets", limit=10, cursor=first["next_cursor"])
+    third = text2sql_outlets.query_outlets_from_db("List all outlets", limit=10, cursor=second["next_cursor"])
+
+    assert second["result"][0]["name"] == "ZUS Coffee - Outlet 10"
+    assert len(third["result"]) == 5
+    assert third["next_cursor"] is None
+
+
+def test_limit_is_capped(outlets_db):
+    result = text2sql_outlets.query_outlets_from_db("List all outlets", limit=10_000)
+    assert result["limit"] == text2sql_outlets.MAX_LIMIT
+
+
+def test_tampered_cursor_is_rejected(outlets_db):
+    cursor = text2sql_outlets.encode_cursor("SELECT name FROM outlets", 0)
+    signature = cursor.rsplit(".", 1)[1]
+    forged = text2sql_outlets.encode_cursor("SELECT sql FROM sqlite_master", 0).rsplit(".", 1)[0] + "." + signature
+
+    assert "error" in text2sql_outlets.query_outlets_from_db("x", cursor=forged)
+
+
+def test_stream_yields_ndjson_and_truncates(outlets_db):
+    lines = list(text2sql_outlets.stream_outlets_from_db("List all outlets", max_rows=5))
+    records = [json.loads(line) for line in lines]
+
+    assert len(records) == 6
+    assert records[0]["name"] == "ZUS Coffee - Outlet 0"
+    assert records[-1] == {"truncated": True, "max_rows": 5}
@@ -0,0 +1,20 @@
+import subprocess
+import sys
+
+from app.prefork import threads_per_worker
+
+
+def test_threads_per_worker(monkeypatch):
+    monkeypatch.delenv("TORCH_THREADS_PER_WORKER", raising=False)
+    monkeypatch.setattr("os.cpu_count", lambda: 8)
+    assert threads_per_worker(4) == 2
+    assert threads_per_worker(16) == 1
+    monkeypatch.setenv("TORCH_THREADS_PER_WORKER", "3")
+    assert threads_per_worker(4) == 3
+
+
+def test_after_fork_does_not_import_torch():
+    # ONNX workers must not pay for the torch runtime
+    script = "import sys; from app.prefork import after_fork; after_fork(2); assert 'torch' not in sys.modules"
+    proc = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
@@ -0,0 +1,51 @@
+from app.product_context import FIELDS, build_prompt, context_report, estimate_tokens, format_results, select_fields
+
+CUP = {
+    "name": "ZUS All Day Cup 500ml",
+    "price": "RM79.00",
+    "variations": ["Mountain Collection", "Sunset Collection"],
+    "product_info": ["BPA Free", "Double-wall insulated"],
+    "measurements": {"Volume": "500ml", "Height": "19cm", "Heat retention": "6 hours"},
+    "materials": {"Inner body": "SUS304", "Lid": "PP"},
+    "url": "https://shop.zuscoffee.com/all-day-cup",
+}
+
+
+def test_select_fields_by_question():
+    assert select_fields("How much is the All Day Cup?") == ["price"]
+    assert select_fields("Which tumblers are BPA free?") == ["info", "materials"]
+    assert select_fields("What colours does it come in?") == ["variations"]
+    assert select_fields("How big is it and how much?") == ["price", "volume", "height"]
+
+
+def test_select_fields_falls_back_to_everything():
+    assert select_fields("Tell me about the All Day Cup") == FIELDS
+
+
+def test_select_fields_does_not_prune_on_incidental_words():
+    assert select_fields("Do you have any mugs under the ZUS brand?") == FIELDS
+    assert select_fields("What options do you have for tumblers?") == FIELDS
+    assert select_fields("Which cups does ZUS keep in stock?") == FIELDS
+    assert select_fields("Which cups cost under RM 50?") == ["price"]
+    assert select_fields("Anything under 40?") == ["price"]
+
+
+def test_format_results_is_compact_and_stable():
+    text = format_results([CUP], ["price", "materials"])
+    assert text == "- ZUS All Day Cup 500ml | Price: RM79.00 | Material: Inner body SUS304, Lid PP"
+    # Render order comes from select_fields, so the same question always yields the same prompt
+    assert format_results([CUP], select_fields("price and material?")) == format_results([CUP], select_fields("material and price?"))
+
+
+def test_context_report_counts_fewer_tokens_when_pruned():
+    report = context_report("How much is it?", [CUP, CUP, CUP])
+    assert report["fields"] == ["price"]
+    assert report["prompt_tokens"] < report["prompt_tokens_full"]
+
+    full = context_report("Tell me about it", [CUP])
+    assert full["prompt_tokens"] == full["prompt_tokens_full"]
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 1
+    assert estimate_tokens(build_prompt("q", "x" * 400)) > 100
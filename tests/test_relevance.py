@@ -0,0 +1,37 @@
+import pytest
+
+from app.relevance import DEFAULT_MAX_DISTANCE, fit_cutoff, load_cutoff, read_labels
+
+
+def test_fit_cutoff_separates_classes():
+    distances = [0.4, 0.6, 0.7, 1.1, 1.5, 1.6]
+    labels = [True, True, True, True, False, False]
+    cutoff, stats = fit_cutoff(distances, labels)
+    assert 1.1 < cutoff < 1.5
+    assert stats["f1"] == pytest.approx(1.0)
+
+
+def test_fit_cutoff_prefers_recall_on_ties():
+    # One irrelevant query sits among the relevant ones; losing a real question costs more
+    distances = [0.5, 0.8, 0.9, 1.2, 1.7]
+    labels = [True, False, True, True, False]
+    cutoff, stats = fit_cutoff(distances, labels)
+    assert 1.2 < cutoff < 1.7
+    assert stats["recall"] == pytest.approx(1.0)
+
+
+def test_load_cutoff_sources(tmp_path, monkeypatch):
+    monkeypatch.delenv("RAG_MAX_DISTANCE", raising=False)
+    assert load_cutoff(str(tmp_path / "missing.json")) == DEFAULT_MAX_DISTANCE
+
+    path = tmp_path / "cutoff.json"
+    path.write_text('{"max_distance": 1.23}')
+    assert load_cutoff(str(path)) == 1.23
+
+    monkeypatch.setenv("RAG_MAX_DISTANCE", "0.9")
+    assert load_cutoff(str(path)) == 0.9
+
+
+def test_shipped_label_set_has_both_classes():
+    labels = [relevant for _, relevant in read_labels()]
+    assert any(labels) and not all(labels)
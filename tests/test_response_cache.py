@@ -0,0 +1,110 @@
+import os
+
+import pytest
+from fastapi import FastAPI, Query
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from app.response_cache import CacheRule, ResponseCache, etag_matches, normalize_params
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Question(BaseModel):
+    question: str
+
+
+@pytest.fixture
+def served(tmp_path):
+    data = tmp_path / "outlets.db"
+    data.write_text("v1")
+    calls = []
+    clock = FakeClock()
+    rule = CacheRule(files=(str(data),))
+    cache = ResponseCache({("GET", "/products"): rule, ("POST", "/outlets"): rule}, ttl_s=60, enabled=True, clock=clock)
+
+    app = FastAPI()
+    app.middleware("http")(cache)
+
+    @app.get("/products")
+    def products(query: str = Query(...)):
+        calls.append(query)
+        if query == "slow":
+            return {"query": query, "summary": None, "partial": True}
+        return {"query": query, "summary": f"answer {len(calls)}", "partial": False}
+
+    @app.post("/outlets")
+    def outlets(req: Question):
+        calls.append(req.question)
+        return {"rows": [req.question]}
+
+    return TestClient(app), cache, calls, clock, data
+
+
+def test_repeat_get_is_served_from_cache(served):
+    client, cache, calls, _, _ = served
+    first = client.get("/products", params={"query": "BPA free tumblers"})
+    second = client.get("/products", params={"query": "  bpa   FREE tumblers "})
+    assert first.headers["X-Cache"] == "MISS" and second.headers["X-Cache"] == "HIT"
+    assert second.json() == first.json()
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "public, max-age=60"
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_if_none_match_gets_304(served):
+    client, cache, calls, _, _ = served
+    etag = client.get("/products", params={"query": "mugs"}).headers["ETag"]
+    revalidated = client.get("/products", params={"query": "mugs"}, headers={"If-None-Match": f'W/{etag}, "other"'})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert cache.stats()["not_modified"] == 1
+    assert len(calls) == 1
+
+
+def test_data_generation_and_ttl_retire_entries(served):
+    client, _, calls, clock, data = served
+    etag = client.get("/products", params={"query": "mugs"}).headers["ETag"]
+
+    data.write_text("v2, rebuilt")  # new size and mtime: a new generation
+    os.utime(data, ns=(1, 1))
+    after_rebuild = client.get("/products", params={"query": "mugs"}, headers={"If-None-Match": etag})
+    assert after_rebuild.status_code == 200 and after_rebuild.headers["X-Cache"] == "MISS"
+    assert after_rebuild.headers["ETag"] != etag
+
+    clock.now = 61
+    assert client.get("/products", params={"query": "mugs"}).headers["X-Cache"] == "MISS"
+    assert len(calls) == 3
+
+
+def test_partial_answers_are_not_cached(served):
+    client, cache, calls, _, _ = served
+    for _ in range(2):
+        response = client.get("/products", params={"query": "slow"})
+        assert "ETag" not in response.headers
+    assert len(calls) == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_post_is_cached_by_normalized_body(served):
+    client, _, calls, _, _ = served
+    first = client.post("/outlets", json={"question": "Outlets in Shah Alam"})
+    second = client.post("/outlets", json={"question": "outlets in shah alam"})
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.headers["Cache-Control"] == "private, no-cache"
+    assert first.json() == second.json()
+    assert len(calls) == 1
+
+
+def test_helpers():
+    assert normalize_params({"query": " A  b ", "k": 3, "cursor": None}) == '{"k": 3, "query": "a b"}'
+    assert etag_matches("*", '"x"')
+    assert not etag_matches(None, '"x"')
+    assert not etag_matches('"y"', '"x"')
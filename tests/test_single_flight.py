@@ -0,0 +1,116 @@
+import threading
+import time
+from typing import Any, List, Optional
+
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from app.deadline import DeadlineExceeded
+from app.single_flight import SingleFlight, SingleFlightChatModel, llm_flights
+
+
+class SlowEchoModel(BaseChatModel):
+    """Upstream stand-in: slow enough for concurrent callers to overlap."""
+
+    model: str = "fake-model"
+    temperature: float = 0.0
+    calls: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-echo"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any):
+        self.calls.append(messages[-1].content)
+        time.sleep(0.2)
+        if messages[-1].content == "boom":
+            raise RuntimeError("upstream failed")
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=f"echo: {messages[-1].content}"))])
+
+
+def run_concurrently(fn, n: int) -> list:
+    barrier = threading.Barrier(n)
+    results = [None] * n
+
+    def worker(i):
+        barrier.wait()
+        try:
+            results[i] = fn()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_identical_deterministic_prompts_collapse():
+    inner = SlowEchoModel(calls=[])
+    llm = SingleFlightChatModel(inner=inner)
+    before = llm_flights.stats()
+
+    results = run_concurrently(lambda: llm.invoke([HumanMessage(content="Which tumblers are BPA free?")]).content, 8)
+
+    assert results == ["echo: Which tumblers are BPA free?"] * 8
+    assert len(inner.calls) == 1
+    after = llm_flights.stats()
+    assert after["collapsed_calls"] - before["collapsed_calls"] == 7
+    assert after["in_flight"] == 0
+
+
+def test_different_prompts_and_sampling_are_not_collapsed():
+    inner = SlowEchoModel(calls=[])
+    llm = SingleFlightChatModel(inner=inner)
+    run_concurrently(lambda: llm.invoke([HumanMessage(content=f"q{threading.get_ident()}")]), 4)
+    assert len(inner.calls) == 4
+
+    sampling = SlowEchoModel(calls=[], temperature=0.7)
+    llm = SingleFlightChatModel(inner=sampling)
+    run_concurrently(lambda: llm.invoke([HumanMessage(content="same")]), 4)
+    assert len(sampling.calls) == 4
+
+
+def test_errors_reach_every_waiter():
+    inner = SlowEchoModel(calls=[])
+    llm = SingleFlightChatModel(inner=inner)
+    results = run_concurrently(lambda: llm.invoke([HumanMessage(content="boom")]), 4)
+    assert len(inner.calls) == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_group_stats_and_no_caching_after_completion():
+    group = SingleFlight()
+    assert group.do("k", lambda: 1) == 1
+    assert group.do("k", lambda: 2) == 2
+    stats = group.stats()
+    assert stats["upstream_calls"] == 2
+    assert stats["collapse_ratio"] == pytest.approx(0.0)
+
+
+def test_waiters_retry_when_the_leader_runs_out_of_time():
+    group = SingleFlight()
+    leader_started = threading.Event()
+    calls = []
+
+    def short_budget():
+        calls.append("leader")
+        leader_started.set()
+        time.sleep(0.1)
+        raise DeadlineExceeded("leader's deadline")
+
+    def long_budget():
+        calls.append("waiter")
+        return "answer"
+
+    leader = threading.Thread(target=lambda: pytest.raises(DeadlineExceeded, group.do, "k", short_budget))
+    leader.start()
+    leader_started.wait()
+    assert group.do("k", long_budget, timeout=5) == "answer"
+    leader.join()
+    assert calls == ["leader", "waiter"]
+    assert group.stats()["in_flight"] == 0
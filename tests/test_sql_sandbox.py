@@ -0,0 +1,90 @@
+import sqlite3
+import time
+import pytest
+from app import sql_sandbox
+from app.deadline import DeadlineExceeded, deadline_scope
+from app.sql_sandbox import InvalidSQLError, QueryBudgetExceeded, QueryDeadlineExceeded, UnsafeSQLError
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "outlets.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE outlets (id INTEGER PRIMARY KEY, name TEXT, address TEXT, hours TEXT, services TEXT)")
+    conn.execute("CREATE TABLE secrets (value TEXT)")
+    conn.executemany(
+        "INSERT INTO outlets (name, address) VALUES (?, ?)",
+        [(f"Outlet {i}", f"{i} Jalan Test") for i in range(200)],
+    )
+    conn.commit()
+    conn.close()
+    return str(path)
+
+
+def test_select_on_outlets_is_allowed(db_path):
+    conn = sql_sandbox.connect(db_path)
+    rows = conn.guarded_execute(*sql_sandbox.limit_sql("SELECT name FROM outlets WHERE address LIKE '%1%';", 5)).fetchall()
+    assert len(rows) == 5
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT value FROM secrets",
+    "SELECT name FROM sqlite_master",
+    "WITH RECURSIVE r(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM r) SELECT n FROM r",
+    "SELECT zeroblob(100)",
+    "DELETE FROM outlets",
+])
+def test_disallowed_statements_raise_unsafe(db_path, sql):
+    conn = sql_sandbox.connect(db_path)
+    with pytest.raises(UnsafeSQLError):
+        conn.guarded_execute(sql).fetchall()
+
+
+def test_runaway_cross_join_is_stopped(db_path):
+    conn = sql_sandbox.connect(db_path, max_instructions=100_000)
+    with pytest.raises(QueryBudgetExceeded):
+        conn.guarded_execute("SELECT COUNT(*) FROM outlets a, outlets b, outlets c").fetchall()
+
+
+def test_request_deadline_caps_query_timeout(db_path):
+    conn = sql_sandbox.connect(db_path, max_instructions=10**12, timeout_s=30)
+    start = time.monotonic()
+    with deadline_scope(0.3), pytest.raises(QueryBudgetExceeded):
+        conn.guarded_execute("SELECT COUNT(*) FROM outlets a, outlets b, outlets c, outlets d").fetchall()
+    assert time.monotonic() - start < 5
+
+
+def test_bad_sql_is_typed(db_path):
+    conn = sql_sandbox.connect(db_path)
+    with pytest.raises(InvalidSQLError):
+        conn.guarded_execute("SELECT missing_column FROM outlets")
+
+
+SPARSE_CROSS_JOIN = "SELECT a.name FROM outlets a, outlets b, outlets c WHERE a.id + b.id + c.id IN (4, 599)"
+
+
+def test_budget_is_enforced_while_fetching(db_path):
+    conn = sql_sandbox.connect(db_path, max_instructions=1_000_000)
+    cursor = conn.guarded_execute(SPARSE_CROSS_JOIN)  # the first row comes early, the rest take millions of steps
+    with pytest.raises(QueryBudgetExceeded):
+        conn.guarded_fetchall(cursor)
+
+
+def test_request_deadline_during_fetch_is_a_deadline_error(db_path):
+    conn = sql_sandbox.connect(db_path, max_instructions=10**12, timeout_s=30)
+    with deadline_scope(0.3):
+        cursor = conn.guarded_execute(SPARSE_CROSS_JOIN)
+        with pytest.raises(QueryDeadlineExceeded) as raised:
+            conn.guarded_fetchall(cursor)
+    assert isinstance(raised.value, DeadlineExceeded)
+
+
+def test_run_outlet_sql_raises_deadline_from_fetch(db_path, monkeypatch):
+    from app import text2sql_outlets
+
+    monkeypatch.setattr(text2sql_outlets, "DB_PATH", db_path)
+    with deadline_scope(0.3), pytest.raises(DeadlineExceeded):
+        text2sql_outlets.run_outlet_sql(SPARSE_CROSS_JOIN, limit=5)
+
+    result = text2sql_outlets.run_outlet_sql(SPARSE_CROSS_JOIN, limit=5)
+    assert result["error_type"] == "QueryBudgetExceeded"
@@ -0,0 +1,20 @@
+import pytest
+
+from app import startup_budget
+
+
+@pytest.fixture(scope="module")
+def startup():
+    return startup_budget.measure()
+
+
+def test_heavy_modules_load_on_first_use(startup):
+    # Also proves app.main imports without GOOGLE_API_KEY (measure() unsets it)
+    assert startup["deferred_imported"] == []
+
+
+def test_problems_reports_regressions():
+    result = {"import_ms": 2500.0, "first_response_ms": 100.0, "deferred_imported": ["torch"], "slowest": []}
+    found = startup_budget.problems(result, import_budget_ms=2000, first_response_budget_ms=4000)
+    assert len(found) == 2
+    assert "torch" in found[0]
@@ -0,0 +1,113 @@
+import threading
+import time
+from typing import Any, List
+
+from langchain.tools import tool
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from app.deadline import deadline_scope
+from app.single_flight import SingleFlightChatModel
+from chatbot_app.tool_agent import ToolCallingAgent
+
+
+class ScriptedToolModel(BaseChatModel):
+    """Replies from a script; records the messages and bound tools of every call."""
+
+    script: List[AIMessage]
+    seen: List[list] = []
+    bound_tools: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[t.name for t in tools], **kwargs)
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any):
+        self.seen.append(list(messages))
+        self.bound_tools = kwargs.get("tools", [])
+        return ChatResult(generations=[ChatGeneration(message=self.script[len(self.seen) - 1])])
+
+
+active = []
+peak = []
+lock = threading.Lock()
+
+
+def _track(name: str) -> None:
+    with lock:
+        active.append(name)
+        peak.append(len(active))
+    time.sleep(0.2)
+    with lock:
+        active.remove(name)
+
+
+@tool("product_search_tool")
+def product_tool(query: str) -> str:
+    """Product questions."""
+    _track("product")
+    return f"The All Day Cup costs RM79. It is made of stainless steel. ({query})"
+
+
+@tool("outlet_search_tool")
+def outlet_tool(query: str) -> str:
+    """Outlet questions."""
+    _track("outlet")
+    return f"ZUS Coffee Bangsar Village, Jalan Telawi 1, Bangsar. ({query})"
+
+
+def two_tool_script():
+    return [
+        AIMessage(content="", tool_calls=[
+            {"name": "product_search_tool", "args": {"query": "All Day Cup price"}, "id": "c1"},
+            {"name": "outlet_search_tool", "args": {"query": "Bangsar"}, "id": "c2"},
+        ]),
+        AIMessage(content="The All Day Cup is RM79, and yes, there is an outlet in Bangsar Village."),
+    ]
+
+
+def test_independent_tool_calls_run_concurrently():
+    peak.clear()
+    model = ScriptedToolModel(script=two_tool_script(), seen=[])
+    agent = ToolCallingAgent(model, [product_tool, outlet_tool])
+
+    start = time.perf_counter()
+    events = list(agent.stream("price of the All Day Cup and is there an outlet in Bangsar?"))
+    elapsed = time.perf_counter() - start
+
+    assert [e["type"] for e in events] == ["tool", "tool", "answer"]
+    assert events[-1] == {"type": "answer", "answer": "The All Day Cup is RM79, and yes, there is an outlet in Bangsar Village.", "partial": False}
+    assert max(peak) == 2 and elapsed < 0.4
+    assert len(model.seen) == 2
+    tool_messages = [m for m in model.seen[1] if isinstance(m, ToolMessage)]
+    assert [m.tool_call_id for m in tool_messages] == ["c1", "c2"]
+
+
+def test_history_is_sent_and_unknown_tools_are_reported():
+    script = [
+        AIMessage(content="", tool_calls=[{"name": "weather_tool", "args": {}, "id": "x"}]),
+        AIMessage(content=[{"type": "text", "text": "Sorry, I can't check the weather."}]),
+    ]
+    model = ScriptedToolModel(script=script, seen=[])
+    agent = ToolCallingAgent(model, [product_tool])
+    history = [HumanMessage(content="hi"), AIMessage(content="Hello!")]
+
+    events = list(agent.stream("weather?", history=history))
+    assert events[-1]["answer"] == "Sorry, I can't check the weather."
+    assert model.seen[0][1:3] == history
+    assert "unknown tool" in model.seen[1][-1].content
+
+
+def test_deadline_returns_partial_answer_from_tool_output():
+    model = ScriptedToolModel(script=two_tool_script(), seen=[])
+    agent = ToolCallingAgent(SingleFlightChatModel(inner=model), [product_tool, outlet_tool])
+    with deadline_scope(0.1):
+        events = list(agent.stream("price of the All Day Cup and is there an outlet in Bangsar?"))
+
+    assert model.bound_tools == ["product_search_tool", "outlet_search_tool"]
+    assert events[-1]["partial"] is True
+    assert "Bangsar" in events[-1]["answer"]
@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+from app.warmup import Check, Readiness
+
+
+def fail():
+    raise RuntimeError("outlets.db missing")
+
+
+def test_ready_after_required_checks_pass():
+    calls = []
+    readiness = Readiness([Check("embedder", lambda: calls.append("embedder")), Check("outlets_db", lambda: calls.append("db"))])
+    assert not readiness.ready
+    assert readiness.report()["components"]["embedder"]["status"] == "pending"
+
+    readiness.run()
+    report = readiness.report()
+    assert calls == ["embedder", "db"]
+    assert report["ready"] and report["warmup_finished"]
+    assert report["components"]["outlets_db"]["status"] == "ok"
+    assert report["components"]["outlets_db"]["duration_ms"] >= 0
+
+
+def test_failed_required_check_keeps_worker_unready():
+    slept = []
+    readiness = Readiness([Check("embedder", lambda: None), Check("outlets_db", fail)], max_attempts=3, sleep=slept.append)
+    readiness.run()
+    report = readiness.report()
+    assert not report["ready"]
+    assert report["components"]["outlets_db"]["error"] == "RuntimeError: outlets.db missing"
+    assert report["components"]["outlets_db"]["attempts"] == 3
+    assert slept == [1.0, 2.0]
+    # Retrying will not help any more: fail liveness so the worker is restarted
+    assert not readiness.healthy
+
+
+def test_transient_failure_is_retried():
+    failures = [RuntimeError("database is locked")]
+
+    def locked_once():
+        if failures:
+            raise failures.pop()
+
+    embedder_calls = []
+    readiness = Readiness([Check("embedder", lambda: embedder_calls.append(1)), Check("outlets_db", locked_once)], sleep=lambda s: None)
+    readiness.run()
+    assert readiness.ready and readiness.healthy
+    assert readiness.report()["components"]["outlets_db"]["attempts"] == 2
+    assert len(embedder_calls) == 1  # checks that passed are not re-run
+
+
+def test_optional_check_failure_is_reported_but_ready():
+    readiness = Readiness([Check("embedder", lambda: None), Check("llm", fail, required=False)], sleep=lambda s: pytest.fail("retried"))
+    readiness.run()
+    report = readiness.report()
+    assert report["ready"] and readiness.healthy
+    assert report["components"]["llm"]["status"] == "failed"
+
+
+def test_background_start_and_skip():
+    readiness = Readiness([Check("embedder", lambda: time.sleep(0.05))])
+    readiness.start()
+    assert not readiness.ready
+    readiness._thread.join(timeout=5)
+    assert readiness.ready
+
+    skipped = Readiness([Check("embedder", fail)])
+    skipped.skip()
+    assert skipped.ready
+    assert skipped.report()["components"]["embedder"]["status"] == "skipped"